@@ -1,6 +1,7 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app.config import get_settings
+from app.schemas.usuario import UsuarioResponse
 
 # JWT sirve para crear y verificar tokens de acceso usando una clave secreta
 # en este archivo se manejan las funciones relacionadas con la autenticación
@@ -10,6 +11,7 @@ settings = get_settings()
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+AUTH_CLAIMS_EN_TOKEN = settings.AUTH_CLAIMS_EN_TOKEN
 
 
 def crear_token(data: dict):
@@ -27,4 +29,27 @@ def verificar_token(token: str):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+
+def claims_de_usuario(usuario) -> dict:
+    """Datos del usuario que viajan en el token cuando AUTH_CLAIMS_EN_TOKEN está activo."""
+    if not AUTH_CLAIMS_EN_TOKEN:
+        return {}
+    return {
+        "usr": UsuarioResponse.model_validate(usuario).model_dump(),
+    }
+
+
+def usuario_desde_claims(payload: dict) -> UsuarioResponse | None:
+    """
+    Reconstruye el usuario desde un token con claims, sin ir a la base.
+    Devuelve None si el modo está desactivado o el token no trae los datos.
+    """
+    if not AUTH_CLAIMS_EN_TOKEN or "usr" not in payload:
+        return None
+    try:
+        usuario = UsuarioResponse.model_validate(payload["usr"])
+    except ValueError:
+        return None
+    return usuario if usuario.dni == payload.get("sub") else None
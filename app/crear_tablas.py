@@ -1,15 +1,19 @@
-from app.database import engine, Base
+from alembic import command
+from alembic.config import Config
+
+from app.database import ALEMBIC_INI, engine, Base
 from app.models import *
 
-# Esta función crea las tablas en la base de datos
+# Esta función crea las tablas en la base de datos (desarrollo; en producción: alembic upgrade head)
 def crear_tablas():
     try:
         Base.metadata.create_all(bind=engine)
+        # El esquema de los modelos es el de la última revisión: se marca para verificar_esquema
+        # (salvo los índices de búsqueda de PostgreSQL de la revisión 0002, que no están en los modelos)
+        command.stamp(Config(ALEMBIC_INI), "head")
         print("Tablas creadas correctamente")
     except Exception as e:
         print(f"Error al crear tablas: {e}")
 
 if __name__ == "__main__":
     crear_tablas()
-
-
@@ -0,0 +1,28 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.alertaStock import AlertaStock
+
+def get_alertas(
+    db: Session,
+    desde_id: Optional[int] = None,
+    id_producto: Optional[int] = None,
+    tipo: Optional[str] = None,
+    limit: int = 100,
+) -> List[AlertaStock]:
+    """
+    Alertas más recientes primero; con `desde_id`, solo las posteriores a ese
+    id y en orden ascendente (para continuar un stream).
+    """
+    query = db.query(AlertaStock)
+    if id_producto is not None:
+        query = query.filter(AlertaStock.id_producto == id_producto)
+    if tipo:
+        query = query.filter(AlertaStock.tipo == tipo)
+    if desde_id is not None:
+        return query.filter(AlertaStock.id > desde_id).order_by(AlertaStock.id).limit(limit).all()
+    return query.order_by(AlertaStock.id.desc()).limit(limit).all()
+
+def ultimo_id(db: Session) -> int:
+    """Id de la última alerta registrada (0 si no hay)"""
+    return db.execute(select(AlertaStock.id).order_by(AlertaStock.id.desc()).limit(1)).scalar() or 0
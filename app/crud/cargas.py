@@ -0,0 +1,45 @@
+"""
+Estrategias de carga de relaciones para ventas y compras.
+
+Los listados usaban cadenas de joinedload sobre detalles -> presentación ->
+producto, que devuelven una fila ancha por cada línea de detalle y obligan a
+envolver el LIMIT en una subconsulta. Con selectinload cada relación se carga
+con un SELECT ... WHERE id IN (...) aparte: la consulta principal pagina solo
+las cabeceras y las presentaciones, productos, clientes y usuarios repetidos
+entre órdenes se piden una sola vez (las relaciones muchos-a-uno que ya están
+en el identity map de la sesión no se vuelven a consultar).
+"""
+from sqlalchemy.orm import selectinload
+
+from app.models.compra import Compra, DetalleCompra
+from app.models.presentacion import Presentacion
+from app.models.venta import Venta, DetalleVenta
+
+
+def opciones_venta() -> tuple:
+    """Relaciones que necesita VentaResponse."""
+    return (
+        selectinload(Venta.cliente),
+        selectinload(Venta.usuario),
+        selectinload(Venta.detalles)
+        .selectinload(DetalleVenta.presentacion)
+        .selectinload(Presentacion.producto),
+    )
+
+
+def opciones_compra() -> tuple:
+    """Relaciones que necesita CompraResponse."""
+    return (
+        selectinload(Compra.usuario),
+        selectinload(Compra.proveedor),
+        selectinload(Compra.detalles)
+        .selectinload(DetalleCompra.presentacion)
+        .selectinload(Presentacion.producto),
+    )
+
+
+def opciones_detalle_compra() -> tuple:
+    """Relaciones que necesita DetalleCompraResponse."""
+    return (
+        selectinload(DetalleCompra.presentacion).selectinload(Presentacion.producto),
+    )
@@ -115,6 +115,6 @@ def eliminar_categoria_db(db: Session, categoria_id: int) -> bool:
 
     # Eliminación lógica: cambiar estado a 'I' (Inactivo)
     db_categoria.estado = "I"
-    db_categoria.fecha_edicion = datetime.now().isoformat()
+    db_categoria.fecha_edicion = datetime.now()
     db.commit()
     return True
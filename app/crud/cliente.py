@@ -31,7 +31,7 @@ def crear_cliente_db(db: Session, cliente: ClienteCreate, current_user_id: int =
         telefono=cliente.telefono,
         correo=cliente.correo,
         estado='A',
-        fecha_creacion=datetime.now().isoformat(),
+        fecha_creacion=datetime.now(),
         fecha_edicion=None,
         created_by=current_user_id,
         updated_by=None
@@ -109,7 +109,7 @@ def actualizar_cliente_db(db: Session, cliente_id: int, cliente_update: ClienteU
     if cliente_update.telefono is not None:
         db_cliente.telefono = cliente_update.telefono
     from datetime import datetime
-    db_cliente.fecha_edicion = datetime.now().isoformat()
+    db_cliente.fecha_edicion = datetime.now()
     db_cliente.updated_by = current_user_id
     db.commit()
     db.refresh(db_cliente)
@@ -1,37 +1,42 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from app.models.compra import Compra, DetalleCompra
 from app.models.presentacion import Presentacion
-from app.models.producto import Producto
 from app.schemas.compra import CompraCreate, CompraUpdate, DetalleCompraCreate, DetalleCompraUpdate
+from app.services import idempotencia, stock_service
+from app.crud import cargas, paginacion
 from typing import Optional, List
+from collections import defaultdict
 from datetime import date
 import datetime
 
+ESTADO_BORRADOR = "BORRADOR"
+# Compras cuyos detalles no están sumados al stock: anuladas y borradores
+# (p. ej. los pedidos sugeridos por reposición) hasta que se confirmen
+ESTADOS_SIN_STOCK = ("ANULADA", ESTADO_BORRADOR)
+
+def _paginar_compras(query, skip: int, limit: int, cursor: Optional[str]) -> List[Compra]:
+    """Pagina por cursor (fecha, id) si se envía `cursor`; si no, por offset ordenando por ID descendente"""
+    if cursor is not None:
+        return paginacion.listar_por_cursor(query, Compra.fecha_compra, Compra.id, cursor, limit)
+    return query.order_by(Compra.id.desc()).offset(skip).limit(limit).all()
+
 def get_compras(
     db: Session, 
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Compra]:
     """Obtener lista de compras con relaciones, ordenadas por ID descendente"""
-    return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
-        .order_by(Compra.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Compra)\
+        .options(*cargas.opciones_compra())
+    return _paginar_compras(query, skip, limit, cursor)
 
 def get_compra_by_id(db: Session, compra_id: int) -> Optional[Compra]:
     """Obtener una compra por ID con sus relaciones"""
     return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
+        .options(*cargas.opciones_compra())\
         .filter(Compra.id == compra_id)\
         .first()
 
@@ -39,39 +44,27 @@ def get_compras_by_proveedor(
     db: Session, 
     proveedor_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Compra]:
     """Obtener compras por proveedor"""
-    return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Compra.id_proveedor == proveedor_id)\
-        .order_by(Compra.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Compra)\
+        .options(*cargas.opciones_compra())\
+        .filter(Compra.id_proveedor == proveedor_id)
+    return _paginar_compras(query, skip, limit, cursor)
 
 def get_compras_by_usuario(
     db: Session, 
     usuario_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Compra]:
     """Obtener compras por usuario"""
-    return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Compra.id_usuario == usuario_id)\
-        .order_by(Compra.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Compra)\
+        .options(*cargas.opciones_compra())\
+        .filter(Compra.id_usuario == usuario_id)
+    return _paginar_compras(query, skip, limit, cursor)
 
 
 def get_compras_by_fecha(
@@ -79,37 +72,69 @@ def get_compras_by_fecha(
     fecha_inicio,
     fecha_fin,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Compra]:
     """Obtener compras por rango de fecha de compra (fecha_compra)."""
-    return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Compra.fecha_compra >= fecha_inicio, Compra.fecha_compra <= fecha_fin)\
-        .order_by(Compra.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Compra)\
+        .options(*cargas.opciones_compra())\
+        .filter(Compra.fecha_compra >= fecha_inicio, Compra.fecha_compra <= fecha_fin)
+    return _paginar_compras(query, skip, limit, cursor)
+
 
+def crear_compra(
+    db: Session,
+    compra: CompraCreate,
+    current_user_id: int = None,
+    clave_idempotencia: Optional[str] = None,
+) -> Compra:
+    """
+    Crear una nueva compra.
+    Con `clave_idempotencia` (cabecera Idempotency-Key), un reintento con la misma
+    clave devuelve la compra ya creada sin volver a sumar stock.
+    """
+    operacion = lambda: _crear_compra(db, compra, current_user_id, clave_idempotencia)
+    try:
+        return stock_service.con_reintentos(db, operacion)
+    except IntegrityError:
+        if not clave_idempotencia:
+            raise
+        # Otra petición con la misma clave se confirmó en paralelo: al repetir se devuelve su compra
+        return stock_service.con_reintentos(db, operacion)
+
+def _crear_compra(
+    db: Session,
+    compra: CompraCreate,
+    current_user_id: int = None,
+    clave_idempotencia: Optional[str] = None,
+) -> Compra:
+    if clave_idempotencia:
+        huella = idempotencia.huella(compra)
+        id_existente = idempotencia.resolver(
+            db, idempotencia.AMBITO_COMPRA, current_user_id, clave_idempotencia, huella
+        )
+        if id_existente is not None:
+            existente = get_compra_by_id(db, id_existente)
+            if existente is None:
+                raise ValueError(f"La compra {id_existente} creada con esta clave de idempotencia ya no existe")
+            return existente
 
-def crear_compra(db: Session, compra: CompraCreate, current_user_id: int = None) -> Compra:
-    """Crear una nueva compra"""
     compra_data = compra.model_dump(exclude={'detalles'})
     compra_data['created_by'] = current_user_id
     compra_data['updated_by'] = None
     db_compra = Compra(**compra_data)
     db.add(db_compra)
-    db.commit()
-    db.refresh(db_compra)
+    db.flush()  # Para obtener el ID de la compra
     
     # Crear detalles de compra si los hay
     if compra.detalles:
+        # Obtener todas las presentaciones en una sola consulta
+        presentaciones = stock_service.resolver_presentaciones(
+            db, (detalle.id_presentacion for detalle in compra.detalles)
+        )
+        lineas = []
         for detalle in compra.detalles:
-            # Obtener la presentación
-            presentacion = db.query(Presentacion).filter(Presentacion.id == detalle.id_presentacion).first()
+            presentacion = presentaciones.get(detalle.id_presentacion)
             if not presentacion:
                 continue
                 
@@ -118,36 +143,40 @@ def crear_compra(db: Session, compra: CompraCreate, current_user_id: int = None)
             
             # Si no se proporciona precio_unitario, tomarlo del precio_compra de la presentación
             if 'precio_unitario' not in detalle_data or detalle_data['precio_unitario'] is None:
-                detalle_data['precio_unitario'] = presentacion.precio_compra
+                detalle_data['precio_unitario'] = presentacion["precio_compra"]
             
             # Si no se proporciona subtotal, calcularlo
             if detalle_data['subtotal'] is None:
                 detalle_data['subtotal'] = detalle_data['precio_unitario'] * detalle.cantidad
             
-            db_detalle = DetalleCompra(**detalle_data)
-            db.add(db_detalle)
-            
-            # Actualizar el stock del producto
-            producto = db.query(Producto).filter(Producto.id == presentacion.id_producto).first()
-            if producto:
-                # Calcular unidades totales: cantidad de presentaciones * cantidad_base de cada presentación
-                unidades_agregadas = detalle.cantidad * presentacion.cantidad_base
-                producto.stock_actual = (producto.stock_actual or 0) + unidades_agregadas
+            db.add(DetalleCompra(**detalle_data))
+            lineas.append((detalle.id_presentacion, detalle.cantidad))
         
-        db.commit()
+        # Actualizar el stock: cantidad de presentaciones * cantidad_base de cada presentación
+        if db_compra.estado not in ESTADOS_SIN_STOCK:
+            stock_service.ajustar_stock(
+                db, stock_service.unidades_por_producto(lineas, presentaciones),
+                stock_service.MOVIMIENTO_COMPRA, id_origen=db_compra.id, id_usuario=current_user_id,
+            )
+
+    if clave_idempotencia:
+        idempotencia.registrar(
+            db, idempotencia.AMBITO_COMPRA, current_user_id, {clave_idempotencia: db_compra.id}, huella=huella,
+        )
+    
+    db.commit()
     
     # Cargar las relaciones
-    return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Compra.id == db_compra.id)\
-        .first()
+    return get_compra_by_id(db, db_compra.id)
 
 def actualizar_compra(db: Session, compra_id: int, compra: CompraUpdate, current_user_id: int = None) -> Optional[Compra]:
-    """Actualizar una compra existente"""
+    """
+    Actualizar una compra existente.
+    Confirmar un BORRADOR (pasarlo a otro estado que no sea ANULADA) suma sus detalles al stock.
+    """
+    return stock_service.con_reintentos(db, lambda: _actualizar_compra(db, compra_id, compra, current_user_id))
+
+def _actualizar_compra(db: Session, compra_id: int, compra: CompraUpdate, current_user_id: int = None) -> Optional[Compra]:
     db_compra = db.query(Compra).filter(Compra.id == compra_id).first()
     
     if not db_compra:
@@ -155,6 +184,11 @@ def actualizar_compra(db: Session, compra_id: int, compra: CompraUpdate, current
     
     # Actualizar solo los campos proporcionados
     update_data = compra.model_dump(exclude_unset=True)
+    nuevo_estado = update_data.get('estado')
+    if nuevo_estado == ESTADO_BORRADOR and db_compra.estado not in ESTADOS_SIN_STOCK:
+        raise ValueError("Una compra confirmada no puede volver a BORRADOR")
+    if db_compra.estado == ESTADO_BORRADOR and nuevo_estado and nuevo_estado not in ESTADOS_SIN_STOCK:
+        _confirmar_borrador(db, db_compra, nuevo_estado, current_user_id)
     for key, value in update_data.items():
         setattr(db_compra, key, value)
     
@@ -165,16 +199,51 @@ def actualizar_compra(db: Session, compra_id: int, compra: CompraUpdate, current
     
     # Cargar las relaciones
     return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
+        .options(*cargas.opciones_compra())\
         .filter(Compra.id == db_compra.id)\
         .first()
 
-def anular_compra(db: Session, compra_id: int) -> Optional[Compra]:
+def _unidades_por_producto_compra(db: Session, compra_id: int) -> dict:
+    """Unidades base por producto de todos los detalles de una compra (una sola consulta)."""
+    filas = db.execute(
+        select(Presentacion.id_producto, func.sum(DetalleCompra.cantidad * Presentacion.cantidad_base))
+        .join(Presentacion, Presentacion.id == DetalleCompra.id_presentacion)
+        .where(DetalleCompra.id_compra == compra_id)
+        .group_by(Presentacion.id_producto)
+    ).all()
+    return {id_producto: unidades for id_producto, unidades in filas}
+
+def _compra_suma_stock(db: Session, compra_id: int) -> bool:
+    """
+    Indica si los detalles de la compra están sumados al stock (no es borrador ni está anulada).
+    Bloquea la fila de la compra hasta el commit: un cambio de detalle en paralelo con la
+    confirmación o la anulación espera a que termine y ve el estado y los detalles resultantes.
+    """
+    estado = db.execute(select(Compra.estado).where(Compra.id == compra_id).with_for_update()).scalar()
+    return estado is not None and estado not in ESTADOS_SIN_STOCK
+
+def _confirmar_borrador(db: Session, db_compra: Compra, nuevo_estado: str, current_user_id: int = None) -> None:
+    """Pasa un BORRADOR a `nuevo_estado` y suma sus detalles al stock (una sola vez aunque se confirme en paralelo)."""
+    confirmada = db.execute(
+        update(Compra)
+        .where(Compra.id == db_compra.id, Compra.estado == ESTADO_BORRADOR)
+        .values(estado=nuevo_estado)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not confirmada:
+        return
+    if db_compra.fecha_compra is None:
+        db_compra.fecha_compra = datetime.datetime.now()
+    stock_service.ajustar_stock(
+        db, _unidades_por_producto_compra(db, db_compra.id),
+        stock_service.MOVIMIENTO_COMPRA, id_origen=db_compra.id, id_usuario=current_user_id,
+    )
+
+def anular_compra(db: Session, compra_id: int, current_user_id: int = None) -> Optional[Compra]:
     """Anular una compra (cambio de estado a ANULADA y reversión de stock)"""
+    return stock_service.con_reintentos(db, lambda: _anular_compra(db, compra_id, current_user_id))
+
+def _anular_compra(db: Session, compra_id: int, current_user_id: int = None) -> Optional[Compra]:
     db_compra = db.query(Compra).filter(Compra.id == compra_id).first()
     
     if not db_compra:
@@ -184,48 +253,56 @@ def anular_compra(db: Session, compra_id: int) -> Optional[Compra]:
     if db_compra.estado == "ANULADA":
         return db_compra
     
-    # Revertir el stock de todos los detalles
-    detalles = db.query(DetalleCompra).filter(DetalleCompra.id_compra == compra_id).all()
-    for detalle in detalles:
-        presentacion = db.query(Presentacion).filter(Presentacion.id == detalle.id_presentacion).first()
-        if presentacion:
-            producto = db.query(Producto).filter(Producto.id == presentacion.id_producto).first()
-            if producto:
-                unidades_revertidas = detalle.cantidad * presentacion.cantidad_base
-                producto.stock_actual = (producto.stock_actual or 0) - unidades_revertidas
-    
-    # Cambiar el estado a ANULADA
-    db_compra.estado = "ANULADA"
-    db_compra.fecha_edicion = datetime.datetime.utcnow()
+    # Cambiar el estado a ANULADA solo si nadie la anuló en paralelo
+    anulada = db.execute(
+        update(Compra)
+        .where(Compra.id == compra_id, Compra.estado.not_in(ESTADOS_SIN_STOCK))
+        .values(estado="ANULADA", fecha_edicion=datetime.datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    if not anulada and db_compra.estado == ESTADO_BORRADOR:
+        # Un borrador no sumó stock: solo cambia el estado
+        db.execute(
+            update(Compra)
+            .where(Compra.id == compra_id, Compra.estado == ESTADO_BORRADOR)
+            .values(estado="ANULADA", fecha_edicion=datetime.datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    elif anulada:
+        # Revertir el stock de todos los detalles
+        unidades = _unidades_por_producto_compra(db, compra_id)
+        stock_service.ajustar_stock(
+            db, {id_producto: -total for id_producto, total in unidades.items()},
+            stock_service.MOVIMIENTO_ANULACION_COMPRA, id_origen=compra_id, id_usuario=current_user_id,
+        )
+    
     db.commit()
     
     # Cargar las relaciones y devolver
-    return db.query(Compra)\
-        .options(
-            joinedload(Compra.usuario),
-            joinedload(Compra.proveedor),
-            joinedload(Compra.detalles).joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Compra.id == db_compra.id)\
-        .first()
+    return get_compra_by_id(db, compra_id)
 
-def eliminar_compra(db: Session, compra_id: int) -> bool:
+def eliminar_compra(db: Session, compra_id: int, current_user_id: int = None) -> bool:
     """Eliminar una compra (eliminación física)"""
+    return stock_service.con_reintentos(db, lambda: _eliminar_compra(db, compra_id, current_user_id))
+
+def _eliminar_compra(db: Session, compra_id: int, current_user_id: int = None) -> bool:
     db_compra = db.query(Compra).filter(Compra.id == compra_id).first()
     
     if not db_compra:
         return False
     
     # Revertir el stock de todos los detalles antes de eliminar
-    detalles = db.query(DetalleCompra).filter(DetalleCompra.id_compra == compra_id).all()
-    for detalle in detalles:
-        presentacion = db.query(Presentacion).filter(Presentacion.id == detalle.id_presentacion).first()
-        if presentacion:
-            producto = db.query(Producto).filter(Producto.id == presentacion.id_producto).first()
-            if producto:
-                unidades_revertidas = detalle.cantidad * presentacion.cantidad_base
-                producto.stock_actual = (producto.stock_actual or 0) - unidades_revertidas
+    # (una compra anulada ya revirtió su stock al anularse y un borrador nunca lo sumó)
+    if db_compra.estado not in ESTADOS_SIN_STOCK:
+        unidades = _unidades_por_producto_compra(db, compra_id)
+        stock_service.ajustar_stock(
+            db, {id_producto: -total for id_producto, total in unidades.items()},
+            stock_service.MOVIMIENTO_ELIMINACION_COMPRA, id_origen=compra_id, id_usuario=current_user_id,
+        )
     
+    # Borrar los detalles primero: la relación no tiene cascade y el ORM intentaría dejar id_compra en NULL
+    db.query(DetalleCompra).filter(DetalleCompra.id_compra == compra_id).delete(synchronize_session=False)
     db.delete(db_compra)
     db.commit()
     return True
@@ -234,21 +311,24 @@ def eliminar_compra(db: Session, compra_id: int) -> bool:
 def get_detalles_compra(db: Session, compra_id: int) -> List[DetalleCompra]:
     """Obtener detalles de una compra"""
     return db.query(DetalleCompra)\
-        .options(joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto))\
+        .options(*cargas.opciones_detalle_compra())\
         .filter(DetalleCompra.id_compra == compra_id)\
         .all()
 
 def get_detalle_compra_by_id(db: Session, detalle_id: int) -> Optional[DetalleCompra]:
     """Obtener un detalle de compra por ID"""
     return db.query(DetalleCompra)\
-        .options(joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto))\
+        .options(*cargas.opciones_detalle_compra())\
         .filter(DetalleCompra.id == detalle_id)\
         .first()
 
-def crear_detalle_compra(db: Session, detalle: DetalleCompraCreate, compra_id: int) -> DetalleCompra:
+def crear_detalle_compra(db: Session, detalle: DetalleCompraCreate, compra_id: int, current_user_id: int = None) -> DetalleCompra:
     """Crear un detalle de compra"""
+    return stock_service.con_reintentos(db, lambda: _crear_detalle_compra(db, detalle, compra_id, current_user_id))
+
+def _crear_detalle_compra(db: Session, detalle: DetalleCompraCreate, compra_id: int, current_user_id: int = None) -> DetalleCompra:
     # Obtener la presentación
-    presentacion = db.query(Presentacion).filter(Presentacion.id == detalle.id_presentacion).first()
+    presentacion = stock_service.resolver_presentaciones(db, [detalle.id_presentacion]).get(detalle.id_presentacion)
     if not presentacion:
         return None
     
@@ -257,7 +337,7 @@ def crear_detalle_compra(db: Session, detalle: DetalleCompraCreate, compra_id: i
     
     # Si no se proporciona precio_unitario, tomarlo del precio_compra de la presentación
     if 'precio_unitario' not in detalle_data or detalle_data['precio_unitario'] is None:
-        detalle_data['precio_unitario'] = presentacion.precio_compra
+        detalle_data['precio_unitario'] = presentacion["precio_compra"]
     
     # Si no se proporciona subtotal, calcularlo
     if detalle_data['subtotal'] is None:
@@ -266,23 +346,22 @@ def crear_detalle_compra(db: Session, detalle: DetalleCompraCreate, compra_id: i
     db_detalle = DetalleCompra(**detalle_data)
     db.add(db_detalle)
     
-    # Actualizar el stock del producto
-    producto = db.query(Producto).filter(Producto.id == presentacion.id_producto).first()
-    if producto:
-        # Calcular unidades totales: cantidad de presentaciones * cantidad_base de cada presentación
-        unidades_agregadas = detalle.cantidad * presentacion.cantidad_base
-        producto.stock_actual = (producto.stock_actual or 0) + unidades_agregadas
+    # Actualizar el stock del producto: cantidad de presentaciones * cantidad_base
+    if _compra_suma_stock(db, compra_id):
+        stock_service.ajustar_stock(
+            db, {presentacion["id_producto"]: detalle.cantidad * presentacion["cantidad_base"]},
+            stock_service.MOVIMIENTO_DETALLE_COMPRA, id_origen=compra_id, id_usuario=current_user_id,
+        )
     
     db.commit()
-    db.refresh(db_detalle)
     
-    return db.query(DetalleCompra)\
-        .options(joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto))\
-        .filter(DetalleCompra.id == db_detalle.id)\
-        .first()
+    return get_detalle_compra_by_id(db, db_detalle.id)
 
-def actualizar_detalle_compra(db: Session, detalle_id: int, detalle: DetalleCompraUpdate) -> Optional[DetalleCompra]:
+def actualizar_detalle_compra(db: Session, detalle_id: int, detalle: DetalleCompraUpdate, current_user_id: int = None) -> Optional[DetalleCompra]:
     """Actualizar un detalle de compra"""
+    return stock_service.con_reintentos(db, lambda: _actualizar_detalle_compra(db, detalle_id, detalle, current_user_id))
+
+def _actualizar_detalle_compra(db: Session, detalle_id: int, detalle: DetalleCompraUpdate, current_user_id: int = None) -> Optional[DetalleCompra]:
     db_detalle = db.query(DetalleCompra).filter(DetalleCompra.id == detalle_id).first()
     
     if not db_detalle:
@@ -292,53 +371,52 @@ def actualizar_detalle_compra(db: Session, detalle_id: int, detalle: DetalleComp
     cantidad_anterior = db_detalle.cantidad
     presentacion_id_anterior = db_detalle.id_presentacion
     
-    # Si se está cambiando la cantidad o la presentación, ajustar el stock
-    if 'cantidad' in detalle.model_dump(exclude_unset=True) or 'id_presentacion' in detalle.model_dump(exclude_unset=True):
-        # Revertir el stock de la cantidad anterior
-        presentacion_anterior = db.query(Presentacion).filter(Presentacion.id == presentacion_id_anterior).first()
-        if presentacion_anterior:
-            producto = db.query(Producto).filter(Producto.id == presentacion_anterior.id_producto).first()
-            if producto:
-                unidades_revertidas = cantidad_anterior * presentacion_anterior.cantidad_base
-                producto.stock_actual = (producto.stock_actual or 0) - unidades_revertidas
-    
     # Actualizar los campos del detalle
     update_data = detalle.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_detalle, key, value)
     
-    # Aplicar el stock con los nuevos valores
-    if 'cantidad' in update_data or 'id_presentacion' in update_data:
-        nueva_presentacion = db.query(Presentacion).filter(Presentacion.id == db_detalle.id_presentacion).first()
+    # Si se está cambiando la cantidad o la presentación, ajustar el stock:
+    # revertir las unidades anteriores y aplicar las nuevas en un solo movimiento
+    cambia_unidades = 'cantidad' in update_data or 'id_presentacion' in update_data
+    if cambia_unidades and _compra_suma_stock(db, db_detalle.id_compra):
+        presentaciones = stock_service.resolver_presentaciones(
+            db, [presentacion_id_anterior, db_detalle.id_presentacion]
+        )
+        deltas = defaultdict(int)
+        presentacion_anterior = presentaciones.get(presentacion_id_anterior)
+        if presentacion_anterior:
+            deltas[presentacion_anterior["id_producto"]] -= cantidad_anterior * presentacion_anterior["cantidad_base"]
+        nueva_presentacion = presentaciones.get(db_detalle.id_presentacion)
         if nueva_presentacion:
-            producto = db.query(Producto).filter(Producto.id == nueva_presentacion.id_producto).first()
-            if producto:
-                nuevas_unidades = db_detalle.cantidad * nueva_presentacion.cantidad_base
-                producto.stock_actual = (producto.stock_actual or 0) + nuevas_unidades
+            deltas[nueva_presentacion["id_producto"]] += db_detalle.cantidad * nueva_presentacion["cantidad_base"]
+        stock_service.ajustar_stock(
+            db, deltas, stock_service.MOVIMIENTO_DETALLE_COMPRA,
+            id_origen=db_detalle.id_compra, id_usuario=current_user_id,
+        )
     
     db_detalle.fecha_edicion = datetime.datetime.utcnow()
     db.commit()
-    db.refresh(db_detalle)
     
-    return db.query(DetalleCompra)\
-        .options(joinedload(DetalleCompra.presentacion).joinedload(Presentacion.producto))\
-        .filter(DetalleCompra.id == db_detalle.id)\
-        .first()
+    return get_detalle_compra_by_id(db, detalle_id)
 
-def eliminar_detalle_compra(db: Session, detalle_id: int) -> bool:
+def eliminar_detalle_compra(db: Session, detalle_id: int, current_user_id: int = None) -> bool:
     """Eliminar un detalle de compra"""
+    return stock_service.con_reintentos(db, lambda: _eliminar_detalle_compra(db, detalle_id, current_user_id))
+
+def _eliminar_detalle_compra(db: Session, detalle_id: int, current_user_id: int = None) -> bool:
     db_detalle = db.query(DetalleCompra).filter(DetalleCompra.id == detalle_id).first()
     
     if not db_detalle:
         return False
     
     # Revertir el stock antes de eliminar
-    presentacion = db.query(Presentacion).filter(Presentacion.id == db_detalle.id_presentacion).first()
-    if presentacion:
-        producto = db.query(Producto).filter(Producto.id == presentacion.id_producto).first()
-        if producto:
-            unidades_revertidas = db_detalle.cantidad * presentacion.cantidad_base
-            producto.stock_actual = (producto.stock_actual or 0) - unidades_revertidas
+    presentacion = stock_service.resolver_presentaciones(db, [db_detalle.id_presentacion]).get(db_detalle.id_presentacion)
+    if presentacion and _compra_suma_stock(db, db_detalle.id_compra):
+        stock_service.ajustar_stock(
+            db, {presentacion["id_producto"]: -db_detalle.cantidad * presentacion["cantidad_base"]},
+            stock_service.MOVIMIENTO_DETALLE_COMPRA, id_origen=db_detalle.id_compra, id_usuario=current_user_id,
+        )
     
     db.delete(db_detalle)
     db.commit()
@@ -0,0 +1,149 @@
+"""
+Consultas del kardex (MovimientoStock) y fotos periódicas de stock (SnapshotStock).
+
+Cada movimiento guarda el saldo resultante, así que el stock de un producto a
+una fecha es el saldo de su último movimiento hasta esa fecha (una búsqueda en
+el índice (id_producto, fecha, id)). Para todo el catálogo se parte de la
+última foto anterior a la fecha y solo se leen los movimientos posteriores a
+ella (rango sobre el índice de fecha), en lugar de recorrer toda la historia.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import false, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.crud import paginacion
+from app.models.movimientoStock import MovimientoStock, SnapshotStock
+from app.models.producto import Producto
+
+# La foto se toma con este margen hacia atrás para que ninguna transacción en
+# curso tenga movimientos anteriores al corte todavía sin confirmar
+MARGEN_SNAPSHOT = timedelta(minutes=5)
+
+
+def get_movimientos_producto(
+    db: Session,
+    id_producto: int,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> List[MovimientoStock]:
+    """Movimientos de un producto, del más reciente al más antiguo (paginado por cursor)."""
+    query = db.query(MovimientoStock).filter(MovimientoStock.id_producto == id_producto)
+    if desde:
+        query = query.filter(MovimientoStock.fecha >= desde)
+    if hasta:
+        query = query.filter(MovimientoStock.fecha <= hasta)
+    return paginacion.paginar_por_cursor(
+        query, MovimientoStock.fecha, MovimientoStock.id, cursor, limit
+    ).all()
+
+
+def get_movimientos_origen(db: Session, origen: str, id_origen: int) -> List[MovimientoStock]:
+    """Movimientos generados por un documento (p. ej. origen='venta', id_origen=15)."""
+    return db.query(MovimientoStock).filter(
+        MovimientoStock.origen == origen,
+        MovimientoStock.id_origen == id_origen
+    ).order_by(MovimientoStock.id).all()
+
+
+def _ultimo_corte(db: Session, fecha: datetime) -> Optional[datetime]:
+    """Fecha de la última foto tomada hasta `fecha` (inclusive)."""
+    return db.execute(
+        select(func.max(SnapshotStock.fecha)).where(SnapshotStock.fecha <= fecha)
+    ).scalar()
+
+
+def get_stock_a_fecha(
+    db: Session,
+    fecha: datetime,
+    id_producto: Optional[int] = None,
+) -> List[dict]:
+    """
+    Stock de cada producto a una fecha.
+
+    stock = saldo del último movimiento en (corte, fecha] si lo hay;
+    si no, el stock de la foto del corte. Productos sin movimientos ni foto
+    (creados antes del kardex y sin foto previa a la fecha) devuelven None.
+    """
+    corte = _ultimo_corte(db, fecha)
+
+    ultimos = select(
+        MovimientoStock.id_producto,
+        func.max(MovimientoStock.id).label("id_movimiento"),
+    ).where(MovimientoStock.fecha <= fecha)
+    if corte is not None:
+        ultimos = ultimos.where(MovimientoStock.fecha > corte)
+    if id_producto is not None:
+        ultimos = ultimos.where(MovimientoStock.id_producto == id_producto)
+    ultimos = ultimos.group_by(MovimientoStock.id_producto).subquery()
+
+    foto = select(SnapshotStock.id_producto, SnapshotStock.stock).where(
+        SnapshotStock.fecha == corte if corte is not None else false()
+    )
+    if id_producto is not None:
+        foto = foto.where(SnapshotStock.id_producto == id_producto)
+    foto = foto.subquery()
+
+    query = (
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            func.coalesce(MovimientoStock.saldo, foto.c.stock).label("stock"),
+        )
+        .outerjoin(ultimos, ultimos.c.id_producto == Producto.id)
+        .outerjoin(MovimientoStock, MovimientoStock.id == ultimos.c.id_movimiento)
+        .outerjoin(foto, foto.c.id_producto == Producto.id)
+        .order_by(Producto.id)
+    )
+    if id_producto is not None:
+        query = query.where(Producto.id == id_producto)
+
+    return [
+        {"id_producto": fila.id, "codigo": fila.codigo, "nombre": fila.nombre,
+         "stock": fila.stock, "fecha": fecha, "corte": corte}
+        for fila in db.execute(query)
+    ]
+
+
+def tomar_snapshot(db: Session, corte: Optional[datetime] = None) -> int:
+    """
+    Guarda la foto del stock de todos los productos al corte indicado
+    (por defecto ahora menos MARGEN_SNAPSHOT), en una sola sentencia:
+    stock al corte = stock_actual - suma de movimientos posteriores al corte.
+
+    Returns:
+        Número de productos guardados (0 si ya existía una foto con ese corte).
+    """
+    corte = corte or (datetime.now() - MARGEN_SNAPSHOT).replace(microsecond=0)
+    existe = db.execute(
+        select(SnapshotStock.id).where(SnapshotStock.fecha == corte).limit(1)
+    ).first()
+    if existe:
+        return 0
+
+    posteriores = (
+        select(
+            MovimientoStock.id_producto,
+            func.sum(MovimientoStock.cantidad).label("cantidad"),
+        )
+        .where(MovimientoStock.fecha > corte)
+        .group_by(MovimientoStock.id_producto)
+        .subquery()
+    )
+    db.execute(
+        insert(SnapshotStock).from_select(
+            ["id_producto", "fecha", "stock"],
+            select(
+                Producto.id,
+                literal(corte),
+                func.coalesce(Producto.stock_actual, 0) - func.coalesce(posteriores.c.cantidad, 0),
+            ).outerjoin(posteriores, posteriores.c.id_producto == Producto.id),
+        )
+    )
+    db.commit()
+    # rowcount no es fiable en INSERT ... SELECT con todos los drivers
+    return db.execute(select(func.count()).where(SnapshotStock.fecha == corte)).scalar()
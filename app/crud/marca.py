@@ -18,7 +18,7 @@ def crear_marca_db(db: Session, marca: MarcaCreate, current_user_id: int = None)
     db_marca = Marca(
         nombre=marca.nombre,
         estado='A',
-        fecha_creacion=datetime.now().isoformat(),
+        fecha_creacion=datetime.now(),
         fecha_edicion=None,
         created_by=current_user_id,
         updated_by=None
@@ -67,7 +67,7 @@ def actualizar_marca_db(db: Session, marca_id: int, marca_update: MarcaUpdate, c
         
         db_marca.nombre = marca_update.nombre
     
-    db_marca.fecha_edicion = datetime.now().isoformat()
+    db_marca.fecha_edicion = datetime.now()
     db_marca.updated_by = current_user_id
     db.commit()
     db.refresh(db_marca)
@@ -87,6 +87,6 @@ def eliminar_marca_db(db: Session, marca_id: int) -> bool:
     
     # Eliminación lógica: cambiar estado a 'I' (Inactivo)
     db_marca.estado = 'I'
-    db_marca.fecha_edicion = datetime.now().isoformat()
+    db_marca.fecha_edicion = datetime.now()
     db.commit()
     return True
@@ -0,0 +1,108 @@
+"""
+Paginación por cursor (keyset) para listados ordenados por (fecha, id) descendente.
+
+El cursor es un token opaco con la fecha y el id de la última fila devuelta;
+la página siguiente se obtiene con un WHERE (fecha, id) < (f, i) en lugar de
+OFFSET, así el costo no crece con la profundidad de la página.
+Las filas sin fecha van al final del listado. El filtro keyset es solo la
+comparación de tuplas (sin OR con `fecha IS NULL`, que impide usar el índice
+(fecha DESC NULLS LAST, id DESC)); cuando se acaban las filas con fecha, la
+página se completa con una consulta aparte sobre `fecha IS NULL` (ver
+consulta_sin_fecha).
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, tuple_
+from sqlalchemy.orm import Query as ConsultaORM
+
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+class CursorInvalidoError(ValueError):
+    """El cursor recibido no tiene el formato esperado."""
+
+    def __init__(self):
+        super().__init__("Cursor de paginación inválido")
+
+
+def codificar_cursor(fecha: Optional[datetime], id_fila: int) -> str:
+    """Genera el token opaco para (fecha, id)."""
+    datos = {"f": fecha.isoformat() if fecha else None, "i": id_fila}
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple:
+    """Obtiene (fecha, id) a partir del token opaco."""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        fecha = datetime.fromisoformat(datos["f"]) if datos["f"] else None
+        return fecha, int(datos["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise CursorInvalidoError()
+
+
+def paginar_por_cursor(query: ConsultaORM, columna_fecha, columna_id, cursor: str, limit: int) -> ConsultaORM:
+    """
+    Aplica orden (fecha DESC NULLS LAST, id DESC) y el filtro keyset.
+    Un cursor vacío devuelve la primera página.
+    """
+    if cursor:
+        fecha, id_fila = decodificar_cursor(cursor)
+        if fecha is None:
+            query = query.filter(and_(columna_fecha.is_(None), columna_id < id_fila))
+        else:
+            # Excluye las filas sin fecha (NULL no cumple la comparación): las trae consulta_sin_fecha
+            query = query.filter(tuple_(columna_fecha, columna_id) < tuple_(fecha, id_fila))
+
+    return query.order_by(columna_fecha.desc().nulls_last(), columna_id.desc()).limit(limit)
+
+
+def consulta_sin_fecha(query: ConsultaORM, columna_fecha, columna_id, cursor: str, faltan: int) -> Optional[ConsultaORM]:
+    """
+    Filas sin fecha (id DESC) que completan una página cuyo cursor tenía fecha y
+    a la que le faltan `faltan` filas. None si no hace falta: primera página (ya
+    incluye las filas sin fecha), cursor dentro de las filas sin fecha o página completa.
+    """
+    if not cursor or faltan <= 0 or decodificar_cursor(cursor)[0] is None:
+        return None
+    return query.filter(columna_fecha.is_(None)).order_by(columna_id.desc()).limit(faltan)
+
+
+def listar_por_cursor(query: ConsultaORM, columna_fecha, columna_id, cursor: str, limit: int) -> list:
+    """paginar_por_cursor + consulta_sin_fecha para una sesión sync."""
+    filas = paginar_por_cursor(query, columna_fecha, columna_id, cursor, limit).all()
+    resto = consulta_sin_fecha(query, columna_fecha, columna_id, cursor, limit - len(filas))
+    if resto is not None:
+        filas += resto.all()
+    return filas
+
+
+async def parametro_cursor(
+    cursor: Optional[str] = Query(
+        None,
+        description="Paginación por cursor: enviar vacío para la primera página y luego "
+                    "el valor de la cabecera X-Next-Cursor. Si se envía, se ignora `skip`.",
+    )
+) -> Optional[str]:
+    """Dependencia que valida el cursor recibido como query param (async: no usa el threadpool)."""
+    if cursor:
+        try:
+            decodificar_cursor(cursor)
+        except CursorInvalidoError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return cursor
+
+
+def agregar_cursor_siguiente(
+    response: Response, items: list, limit: int, cursor: Optional[str], campo_fecha: str
+) -> None:
+    """En modo cursor, agrega la cabecera X-Next-Cursor si la página vino completa."""
+    if cursor is not None and items and len(items) == limit:
+        ultimo = items[-1]
+        response.headers[CABECERA_CURSOR] = codificar_cursor(getattr(ultimo, campo_fecha), ultimo.id)
@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.prediccionDemanda import PrediccionDemanda
+
+def get_prediccion_producto(db: Session, id_producto: int) -> Optional[PrediccionDemanda]:
+    """Último pronóstico de demanda de un producto"""
+    return db.query(PrediccionDemanda).filter(PrediccionDemanda.id_producto == id_producto).first()
+
+def get_predicciones(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    modelo: Optional[str] = None
+) -> List[PrediccionDemanda]:
+    """Pronósticos ordenados de mayor a menor demanda diaria"""
+    query = db.query(PrediccionDemanda)
+    if modelo:
+        query = query.filter(PrediccionDemanda.modelo == modelo)
+    return query.order_by(PrediccionDemanda.demanda_diaria.desc(), PrediccionDemanda.id_producto)\
+        .offset(skip).limit(limit).all()
@@ -1,10 +1,13 @@
 """  
 CRUD operations para Presentaciones.
 """
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from app.models.presentacion import Presentacion
 from app.schemas.presentacion import PresentacionCreate, PresentacionUpdate
+from app.services import cache
 
 
 def get_presentaciones(
@@ -14,12 +17,27 @@ def get_presentaciones(
     id_producto: Optional[int] = None
 ) -> List[Presentacion]:
     """Obtener lista de presentaciones con filtros opcionales."""
-    query = db.query(Presentacion).options(joinedload(Presentacion.producto))
+    return _listar_presentaciones(db.query(Presentacion), skip, limit, id_producto).all()
+
+
+async def get_presentaciones_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    id_producto: Optional[int] = None
+) -> List[Presentacion]:
+    """Igual que get_presentaciones, con sesión async."""
+    consulta = _listar_presentaciones(select(Presentacion), skip, limit, id_producto)
+    return list((await db.scalars(consulta)).all())
+
+
+def _listar_presentaciones(query, skip: int, limit: int, id_producto: Optional[int]):
+    query = query.options(joinedload(Presentacion.producto))
     
     if id_producto:
         query = query.filter(Presentacion.id_producto == id_producto)
     
-    return query.order_by(Presentacion.id.desc()).offset(skip).limit(limit).all()
+    return query.order_by(Presentacion.id.desc()).offset(skip).limit(limit)
 
 
 def get_presentacion(db: Session, presentacion_id: int) -> Optional[Presentacion]:
@@ -32,7 +50,7 @@ def get_presentacion(db: Session, presentacion_id: int) -> Optional[Presentacion
 def create_presentacion(db: Session, presentacion: PresentacionCreate, current_user_id: int = None) -> Presentacion:
     """Crear una nueva presentación."""
     from datetime import datetime
-    fecha_actual = datetime.now().isoformat()
+    fecha_actual = datetime.now()
     
     db_presentacion = Presentacion(
         **presentacion.model_dump(),
@@ -42,6 +60,7 @@ def create_presentacion(db: Session, presentacion: PresentacionCreate, current_u
         updated_by=None
     )
     db.add(db_presentacion)
+    cache.invalidar_al_confirmar(db, [db_presentacion.id_producto])
     db.commit()
     db.refresh(db_presentacion)
     return db_presentacion
@@ -60,13 +79,17 @@ def update_presentacion(
     if not db_presentacion:
         return None
     
+    # Invalidar el producto anterior y, si cambia, también el nuevo
+    cache.invalidar_al_confirmar(db, [db_presentacion.id_producto])
+    
     # Actualizar solo los campos proporcionados
     update_data = presentacion.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_presentacion, field, value)
     
-    db_presentacion.fecha_edicion = datetime.now().isoformat()
+    db_presentacion.fecha_edicion = datetime.now()
     db_presentacion.updated_by = current_user_id
+    cache.invalidar_al_confirmar(db, [db_presentacion.id_producto])
     db.commit()
     db.refresh(db_presentacion)
     return db_presentacion
@@ -79,6 +102,7 @@ def delete_presentacion(db: Session, presentacion_id: int) -> bool:
     if not db_presentacion:
         return False
     
+    cache.invalidar_al_confirmar(db, [db_presentacion.id_producto])
     db.delete(db_presentacion)
     db.commit()
     return True
@@ -92,3 +116,14 @@ def get_presentaciones_by_producto(db: Session, id_producto: int) -> List[Presen
         Presentacion.id_producto == id_producto,
         Presentacion.estado == 'A'
     ).order_by(Presentacion.id.desc()).all()
+
+
+async def get_presentaciones_by_producto_async(db: AsyncSession, id_producto: int) -> List[Presentacion]:
+    """Igual que get_presentaciones_by_producto, con sesión async."""
+    consulta = select(Presentacion).options(
+        joinedload(Presentacion.producto)
+    ).filter(
+        Presentacion.id_producto == id_producto,
+        Presentacion.estado == 'A'
+    ).order_by(Presentacion.id.desc())
+    return list((await db.scalars(consulta)).all())
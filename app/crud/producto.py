@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from datetime import datetime
 from app.models.producto import Producto
-from app.schemas.producto import ProductoCreate, ProductoUpdate
+from app.schemas.producto import ProductoCreate, ProductoUpdate, ProductoResponse
+from app.services import busqueda_productos, cache, stock_service
 
 
 def crear_producto_db(db: Session, producto: ProductoCreate, current_user_id: int = None) -> Producto:
@@ -15,7 +18,7 @@ def crear_producto_db(db: Session, producto: ProductoCreate, current_user_id: in
     if producto_existente:
         raise ValueError("Ya existe un producto activo con ese código")
     
-    fecha_actual = datetime.now().isoformat()
+    fecha_actual = datetime.now()
     db_producto = Producto(
         codigo=producto.codigo,
         nombre=producto.nombre,
@@ -34,24 +37,160 @@ def crear_producto_db(db: Session, producto: ProductoCreate, current_user_id: in
         updated_by=None
     )
     db.add(db_producto)
+    db.flush()
+    if db_producto.stock_actual:
+        # Stock inicial en el kardex
+        stock_service.registrar_movimientos(
+            db, {db_producto.id: (db_producto.stock_actual, db_producto.stock_actual)},
+            stock_service.MOVIMIENTO_INICIAL, id_origen=db_producto.id, id_usuario=current_user_id,
+        )
     db.commit()
     db.refresh(db_producto)
+    busqueda_productos.invalidar_indice()
     return db_producto
 
 
-def obtener_productos_db(db: Session, incluir_inactivos: bool = False) -> list[Producto]:
-    """Obtiene todos los productos. Por defecto solo los activos."""
-    query = db.query(Producto).options(
-        joinedload(Producto.categoria),
-        joinedload(Producto.marca),
-        joinedload(Producto.tipo_producto),
-        joinedload(Producto.presentaciones)
-    )
-    
+ESTADOS_STOCK = ("agotado", "bajo", "normal", "exceso")
+
+ORDENES_PRODUCTO = {
+    "id": Producto.id,
+    "codigo": Producto.codigo,
+    "nombre": Producto.nombre,
+    "stock_actual": Producto.stock_actual,
+}
+
+
+def _filtrar_productos(
+    query,
+    incluir_inactivos: bool = False,
+    id_categoria: int | None = None,
+    id_marca: int | None = None,
+    id_tipo_producto: int | None = None,
+    estado_stock: str | None = None,
+):
+    """Aplica los filtros del catálogo (comunes al listado y al conteo)."""
     if not incluir_inactivos:
         query = query.filter(Producto.estado == 'A')
-    
-    return query.order_by(Producto.id.desc()).all()
+    if id_categoria is not None:
+        query = query.filter(Producto.id_categoria == id_categoria)
+    if id_marca is not None:
+        query = query.filter(Producto.id_marca == id_marca)
+    if id_tipo_producto is not None:
+        query = query.filter(Producto.id_tipo_producto == id_tipo_producto)
+
+    stock = func.coalesce(Producto.stock_actual, 0)
+    if estado_stock == "agotado":
+        query = query.filter(stock <= 0)
+    elif estado_stock == "bajo":
+        query = query.filter(stock > 0, stock <= func.coalesce(Producto.stock_minimo, 0))
+    elif estado_stock == "normal":
+        query = query.filter(
+            stock > func.coalesce(Producto.stock_minimo, 0),
+            or_(Producto.stock_maximo.is_(None), stock <= Producto.stock_maximo),
+        )
+    elif estado_stock == "exceso":
+        query = query.filter(Producto.stock_maximo.isnot(None), stock > Producto.stock_maximo)
+    return query
+
+
+def obtener_productos_db(
+    db: Session,
+    incluir_inactivos: bool = False,
+    skip: int = 0,
+    limit: int | None = None,
+    id_categoria: int | None = None,
+    id_marca: int | None = None,
+    id_tipo_producto: int | None = None,
+    estado_stock: str | None = None,
+    orden: str = "-id",
+) -> list[Producto]:
+    """
+    Obtiene los productos del catálogo. Por defecto solo los activos.
+    Sin `limit` devuelve todos (compatibilidad con el frontend actual).
+    `orden` es un campo de ORDENES_PRODUCTO, con prefijo "-" para descendente.
+    """
+    return _listar_productos(
+        db.query(Producto), incluir_inactivos, skip, limit,
+        id_categoria, id_marca, id_tipo_producto, estado_stock, orden
+    ).all()
+
+
+async def obtener_productos_async(
+    db: AsyncSession,
+    incluir_inactivos: bool = False,
+    skip: int = 0,
+    limit: int | None = None,
+    id_categoria: int | None = None,
+    id_marca: int | None = None,
+    id_tipo_producto: int | None = None,
+    estado_stock: str | None = None,
+    orden: str = "-id",
+) -> list[Producto]:
+    """Igual que obtener_productos_db, con sesión async."""
+    consulta = _listar_productos(
+        select(Producto), incluir_inactivos, skip, limit,
+        id_categoria, id_marca, id_tipo_producto, estado_stock, orden
+    )
+    return list((await db.scalars(consulta)).all())
+
+
+def _listar_productos(
+    query, incluir_inactivos, skip, limit, id_categoria, id_marca, id_tipo_producto, estado_stock, orden
+):
+    """Relaciones, filtros, orden y página del listado (sirve para Query y para select)."""
+    query = query.options(
+        selectinload(Producto.categoria),
+        selectinload(Producto.marca),
+        selectinload(Producto.tipo_producto),
+        selectinload(Producto.presentaciones)
+    )
+    query = _filtrar_productos(
+        query, incluir_inactivos, id_categoria, id_marca, id_tipo_producto, estado_stock
+    )
+
+    columna = ORDENES_PRODUCTO[orden.lstrip("-")]
+    if orden.startswith("-"):
+        query = query.order_by(columna.desc(), Producto.id.desc())
+    else:
+        query = query.order_by(columna.asc(), Producto.id.asc())
+
+    if skip:
+        query = query.offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def contar_productos_db(
+    db: Session,
+    incluir_inactivos: bool = False,
+    id_categoria: int | None = None,
+    id_marca: int | None = None,
+    id_tipo_producto: int | None = None,
+    estado_stock: str | None = None,
+) -> int:
+    """Cuenta los productos que cumplen los filtros, sin cargar relaciones."""
+    query = _filtrar_productos(
+        db.query(func.count(Producto.id)),
+        incluir_inactivos, id_categoria, id_marca, id_tipo_producto, estado_stock
+    )
+    return query.scalar()
+
+
+async def contar_productos_async(
+    db: AsyncSession,
+    incluir_inactivos: bool = False,
+    id_categoria: int | None = None,
+    id_marca: int | None = None,
+    id_tipo_producto: int | None = None,
+    estado_stock: str | None = None,
+) -> int:
+    """Igual que contar_productos_db, con sesión async."""
+    consulta = _filtrar_productos(
+        select(func.count(Producto.id)),
+        incluir_inactivos, id_categoria, id_marca, id_tipo_producto, estado_stock
+    )
+    return await db.scalar(consulta)
 
 
 def obtener_producto_db(db: Session, producto_id: int) -> Producto | None:
@@ -75,6 +214,30 @@ def obtener_producto_por_codigo_db(db: Session, codigo: str) -> Producto | None:
     ).first()
 
 
+def obtener_producto_por_codigo_cacheado(db: Session, codigo: str) -> ProductoResponse | None:
+    """
+    Obtiene un producto activo por código con sus presentaciones activas,
+    usando la caché en memoria (camino de lectura de código de barras del POS).
+    """
+    def cargar():
+        producto = db.query(Producto).options(
+            selectinload(Producto.categoria),
+            selectinload(Producto.marca),
+            selectinload(Producto.tipo_producto),
+            selectinload(Producto.presentaciones)
+        ).filter(
+            Producto.codigo == codigo,
+            Producto.estado == 'A'
+        ).first()
+        if not producto:
+            return None
+        respuesta = ProductoResponse.model_validate(producto)
+        respuesta.presentaciones = [p for p in respuesta.presentaciones or [] if p.estado == 'A']
+        return respuesta
+
+    return cache.cache_productos_codigo.obtener_o_cargar(codigo, cargar)
+
+
 def actualizar_producto_db(db: Session, producto_id: int, producto_update: ProductoUpdate, current_user_id: int = None) -> Producto:
     """Actualiza un producto."""
     db_producto = obtener_producto_db(db, producto_id)
@@ -102,7 +265,8 @@ def actualizar_producto_db(db: Session, producto_id: int, producto_update: Produ
     if producto_update.stock_minimo is not None:
         db_producto.stock_minimo = producto_update.stock_minimo
     if producto_update.stock_actual is not None:
-        db_producto.stock_actual = producto_update.stock_actual
+        # Ajuste manual: UPDATE con bloqueo + movimiento AJUSTE en el kardex
+        stock_service.fijar_stock(db, producto_id, producto_update.stock_actual, id_usuario=current_user_id)
     if producto_update.stock_maximo is not None:
         db_producto.stock_maximo = producto_update.stock_maximo
     if producto_update.avatar is not None:
@@ -114,10 +278,12 @@ def actualizar_producto_db(db: Session, producto_id: int, producto_update: Produ
     if producto_update.id_marca is not None:
         db_producto.id_marca = producto_update.id_marca
     
-    db_producto.fecha_edicion = datetime.now().isoformat()
+    db_producto.fecha_edicion = datetime.now()
     db_producto.updated_by = current_user_id
+    cache.invalidar_al_confirmar(db, [producto_id])
     db.commit()
     db.refresh(db_producto)
+    busqueda_productos.invalidar_indice()
     return db_producto
 
 
@@ -130,7 +296,9 @@ def eliminar_producto_db(db: Session, producto_id: int) -> bool:
     
     # Eliminación lógica: cambiar estado a 'I' (Inactivo)
     db_producto.estado = 'I'
-    db_producto.fecha_edicion = datetime.now().isoformat()
+    db_producto.fecha_edicion = datetime.now()
+    cache.invalidar_al_confirmar(db, [producto_id])
     db.commit()
+    busqueda_productos.invalidar_indice()
     return True
 
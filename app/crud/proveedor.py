@@ -23,7 +23,7 @@ def crear_proveedor_db(db: Session, proveedor: ProveedorCreate, current_user_id:
         direccion=proveedor.direccion,
         avatar=proveedor.avatar,
         estado='A',
-        fecha_creacion=datetime.now().isoformat(),
+        fecha_creacion=datetime.now(),
         fecha_edicion=None,
         created_by=current_user_id,
         updated_by=None
@@ -93,7 +93,7 @@ def actualizar_proveedor_db(db: Session, proveedor_id: int, proveedor_update: Pr
         db_proveedor.avatar = proveedor_update.avatar
     
     from datetime import datetime
-    db_proveedor.fecha_edicion = datetime.now().isoformat()
+    db_proveedor.fecha_edicion = datetime.now()
     db_proveedor.updated_by = current_user_id
     db.commit()
     db.refresh(db_proveedor)
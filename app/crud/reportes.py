@@ -0,0 +1,101 @@
+"""
+Reportes de ventas sobre los resúmenes diarios (ver services/resumen_ventas).
+
+El dashboard se arma con unas pocas consultas agregadas sobre
+ventas_diarias_* y producto, y se guarda unos segundos en caché: varios
+dashboards abiertos a la vez comparten un único cálculo.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.producto import Producto
+from app.models.ventaDiaria import VentaDiariaProducto, VentaDiariaUsuario
+from app.services import cache
+
+
+def get_totales_dia(db: Session, dia: date) -> dict:
+    """Ingresos, tickets y descuentos del día (suma de los resúmenes por usuario)."""
+    fila = db.execute(
+        select(
+            func.coalesce(func.sum(VentaDiariaUsuario.ventas), 0).label("tickets"),
+            func.coalesce(func.sum(VentaDiariaUsuario.total), 0).label("ingresos"),
+            func.coalesce(func.sum(VentaDiariaUsuario.descuento), 0).label("descuentos"),
+        ).where(VentaDiariaUsuario.fecha == dia)
+    ).one()
+    tickets = int(fila.tickets)
+    ingresos = Decimal(fila.ingresos)
+    return {
+        "tickets": tickets,
+        "ingresos": ingresos,
+        "descuentos": Decimal(fila.descuentos),
+        "ticket_promedio": (ingresos / tickets).quantize(Decimal("0.01")) if tickets else Decimal(0),
+    }
+
+
+def get_top_productos(db: Session, desde: date, hasta: date, limite: int = 5) -> List[dict]:
+    """Productos con más importe vendido en [desde, hasta]."""
+    ranking = (
+        select(
+            VentaDiariaProducto.id_producto,
+            func.sum(VentaDiariaProducto.unidades).label("unidades"),
+            func.sum(VentaDiariaProducto.importe).label("importe"),
+            func.sum(VentaDiariaProducto.ventas).label("ventas"),
+        )
+        .where(VentaDiariaProducto.fecha >= desde, VentaDiariaProducto.fecha <= hasta)
+        .group_by(VentaDiariaProducto.id_producto)
+        .having(func.sum(VentaDiariaProducto.ventas) > 0)
+        .order_by(func.sum(VentaDiariaProducto.importe).desc(), VentaDiariaProducto.id_producto)
+        .limit(limite)
+        .subquery()
+    )
+    filas = db.execute(
+        select(ranking, Producto.codigo, Producto.nombre)
+        .join(Producto, Producto.id == ranking.c.id_producto)
+        .order_by(ranking.c.importe.desc(), ranking.c.id_producto)
+    )
+    return [
+        {
+            "id_producto": fila.id_producto,
+            "codigo": fila.codigo,
+            "nombre": fila.nombre,
+            "unidades": int(fila.unidades),
+            "importe": Decimal(fila.importe),
+            "ventas": int(fila.ventas),
+        }
+        for fila in filas
+    ]
+
+
+def contar_stock_bajo(db: Session) -> int:
+    """Productos activos con stock_actual <= stock_minimo."""
+    return db.execute(
+        select(func.count()).select_from(Producto).where(
+            Producto.estado == 'A',
+            func.coalesce(Producto.stock_actual, 0) <= func.coalesce(Producto.stock_minimo, 0),
+        )
+    ).scalar()
+
+
+def _calcular_dashboard(db: Session, dia: date, top: int, dias_top: int) -> dict:
+    return {
+        "fecha": dia,
+        "generado": datetime.now(),
+        **get_totales_dia(db, dia),
+        "top_productos": get_top_productos(db, dia - timedelta(days=dias_top - 1), dia, top),
+        "productos_stock_bajo": contar_stock_bajo(db),
+    }
+
+
+def get_dashboard(db: Session, top: int = 5, dias_top: int = 1) -> dict:
+    """
+    KPIs de ventas del día. Se cachea CACHE_DASHBOARD_TTL_SEGUNDOS por
+    combinación de parámetros; ante un fallo simultáneo solo una petición calcula.
+    """
+    dia = date.today()
+    return cache.cache_dashboard.obtener_o_cargar(
+        (dia, top, dias_top), lambda: _calcular_dashboard(db, dia, top, dias_top)
+    )
@@ -18,7 +18,7 @@ def crear_tipo_producto_db(db: Session, tipo_producto: TipoProductoCreate, curre
     db_tipo_producto = TipoProducto(
         nombre=tipo_producto.nombre,
         estado='A',
-        fecha_creacion=datetime.now().isoformat(),
+        fecha_creacion=datetime.now(),
         fecha_edicion=None,
         created_by=current_user_id,
         updated_by=None
@@ -67,7 +67,7 @@ def actualizar_tipo_producto_db(db: Session, tipo_producto_id: int, tipo_product
         
         db_tipo_producto.nombre = tipo_producto_update.nombre
     
-    db_tipo_producto.fecha_edicion = datetime.now().isoformat()
+    db_tipo_producto.fecha_edicion = datetime.now()
     db_tipo_producto.updated_by = current_user_id
     db.commit()
     db.refresh(db_tipo_producto)
@@ -87,6 +87,6 @@ def eliminar_tipo_producto_db(db: Session, tipo_producto_id: int) -> bool:
     
     # Eliminación lógica: cambiar estado a 'I' (Inactivo)
     db_tipo_producto.estado = 'I'
-    db_tipo_producto.fecha_edicion = datetime.now().isoformat()
+    db_tipo_producto.fecha_edicion = datetime.now()
     db.commit()
     return True
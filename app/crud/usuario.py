@@ -1,8 +1,10 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from app.models.usuario import Usuario
 from app.schemas.usuario import UsuarioCreate, UsuarioResponse, TipoUsuarioResponse
 from app.utils import hash_password
-from sqlalchemy import or_ # importar or_ para consultas complejas
+from app.services import cache
+from sqlalchemy import or_, select # importar or_ para consultas complejas
 
 # el crud es el que utiliza los modelos creados con sqlAlchemy, que es como un orm
 # nos permite crear, leer, actualizar y eliminar usuarios en la base de datos
@@ -79,12 +81,47 @@ def obtener_usuario_db(db: Session, usuario_id: int = None, usuario: str = None)
     return None
 
 
+def _consulta_usuario_autenticado(dni: str):
+    return select(Usuario).options(joinedload(Usuario.tipo_usuario)).where(
+        Usuario.dni == dni, Usuario.estado == 'A'
+    )
+
+
+def obtener_usuario_autenticado(db: Session, dni: str) -> UsuarioResponse | None:
+    """
+    Obtiene el usuario activo de un token (por DNI) usando la caché en memoria.
+    Devuelve el schema de respuesta, no el modelo, para no compartir objetos de sesión.
+    """
+    def cargar():
+        usuario = db.scalars(_consulta_usuario_autenticado(dni)).first()
+        return UsuarioResponse.model_validate(usuario) if usuario else None
+
+    return cache.cache_usuarios.obtener_o_cargar(dni, cargar)
+
+
+async def obtener_usuario_autenticado_async(db: AsyncSession, dni: str) -> UsuarioResponse | None:
+    """
+    Igual que obtener_usuario_autenticado, con sesión async. Los fallos
+    simultáneos de la misma clave no se esperan entre sí: cada uno consulta.
+    """
+    usuario = cache.cache_usuarios.obtener(dni)
+    if usuario is not None:
+        return usuario
+    version = cache.cache_usuarios.version
+    modelo = (await db.scalars(_consulta_usuario_autenticado(dni))).first()
+    if modelo is None:
+        return None
+    usuario = UsuarioResponse.model_validate(modelo)
+    cache.cache_usuarios.guardar(dni, usuario, version=version)
+    return usuario
+
 
 def actualizar_usuario_db(db: Session, usuario_id: int, datos, current_user_id: int = None):
     usuario = obtener_usuario_db(db, usuario_id)
 
     if usuario:
         from datetime import datetime
+        dni_anterior = usuario.dni
         data = datos.dict(exclude_unset=True)
         for key, value in data.items():
             if key == "password":
@@ -107,6 +144,8 @@ def actualizar_usuario_db(db: Session, usuario_id: int, datos, current_user_id:
         
         db.commit()
         db.refresh(usuario)
+        cache.cache_usuarios.invalidar(dni_anterior)
+        cache.cache_usuarios.invalidar(usuario.dni)
 
     return usuario
 
@@ -118,6 +157,7 @@ def eliminar_usuario_db(db: Session, usuario_id: int):
         usuario.estado = 'I'
         db.commit()
         db.refresh(usuario)
+        cache.cache_usuarios.invalidar(usuario.dni)
 
     return usuario
 
@@ -1,37 +1,49 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.models.venta import Venta, DetalleVenta
-from app.models.producto import Producto
-from app.models.presentacion import Presentacion
-from app.schemas.venta import VentaCreate, VentaUpdate
+from app.schemas.venta import VentaCreate, VentaUpdate, VentaLoteItem
+from app.services import idempotencia, resumen_ventas, stock_service
+from app.crud import cargas, paginacion
 from typing import Optional, List
 from decimal import Decimal
 from datetime import datetime
+from collections import defaultdict
+
+# Campos de VentaUpdate que cambian la fila de resumen diario de la venta
+CAMPOS_RESUMEN = {"fecha", "id_cliente", "id_usuario", "estado", "descuento"}
+
+def _paginar_ventas(query, skip: int, limit: int, cursor: Optional[str]) -> List[Venta]:
+    """Pagina por cursor (fecha, id) si se envía `cursor`; si no, por offset ordenando por ID descendente"""
+    if cursor is not None:
+        return paginacion.listar_por_cursor(query, Venta.fecha, Venta.id, cursor, limit)
+    return query.order_by(Venta.id.desc()).offset(skip).limit(limit).all()
+
+async def _paginar_ventas_async(db: AsyncSession, consulta, skip: int, limit: int, cursor: Optional[str]) -> List[Venta]:
+    if cursor is None:
+        return list((await db.scalars(consulta.order_by(Venta.id.desc()).offset(skip).limit(limit))).all())
+    ventas = list((await db.scalars(paginacion.paginar_por_cursor(consulta, Venta.fecha, Venta.id, cursor, limit))).all())
+    resto = paginacion.consulta_sin_fecha(consulta, Venta.fecha, Venta.id, cursor, limit - len(ventas))
+    if resto is not None:
+        ventas += (await db.scalars(resto)).all()
+    return ventas
 
 def get_ventas(
     db: Session, 
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Venta]:
     """Obtener lista de ventas con relaciones, ordenadas por ID descendente"""
-    return db.query(Venta)\
-        .options(
-            joinedload(Venta.cliente),
-            joinedload(Venta.usuario),
-            joinedload(Venta.detalles).joinedload(DetalleVenta.presentacion).joinedload(Presentacion.producto)
-        )\
-        .order_by(Venta.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Venta)\
+        .options(*cargas.opciones_venta())
+    return _paginar_ventas(query, skip, limit, cursor)
 
 def get_venta_by_id(db: Session, venta_id: int) -> Optional[Venta]:
     """Obtener una venta por ID con sus relaciones"""
     return db.query(Venta)\
-        .options(
-            joinedload(Venta.cliente),
-            joinedload(Venta.usuario),
-            joinedload(Venta.detalles).joinedload(DetalleVenta.presentacion).joinedload(Presentacion.producto)
-        )\
+        .options(*cargas.opciones_venta())\
         .filter(Venta.id == venta_id)\
         .first()
 
@@ -39,68 +51,155 @@ def get_ventas_by_cliente(
     db: Session, 
     cliente_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Venta]:
     """Obtener ventas por cliente"""
-    return db.query(Venta)\
-        .options(
-            joinedload(Venta.cliente),
-            joinedload(Venta.usuario),
-            joinedload(Venta.detalles).joinedload(DetalleVenta.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Venta.id_cliente == cliente_id)\
-        .order_by(Venta.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Venta)\
+        .options(*cargas.opciones_venta())\
+        .filter(Venta.id_cliente == cliente_id)
+    return _paginar_ventas(query, skip, limit, cursor)
 
 def get_ventas_by_usuario(
     db: Session, 
     usuario_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Venta]:
     """Obtener ventas por usuario"""
-    return db.query(Venta)\
-        .options(
-            joinedload(Venta.cliente),
-            joinedload(Venta.usuario),
-            joinedload(Venta.detalles).joinedload(DetalleVenta.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Venta.id_usuario == usuario_id)\
-        .order_by(Venta.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    query = db.query(Venta)\
+        .options(*cargas.opciones_venta())\
+        .filter(Venta.id_usuario == usuario_id)
+    return _paginar_ventas(query, skip, limit, cursor)
 
 def get_ventas_by_fecha(
     db: Session,
     fecha_inicio,
     fecha_fin,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Venta]:
     """Obtener ventas por rango de fechas"""
-    return db.query(Venta)\
-        .options(
-            joinedload(Venta.cliente),
-            joinedload(Venta.usuario),
-            joinedload(Venta.detalles).joinedload(DetalleVenta.presentacion).joinedload(Presentacion.producto)
-        )\
-        .filter(Venta.fecha >= fecha_inicio, Venta.fecha <= fecha_fin)\
-        .order_by(Venta.id.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-
-def crear_venta(db: Session, venta: VentaCreate, current_user_id: int = None) -> Venta:
+    query = db.query(Venta)\
+        .options(*cargas.opciones_venta())\
+        .filter(Venta.fecha >= fecha_inicio, Venta.fecha <= fecha_fin)
+    return _paginar_ventas(query, skip, limit, cursor)
+
+# Versiones async de los listados (rutas `async def` con get_async_db).
+# Todas las relaciones de VentaResponse se cargan con cargas.opciones_venta():
+# con AsyncSession no hay carga perezosa al serializar.
+
+async def get_ventas_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Venta]:
+    """Igual que get_ventas, con sesión async"""
+    consulta = select(Venta).options(*cargas.opciones_venta())
+    return await _paginar_ventas_async(db, consulta, skip, limit, cursor)
+
+async def get_ventas_by_cliente_async(
+    db: AsyncSession,
+    cliente_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Venta]:
+    """Igual que get_ventas_by_cliente, con sesión async"""
+    consulta = select(Venta)\
+        .options(*cargas.opciones_venta())\
+        .filter(Venta.id_cliente == cliente_id)
+    return await _paginar_ventas_async(db, consulta, skip, limit, cursor)
+
+async def get_ventas_by_usuario_async(
+    db: AsyncSession,
+    usuario_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Venta]:
+    """Igual que get_ventas_by_usuario, con sesión async"""
+    consulta = select(Venta)\
+        .options(*cargas.opciones_venta())\
+        .filter(Venta.id_usuario == usuario_id)
+    return await _paginar_ventas_async(db, consulta, skip, limit, cursor)
+
+async def get_ventas_by_fecha_async(
+    db: AsyncSession,
+    fecha_inicio,
+    fecha_fin,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Venta]:
+    """Igual que get_ventas_by_fecha, con sesión async"""
+    consulta = select(Venta)\
+        .options(*cargas.opciones_venta())\
+        .filter(Venta.fecha >= fecha_inicio, Venta.fecha <= fecha_fin)
+    return await _paginar_ventas_async(db, consulta, skip, limit, cursor)
+
+def crear_venta(
+    db: Session,
+    venta: VentaCreate,
+    current_user_id: int = None,
+    clave_idempotencia: Optional[str] = None,
+) -> Venta:
+    """
+    Crear una nueva venta, repitiendo la transacción si Postgres la aborta por deadlock.
+    Con `clave_idempotencia` (cabecera Idempotency-Key), un reintento con la misma
+    clave devuelve la venta ya creada sin volver a descontar stock.
+    """
+    operacion = lambda: _crear_venta(db, venta, current_user_id, clave_idempotencia)
+    try:
+        return stock_service.con_reintentos(db, operacion)
+    except IntegrityError:
+        if not clave_idempotencia:
+            raise
+        # Otra petición con la misma clave se confirmó en paralelo: al repetir se devuelve su venta
+        return stock_service.con_reintentos(db, operacion)
+
+def _venta_por_clave(db: Session, id_venta: int) -> Venta:
+    venta = get_venta_by_id(db, id_venta)
+    if venta is None:
+        raise ValueError(f"La venta {id_venta} creada con esta clave de idempotencia ya no existe")
+    return venta
+
+def _crear_venta(
+    db: Session,
+    venta: VentaCreate,
+    current_user_id: int = None,
+    clave_idempotencia: Optional[str] = None,
+) -> Venta:
     """
     Crear una nueva venta con sus detalles
     - Calcula automáticamente los totales
     - Descuenta el stock según cantidad_base de cada presentación
+    - Resuelve todas las presentaciones en una sola consulta y descuenta el stock
+      con un UPDATE condicional (stock_actual >= requerido), así dos ventas
+      concurrentes no pueden dejar stock negativo
     """
     try:
-        # 1. Calcular totales a partir de los detalles
+        # 0. Reintento de una venta ya creada con la misma clave
+        if clave_idempotencia:
+            huella = idempotencia.huella(venta)
+            id_existente = idempotencia.resolver(
+                db, idempotencia.AMBITO_VENTA, current_user_id, clave_idempotencia, huella
+            )
+            if id_existente is not None:
+                return _venta_por_clave(db, id_existente)
+
+        # 1. Resolver todas las presentaciones del ticket en una sola consulta
+        presentaciones = stock_service.resolver_presentaciones(
+            db, (detalle.id_presentacion for detalle in venta.detalles)
+        )
+        for detalle in venta.detalles:
+            if detalle.id_presentacion not in presentaciones:
+                raise ValueError(f"Presentación con ID {detalle.id_presentacion} no existe")
+
+        # 2. Calcular totales a partir de los detalles
         total_sin_descuento = Decimal(0)
         for detalle in venta.detalles:
             total_sin_descuento += detalle.subtotal
@@ -108,8 +207,7 @@ def crear_venta(db: Session, venta: VentaCreate, current_user_id: int = None) ->
         descuento_aplicado = venta.descuento or Decimal(0)
         total_con_descuento = total_sin_descuento - descuento_aplicado
         
-        # 2. Crear la venta (ignoramos totales enviados desde frontend)
-        # fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # 3. Crear la venta con sus detalles (ignoramos totales enviados desde frontend)
         db_venta = Venta(
             id_cliente=venta.id_cliente,
             cliente_nombre=venta.cliente_nombre,
@@ -123,54 +221,44 @@ def crear_venta(db: Session, venta: VentaCreate, current_user_id: int = None) ->
             fecha_creacion=datetime.now(),
             fecha_edicion=None,
             created_by=current_user_id,
-            updated_by=None
+            updated_by=None,
+            detalles=[
+                DetalleVenta(
+                    id_presentacion=detalle_data.id_presentacion,
+                    cantidad=detalle_data.cantidad,
+                    precio_unitario=detalle_data.precio_unitario,
+                    subtotal=detalle_data.subtotal
+                )
+                for detalle_data in venta.detalles
+            ]
         )
         db.add(db_venta)
-        db.flush()  # Para obtener el ID de la venta
+        db.flush()  # Para obtener el ID de la venta (referencia del kardex)
         
-        # 3. Crear los detalles y descontar stock
-        for detalle_data in venta.detalles:
-            # Verificar que la presentación existe y obtener el producto desde ella
-            presentacion = db.query(Presentacion).filter(
-                Presentacion.id == detalle_data.id_presentacion
-            ).first()
-            
-            if not presentacion:
-                raise ValueError(f"Presentación con ID {detalle_data.id_presentacion} no existe")
-            
-            # Obtener el producto desde la presentación
-            producto = db.query(Producto).filter(
-                Producto.id == presentacion.id_producto
-            ).first()
-            
-            if not producto:
-                raise ValueError(f"Producto asociado a la presentación {detalle_data.id_presentacion} no existe")
-            
-            # Calcular unidades a descontar = cantidad vendida * cantidad_base de la presentación
-            unidades_a_descontar = detalle_data.cantidad * presentacion.cantidad_base
-            
-            # Verificar stock suficiente
-            if producto.stock_actual < unidades_a_descontar:
-                raise ValueError(
-                    f"Stock insuficiente para {producto.nombre}. "
-                    f"Disponible: {producto.stock_actual}, Requerido: {unidades_a_descontar}"
-                )
-            
-            # Descontar del stock
-            producto.stock_actual -= unidades_a_descontar
-            
-            # Crear detalle de venta
-            db_detalle = DetalleVenta(
-                id_venta=db_venta.id,
-                id_presentacion=detalle_data.id_presentacion,
-                cantidad=detalle_data.cantidad,
-                precio_unitario=detalle_data.precio_unitario,
-                subtotal=detalle_data.subtotal
+        # 4. Descontar stock: unidades = cantidad vendida * cantidad_base de la presentación
+        lineas = [(detalle.id_presentacion, detalle.cantidad) for detalle in venta.detalles]
+        requeridos = stock_service.unidades_por_producto(lineas, presentaciones)
+        sin_stock = stock_service.descontar_stock(
+            db, requeridos, stock_service.MOVIMIENTO_VENTA,
+            id_origen=db_venta.id, id_usuario=current_user_id,
+        )
+        if sin_stock:
+            stock = stock_service.obtener_stock(db, sin_stock)
+            raise stock_service.StockInsuficienteError(stock_service.faltantes_por_producto(
+                lineas, presentaciones, requeridos, sin_stock,
+                disponible={id_producto: fila["stock_actual"] for id_producto, fila in stock.items()},
+                nombres={id_producto: fila["nombre"] for id_producto, fila in stock.items()},
+            ))
+
+        # 5. Sumar la venta en los resúmenes diarios (misma transacción)
+        resumen_ventas.aplicar_venta(db, db_venta, 1)
+
+        if clave_idempotencia:
+            idempotencia.registrar(
+                db, idempotencia.AMBITO_VENTA, current_user_id, {clave_idempotencia: db_venta.id}, huella=huella,
             )
-            db.add(db_detalle)
-        
+
         db.commit()
-        db.refresh(db_venta)
         
         # Cargar las relaciones
         return get_venta_by_id(db, db_venta.id)
@@ -179,6 +267,143 @@ def crear_venta(db: Session, venta: VentaCreate, current_user_id: int = None) ->
         db.rollback()
         raise e
 
+# Estados del resultado de cada ticket de un lote
+LOTE_CREADA = "CREADA"
+LOTE_DUPLICADA = "DUPLICADA"
+LOTE_ERROR = "ERROR"
+
+def crear_ventas_lote(db: Session, tickets: List[VentaLoteItem], current_user_id: int = None) -> List[dict]:
+    """
+    Crear varias ventas (tickets de un POS que estuvo sin conexión) en una transacción.
+    Cada ticket trae su clave de idempotencia: los que ya se registraron se
+    devuelven como DUPLICADA con su venta, así reenviar el lote no crea nada.
+    Un ticket con error (presentación inexistente, stock insuficiente) no
+    impide crear los demás.
+    """
+    try:
+        return stock_service.con_reintentos(db, lambda: _crear_ventas_lote(db, tickets, current_user_id))
+    except IntegrityError:
+        # Otra petición registró alguna clave en paralelo: al repetir se verá como duplicada
+        return stock_service.con_reintentos(db, lambda: _crear_ventas_lote(db, tickets, current_user_id))
+
+def _crear_ventas_lote(db: Session, tickets: List[VentaLoteItem], current_user_id: int = None) -> List[dict]:
+    resultados = [
+        {"clave_idempotencia": ticket.clave_idempotencia, "estado": None, "id_venta": None}
+        for ticket in tickets
+    ]
+
+    # 1. Claves ya usadas (una consulta) y claves repetidas dentro del lote
+    usadas = idempotencia.buscar(
+        db, idempotencia.AMBITO_VENTA, current_user_id, (t.clave_idempotencia for t in tickets)
+    )
+    primero = {}
+    pendientes = []
+    for i, ticket in enumerate(tickets):
+        clave = ticket.clave_idempotencia
+        if clave in usadas:
+            resultados[i].update(estado=LOTE_DUPLICADA, id_venta=usadas[clave].id_recurso)
+        elif clave not in primero:
+            primero[clave] = i
+            pendientes.append(i)
+
+    # 2. Todas las presentaciones del lote en una sola consulta
+    presentaciones = stock_service.resolver_presentaciones(
+        db, (d.id_presentacion for i in pendientes for d in tickets[i].detalles)
+    )
+    lineas = {}
+    requeridos = {}
+    for i in pendientes:
+        inexistentes = [d.id_presentacion for d in tickets[i].detalles if d.id_presentacion not in presentaciones]
+        if inexistentes:
+            resultados[i].update(estado=LOTE_ERROR, error=f"Presentación con ID {inexistentes[0]} no existe")
+            continue
+        lineas[i] = [(d.id_presentacion, d.cantidad) for d in tickets[i].detalles]
+        requeridos[i] = stock_service.unidades_por_producto(lineas[i], presentaciones)
+
+    # 3. Bloquear los productos del lote y repartir el stock en el orden de los tickets
+    productos = sorted({id_producto for unidades in requeridos.values() for id_producto in unidades})
+    stock_service.bloquear_productos(db, productos)
+    stock = stock_service.obtener_stock(db, productos)
+    disponible = {id_producto: stock[id_producto]["stock_actual"] or 0 for id_producto in stock}
+    nombres = {id_producto: stock[id_producto]["nombre"] for id_producto in stock}
+    aceptados = []
+    for i, unidades in requeridos.items():
+        sin_stock = [id_producto for id_producto, requerido in unidades.items() if disponible[id_producto] < requerido]
+        if sin_stock:
+            faltantes = stock_service.faltantes_por_producto(
+                lineas[i], presentaciones, unidades, sin_stock, disponible, nombres
+            )
+            resultados[i].update(
+                estado=LOTE_ERROR, faltantes=faltantes,
+                error="; ".join(stock_service.mensaje_faltante(f) for f in faltantes),
+            )
+            continue
+        for id_producto, requerido in unidades.items():
+            disponible[id_producto] -= requerido
+        aceptados.append(i)
+
+    if aceptados:
+        # 4. Cabeceras con el ORM (devuelve los ids) y detalles con un INSERT masivo
+        ahora = datetime.now()
+        ventas = []
+        for i in aceptados:
+            ticket = tickets[i]
+            subtotales = [d.subtotal if d.subtotal is not None else d.precio_unitario * d.cantidad for d in ticket.detalles]
+            total_sin_descuento = sum(subtotales, Decimal(0))
+            descuento_aplicado = ticket.descuento or Decimal(0)
+            ventas.append(Venta(
+                id_cliente=ticket.id_cliente,
+                cliente_nombre=ticket.cliente_nombre,
+                cliente_dni=ticket.cliente_dni,
+                fecha=ticket.fecha or ahora,
+                descuento=descuento_aplicado,
+                totalsindescuento=total_sin_descuento,
+                totalcondescuento=total_sin_descuento - descuento_aplicado,
+                id_usuario=ticket.id_usuario,
+                estado=ticket.estado or "CONFIRMADA",
+                fecha_creacion=ahora,
+                created_by=current_user_id,
+            ))
+        db.add_all(ventas)
+        db.flush()
+
+        detalles = []
+        for i, venta in zip(aceptados, ventas):
+            for d in tickets[i].detalles:
+                detalles.append({
+                    "id_venta": venta.id,
+                    "id_presentacion": d.id_presentacion,
+                    "cantidad": d.cantidad,
+                    "precio_unitario": d.precio_unitario,
+                    "subtotal": d.subtotal if d.subtotal is not None else d.precio_unitario * d.cantidad,
+                })
+        db.execute(insert(DetalleVenta), detalles)
+
+        # 5. Stock (un UPDATE), kardex, resúmenes y claves de idempotencia
+        stock_service.descontar_stock_lote(
+            db, [(venta.id, requeridos[i]) for i, venta in zip(aceptados, ventas)],
+            stock_service.MOVIMIENTO_VENTA, id_usuario=current_user_id,
+        )
+        resumen_ventas.aplicar_ventas(db, ventas, 1)
+        idempotencia.registrar(
+            db, idempotencia.AMBITO_VENTA, current_user_id,
+            {tickets[i].clave_idempotencia: venta.id for i, venta in zip(aceptados, ventas)},
+        )
+        for i, venta in zip(aceptados, ventas):
+            resultados[i].update(estado=LOTE_CREADA, id_venta=venta.id)
+
+    db.commit()
+
+    # Claves repetidas dentro del lote: mismo resultado que su primera aparición
+    for i, ticket in enumerate(tickets):
+        if resultados[i]["estado"] is None:
+            original = resultados[primero[ticket.clave_idempotencia]]
+            if original["estado"] == LOTE_ERROR:
+                resultados[i].update(estado=LOTE_ERROR, error=original["error"], faltantes=original.get("faltantes"))
+            else:
+                resultados[i].update(estado=LOTE_DUPLICADA, id_venta=original["id_venta"])
+    return resultados
+
 def actualizar_venta(db: Session, venta_id: int, venta: VentaUpdate) -> Optional[Venta]:
     """
     Actualizar una venta existente (solo campos principales, no detalles)
@@ -190,12 +415,18 @@ def actualizar_venta(db: Session, venta_id: int, venta: VentaUpdate) -> Optional
     
     # Actualizar solo los campos proporcionados, incluyendo cliente_nombre y cliente_dni
     update_data = venta.model_dump(exclude_unset=True)
+    cambia_resumen = bool(update_data.keys() & CAMPOS_RESUMEN)
+    if cambia_resumen:
+        resumen_ventas.aplicar_venta(db, db_venta, -1)
     for key, value in update_data.items():
         setattr(db_venta, key, value)
     
     # Establecer fecha de edición automáticamente (igual que usuario)
     db_venta.fecha_edicion = datetime.now()
     
+    if cambia_resumen:
+        db.flush()
+        resumen_ventas.aplicar_venta(db, db_venta, 1)
     db.commit()
     
     # Cargar las relaciones
@@ -211,14 +442,18 @@ def eliminar_venta(db: Session, venta_id: int) -> bool:
     if not db_venta:
         return False
     
+    resumen_ventas.aplicar_venta(db, db_venta, -1)
     db.delete(db_venta)
     db.commit()
     return True
 
-def anular_venta(db: Session, venta_id: int) -> Optional[Venta]:
+def anular_venta(db: Session, venta_id: int, current_user_id: int = None) -> Optional[Venta]:
     """
     anular una venta (cambiar estado a anulada y restaurar stock)
     """
+    return stock_service.con_reintentos(db, lambda: _anular_venta(db, venta_id, current_user_id))
+
+def _anular_venta(db: Session, venta_id: int, current_user_id: int = None) -> Optional[Venta]:
     db_venta = get_venta_by_id(db, venta_id)
     
     if not db_venta:
@@ -227,24 +462,26 @@ def anular_venta(db: Session, venta_id: int) -> Optional[Venta]:
     if db_venta.estado == "ANULADA":
         return db_venta  # Ya está anulada
     
-    try:
+    # Cambiar estado solo si nadie la anuló en paralelo (evita restaurar stock dos veces)
+    anulada = db.execute(
+        update(Venta)
+        .where(Venta.id == venta_id, Venta.estado != "ANULADA")
+        .values(estado="ANULADA", fecha_edicion=datetime.now(), updated_by=current_user_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    if anulada:
         # Restaurar stock por cada detalle
+        deltas = defaultdict(int)
         for detalle in db_venta.detalles:
-            presentacion = db.query(Presentacion).filter(Presentacion.id == detalle.id_presentacion).first()
-            
-            if presentacion:
-                producto = db.query(Producto).filter(Producto.id == presentacion.id_producto).first()
-                
-                if producto:
-                    unidades_a_restaurar = detalle.cantidad * presentacion.cantidad_base
-                    producto.stock_actual += unidades_a_restaurar
-        
-        # Cambiar estado
-        db_venta.estado = "ANULADA"
-        
-        db.commit()
-        return get_venta_by_id(db, venta_id)
-        
-    except Exception as e:
-        db.rollback()
-        raise e
+            if detalle.presentacion:
+                deltas[detalle.presentacion.id_producto] += detalle.cantidad * detalle.presentacion.cantidad_base
+        stock_service.ajustar_stock(
+            db, deltas, stock_service.MOVIMIENTO_ANULACION_VENTA,
+            id_origen=venta_id, id_usuario=current_user_id,
+        )
+        # db_venta conserva el estado anterior: resta lo que había sumado
+        resumen_ventas.aplicar_venta(db, db_venta, -1)
+    
+    db.commit()
+    return get_venta_by_id(db, venta_id)
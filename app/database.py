@@ -1,6 +1,16 @@
-from sqlalchemy import create_engine # Motor de base de datos
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import Index, create_engine, event, text # Motor de base de datos
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine # Motor y sesiones async
 from sqlalchemy.ext.declarative import declarative_base # Base para los modelos
-from sqlalchemy.orm import sessionmaker # Crear sesiones
+from sqlalchemy.orm import Session, sessionmaker # Crear sesiones
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import get_settings
 
 
@@ -10,16 +20,325 @@ from fastapi import Depends # Dependencias, para inyectar la sesión de base de
 
 # Obtener la configuración desde variables de entorno
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# alembic.ini y migrations/ están en la raíz del repositorio
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_INI = os.path.join(RAIZ_PROYECTO, "alembic.ini")
+MIGRACIONES_DIR = os.path.join(RAIZ_PROYECTO, "migrations", "versions")
+_ASIGNACION_REVISION = re.compile(r"^(revision|down_revision)\s*=\s*(.+)$", re.MULTILINE)
+
+# SQLSTATE de PostgreSQL cuando una sentencia supera statement_timeout
+SQLSTATE_TIMEOUT = "57014"  # query_canceled
+CLAVE_TIMEOUT = "statement_timeout_ms"  # Clave en Session.info
+
+
+class MetricasPool:
+    """Esperas al pedir una conexión al pool y pedidos que agotaron DB_POOL_TIMEOUT (por proceso)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.pedidos = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.agotados = 0
+
+    def registrar(self, segundos: float, agotado: bool = False):
+        with self._lock:
+            self.pedidos += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            if agotado:
+                self.agotados += 1
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "pedidos": self.pedidos,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+                "espera_media_ms": round(self.espera_total * 1000 / self.pedidos, 3) if self.pedidos else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+                "agotados": self.agotados,
+            }
+
+
+class _PoolMedido:
+    """Mide cuánto espera cada pedido de conexión (también cuando el pool está agotado)."""
+
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metricas.registrar(time.perf_counter() - inicio, agotado=True)
+            raise
+        self.metricas.registrar(time.perf_counter() - inicio)
+        return conexion
+
+
+class PoolMedido(_PoolMedido, QueuePool):
+    metricas = MetricasPool()
 
-engine = create_engine(settings.DATABASE_URL, echo=False)
+
+class PoolAsyncMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    metricas = MetricasPool()
+
+
+class PoolLecturaMedido(_PoolMedido, QueuePool):
+    metricas = MetricasPool()
+
+
+class PoolAsyncLecturaMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    metricas = MetricasPool()
+
+
+def _opciones_motor(url: str, clase_pool) -> dict:
+    """Pool y statement_timeout desde Settings. SQLite en memoria conserva su pool por defecto."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    opciones = dict(
+        poolclass=clase_pool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        opciones["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return opciones
+
+
+engine = create_engine(settings.DATABASE_URL, echo=False, **_opciones_motor(settings.DATABASE_URL, PoolMedido))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def indices_cursor(nombre: str, columna_fecha, columna_id, *prefijo) -> tuple:
+    """
+    Índice en el orden de la paginación por cursor (crud/paginacion.py) para
+    __table_args__: (*prefijo, fecha DESC NULLS LAST, id DESC). SQLite no admite
+    NULLS LAST en un índice: ahí se crea (*prefijo, fecha, id) con el mismo nombre.
+    """
+    return (
+        Index(nombre, *prefijo, columna_fecha.desc().nulls_last(), columna_id.desc()).ddl_if(dialect="postgresql"),
+        Index(nombre, *prefijo, columna_fecha, columna_id).ddl_if(
+            callable_=lambda ddl, target, bind, **kw: kw["dialect"].name != "postgresql"
+        ),
+    )
+
+# Driver async equivalente a cada driver sync (psycopg 3 sirve para ambos)
+DRIVERS_ASYNC = {
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def url_async(url: str) -> str:
+    """DATABASE_URL con el driver async equivalente; se deja igual si no se conoce."""
+    url = make_url(url)
+    return url.set(drivername=DRIVERS_ASYNC.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
+# Motor async para los listados de lectura: conviven con el motor sync mientras
+# se migran los routers. Las rutas async esperan a la base en el event loop en
+# lugar de ocupar un hilo del threadpool de Starlette.
+URL_ASYNC = settings.DATABASE_ASYNC_URL or url_async(settings.DATABASE_URL)
+try:
+    async_engine = create_async_engine(URL_ASYNC, echo=False, **_opciones_motor(URL_ASYNC, PoolAsyncMedido))
+except ImportError:
+    # Falta el driver async (aiosqlite está en requirements.txt; otros motores pueden
+    # no tenerlo): solo fallan las rutas async
+    async_engine = None
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Lecturas (listados, reportes, exportaciones): réplica si hay DATABASE_REPLICA_URL,
+# si no la primaria. En PostgreSQL las transacciones son READ ONLY en ambos casos,
+# así una escritura por error falla igual que fallaría en la réplica.
+# Las escrituras y lo que se lee justo después de escribir (p. ej. crear_venta ->
+# get_venta_by_id, GET por id) siguen en get_db: la réplica puede ir atrasada.
+if settings.DATABASE_REPLICA_URL:
+    engine_replica = create_engine(
+        settings.DATABASE_REPLICA_URL, echo=False, **_opciones_motor(settings.DATABASE_REPLICA_URL, PoolLecturaMedido)
+    )
+    URL_REPLICA_ASYNC = url_async(settings.DATABASE_REPLICA_URL)
+    try:
+        async_engine_replica = create_async_engine(
+            URL_REPLICA_ASYNC, echo=False, **_opciones_motor(URL_REPLICA_ASYNC, PoolAsyncLecturaMedido)
+        )
+    except ImportError:
+        async_engine_replica = None
+else:
+    engine_replica = None
+    async_engine_replica = None
+
+engine_lectura = (engine_replica or engine).execution_options(postgresql_readonly=True)
+SessionLocalLectura = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura)
+async_engine_lectura = async_engine_replica or async_engine
+if async_engine_lectura is not None:
+    async_engine_lectura = async_engine_lectura.execution_options(postgresql_readonly=True)
+AsyncSessionLocalLectura = async_sessionmaker(
+    async_engine_lectura, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+def estado_pool(motor) -> dict:
+    """Conexiones en uso / libres / overflow del pool y esperas acumuladas."""
+    pool = motor.pool
+    estado = {"clase": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update(
+            tamano=pool.size(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            timeout_segundos=pool.timeout(),
+            en_uso=pool.checkedout(),
+            libres=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, _PoolMedido):
+        estado.update(pool.metricas.resumen())
+    return estado
+
+
+def reiniciar_pools_tras_fork():
+    """
+    Para cada worker de gunicorn con preload_app (ver gunicorn.conf.py): descarta
+    las conexiones heredadas del proceso master sin cerrarlas (siguen siendo del
+    master) y reinicia las métricas del pool, que son por proceso.
+    """
+    for motor in (engine, engine_replica):
+        if motor is not None:
+            motor.dispose(close=False)
+    for motor in (async_engine, async_engine_replica):
+        if motor is not None:
+            motor.sync_engine.dispose(close=False)
+    for clase in (PoolMedido, PoolAsyncMedido, PoolLecturaMedido, PoolAsyncLecturaMedido):
+        clase.metricas.reiniciar()
+
+
+@event.listens_for(Session, "after_begin")
+def _aplicar_timeout(session, transaction, connection):
+    milisegundos = session.info.get(CLAVE_TIMEOUT)
+    if milisegundos and connection.dialect.name == "postgresql":
+        # SET LOCAL dura hasta el fin de la transacción; se repite en cada una
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(milisegundos)}")
+
+
+def revisiones_migraciones() -> tuple:
+    """
+    (revisiones de migrations/versions, la última). Lee `revision` y
+    `down_revision` de cada archivo en lugar de usar alembic.script: importar
+    alembic al arrancar cuesta más que lo que ahorra verificar_esquema.
+    """
+    revisiones, anteriores = set(), set()
+    for archivo in os.listdir(MIGRACIONES_DIR):
+        if not archivo.endswith(".py"):
+            continue
+        with open(os.path.join(MIGRACIONES_DIR, archivo), encoding="utf-8") as f:
+            for nombre, valor in _ASIGNACION_REVISION.findall(f.read()):
+                destino = revisiones if nombre == "revision" else anteriores
+                destino.update(re.findall(r"['\"](\w+)['\"]", valor))  # Una merge tiene una tupla
+    cabezas = revisiones - anteriores
+    if len(cabezas) != 1:
+        raise RuntimeError(f"migrations/versions debe tener una sola revisión final, tiene {sorted(cabezas)}")
+    return revisiones, cabezas.pop()
+
+
+def verificar_esquema(motor=None) -> str:
+    """
+    Compara la revisión guardada en la base (la fila de alembic_version) con la
+    última de migrations/: una consulta en lugar de inspeccionar cada tabla.
+    Lanza RuntimeError si la base no está versionada o está atrasada; si está
+    adelantada (ya la migró una versión más nueva del código) solo avisa.
+    """
+    revisiones, requerida = revisiones_migraciones()
+    try:
+        with (motor or engine).connect() as conn:
+            actual = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except sa_exc.DBAPIError:
+        actual = None  # No existe la tabla
+
+    if actual == requerida:
+        return actual
+    if actual is None:
+        raise RuntimeError(
+            "La base no tiene versión de esquema. Base nueva: `alembic upgrade head`; "
+            "base creada con create_all antes de las migraciones (esquema de la revisión 0001): "
+            "`alembic stamp 0001` y luego `alembic upgrade head`"
+        )
+    if actual not in revisiones:
+        logger.warning("La base está en la revisión %s, posterior a %s (la de este código)", actual, requerida)
+        return actual
+    raise RuntimeError(f"Esquema desactualizado ({actual}, se requiere {requerida}): `alembic upgrade head`")
+
+
+def es_timeout_sentencia(error: Exception) -> bool:
+    """True si el error es una sentencia cancelada por statement_timeout."""
+    original = getattr(error, "orig", None)
+    sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+    return sqlstate == SQLSTATE_TIMEOUT
+
+
 # esta función crea una nueva sesión de base de datos para cada solicitud
 def get_db():
     db = SessionLocal()
     try:
         yield db # yield es como return pero para generadores
     finally:
-        db.close() # Cierra la sesión de la base de datos
\ No newline at end of file
+        db.close() # Cierra la sesión de la base de datos
+
+
+def get_db_lectura():
+    """Sesión de solo lectura (réplica si está configurada) para listados, reportes y exportaciones."""
+    db = SessionLocalLectura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def limitar_sentencias(milisegundos: int, sesion=get_db):
+    """
+    Dependencia por ruta (en `dependencies=[...]`): statement_timeout de PostgreSQL
+    para la sesión de la solicitud (`sesion`: get_db o get_db_lectura), así un
+    reporte descontrolado se cancela en lugar de ocupar conexiones que necesita
+    el punto de venta.
+    """
+    def dependencia(db: Session = Depends(sesion)):
+        db.info[CLAVE_TIMEOUT] = milisegundos
+        if db.in_transaction():
+            # La transacción ya empezó (p. ej. en otra dependencia): after_begin no volverá a correr
+            _aplicar_timeout(db, None, db.connection())
+    return dependencia
+
+
+# Límite de las rutas de reportes (dashboard, stock a fecha, conciliación), que leen de get_db_lectura
+limite_reportes = limitar_sentencias(settings.DB_STATEMENT_TIMEOUT_REPORTES_MS, get_db_lectura)
+
+
+async def get_async_db():
+    """Sesión async por solicitud, para las rutas `async def`."""
+    if async_engine is None:
+        raise RuntimeError("No está instalado el driver async de la base de datos (ver DATABASE_ASYNC_URL)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_db_lectura():
+    """Como get_db_lectura, para las rutas `async def`."""
+    if async_engine_lectura is None:
+        raise RuntimeError("No está instalado el driver async de la base de datos (ver DATABASE_ASYNC_URL)")
+    async with AsyncSessionLocalLectura() as db:
+        yield db
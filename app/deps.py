@@ -1,41 +1,101 @@
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from typing import Optional
 from jose import JWTError 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.auth import verificar_token
-from app.crud.usuario import obtener_usuario_db
+from app.database import SessionLocal, get_async_db, get_db
+from app.auth import verificar_token, usuario_desde_claims
+from app.crud.usuario import obtener_usuario_autenticado, obtener_usuario_autenticado_async
 
 
 #HTTPException -> lanzar errores
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """Obtener usuario autenticado desde el token."""
-    cred_exception = HTTPException(
+    return _usuario_desde_token(token, db)
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Igual que get_current_user, con la sesión async (para rutas `async def`)."""
+    payload = _payload_desde_token(token)
+    user = usuario_desde_claims(payload)
+    if user is None:
+        user = await obtener_usuario_autenticado_async(db, dni=payload["sub"])
+        if db.in_transaction():
+            # Ver _usuario_desde_token
+            await db.commit()
+    if user is None:
+        raise _no_autenticado()
+    return user
+
+
+def _no_autenticado() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No autenticado",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _payload_desde_token(token: Optional[str]) -> dict:
+    """Payload de un token válido con `sub`; si no, 401."""
+    if not token:
+        raise _no_autenticado()
+
     try:
         payload = verificar_token(token)
         if payload is None:
-            raise cred_exception
+            raise _no_autenticado()
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise cred_exception
+            raise _no_autenticado()
     except JWTError:
-        raise cred_exception
-    
-    user = obtener_usuario_db(db, usuario=user_id)
+        raise _no_autenticado()
+    return payload
+
+
+def _usuario_desde_token(token: Optional[str], db: Session):
+    payload = _payload_desde_token(token)
+
+    # Modo AUTH_CLAIMS_EN_TOKEN: el token firmado ya trae los datos del usuario
+    user = usuario_desde_claims(payload)
+    if user is not None:
+        return user
+
+    # El usuario se cachea por DNI en memoria (TTL corto, se invalida al editarlo)
+    user = obtener_usuario_autenticado(db, dni=payload["sub"])
+    if db.in_transaction():
+        # Devolver la conexión al pool: las rutas de lectura usan otra sesión
+        # (get_db_lectura) y, si esta quedara abierta, cada solicitud ocuparía dos
+        # conexiones del mismo pool; con el pool lleno se bloquearían entre sí.
+        db.commit()
     if user is None:
-        raise cred_exception
+        raise _no_autenticado()
     return user
 
 
+def get_current_user_stream(
+    token: Optional[str] = Depends(oauth2_scheme_opcional),
+    token_query: Optional[str] = Query(None, alias="token"),
+):
+    """
+    Usuario autenticado para respuestas de larga duración (SSE).
+    Acepta el token en ?token= porque EventSource no permite enviar cabeceras,
+    y usa una sesión propia que se cierra enseguida: get_db mantendría una
+    conexión del pool ocupada mientras dure el stream.
+    """
+    db = SessionLocal()
+    try:
+        return _usuario_desde_token(token or token_query, db)
+    finally:
+        db.close()
+
+
 def get_current_user_id(current_user = Depends(get_current_user)) -> int:
     """Obtener solo el ID del usuario autenticado."""
     return current_user.id
@@ -0,0 +1 @@
+"""Tareas periódicas (ejecutar con `python -m app.jobs.<tarea>` desde cron o el scheduler)."""
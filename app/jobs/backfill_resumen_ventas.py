@@ -0,0 +1,36 @@
+"""
+Reconstruye los resúmenes diarios de ventas (producto, usuario y cliente)
+desde el historial de ventas, con un INSERT ... SELECT agrupado por tabla.
+
+Uso (desde la raíz del repositorio):
+    python -m app.jobs.backfill_resumen_ventas                      # toda la historia
+    python -m app.jobs.backfill_resumen_ventas --desde 2025-01-01 --hasta 2025-01-31
+"""
+import argparse
+import time
+from datetime import date
+
+from app.database import SessionLocal
+from app.services import resumen_ventas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primer día a reconstruir (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día a reconstruir (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        filas = resumen_ventas.reconstruir(db, desde=args.desde, hasta=args.hasta)
+        segundos = time.perf_counter() - inicio
+        for tabla, cantidad in filas.items():
+            print(f"  {tabla:<28} {cantidad:>10} filas")
+        print(f"✅ Resúmenes de ventas reconstruidos en {segundos:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Conciliación de stock contra ventas, compras y ajustes del kardex.
+
+Uso (desde la raíz del repositorio):
+    python -m app.jobs.conciliar_stock              # solo reporta
+    python -m app.jobs.conciliar_stock --corregir   # además corrige las diferencias
+"""
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.services import conciliacion_stock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corregir", action="store_true", help="Ajustar stock_actual al valor esperado")
+    parser.add_argument("--producto", type=int, action="append", dest="ids", help="Limitar a estos productos")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        resultado = conciliacion_stock.conciliar(db, corregir=args.corregir, ids_producto=args.ids)
+        segundos = time.perf_counter() - inicio
+
+        for d in resultado["diferencias"]:
+            print(f"  {d['codigo']:<15} {d['nombre'] or '':<40} actual={d['stock_actual']:>8} "
+                  f"esperado={d['esperado']:>8} diferencia={d['diferencia']:>+8}")
+        print(f"📊 {resultado['productos_con_diferencia']} productos con diferencia "
+              f"({resultado['unidades_de_diferencia']} unidades) en {segundos:.2f}s")
+        if args.corregir:
+            print(f"✅ {resultado['corregidos']} productos corregidos")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
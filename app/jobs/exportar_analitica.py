@@ -0,0 +1,36 @@
+"""
+Exporta ventas, compras y dimensiones de producto a Parquet / Arrow IPC
+particionados por mes (solo los meses con cambios desde la última ejecución).
+
+Uso (desde la raíz del repositorio, p. ej. en un cron cada hora):
+    python -m app.jobs.exportar_analitica
+    python -m app.jobs.exportar_analitica --formato arrow --destino /datos/bi --completo
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.services import exportacion_analitica
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formato", choices=list(exportacion_analitica.EXTENSIONES), default=exportacion_analitica.FORMATO_PARQUET)
+    parser.add_argument("--destino", help="Directorio de salida (por defecto ANALITICA_DIR)")
+    parser.add_argument("--completo", action="store_true", help="Reescribir todos los meses")
+    args = parser.parse_args()
+
+    if not exportacion_analitica.pyarrow_disponible():
+        raise SystemExit("❌ La exportación analítica requiere pyarrow (pip install pyarrow)")
+
+    db = SessionLocal()
+    try:
+        resultado = exportacion_analitica.exportar(db, formato=args.formato, destino=args.destino, completo=args.completo)
+        for conjunto, datos in resultado["conjuntos"].items():
+            print(f"  {conjunto:<8} {datos['particiones']:>4} meses  {datos['filas']}")
+        print(f"✅ Exportación {resultado['formato']} en {resultado['destino']} ({resultado['segundos']}s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Borra las claves de idempotencia vencidas (IDEMPOTENCIA_TTL_HORAS).
+
+Uso (desde la raíz del repositorio, p. ej. en un cron diario):
+    python -m app.jobs.limpiar_idempotencia
+"""
+from app.database import SessionLocal
+from app.services import idempotencia
+
+
+def main():
+    db = SessionLocal()
+    try:
+        borradas = idempotencia.limpiar_caducadas(db)
+        print(f"🧹 {borradas} claves de idempotencia vencidas borradas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
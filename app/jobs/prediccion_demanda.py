@@ -0,0 +1,37 @@
+"""
+Recalcula el pronóstico de demanda de todos los productos activos.
+
+Uso (desde la raíz del repositorio, p. ej. en un cron nocturno después del
+backfill de resúmenes si se usa):
+    python -m app.jobs.prediccion_demanda
+    python -m app.jobs.prediccion_demanda --dias-historia 365 --horizonte 14
+"""
+import argparse
+from datetime import date
+
+from app.database import SessionLocal
+from app.services import prediccion_demanda
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Último día de historia (por defecto ayer)")
+    parser.add_argument("--dias-historia", type=int, default=prediccion_demanda.DIAS_HISTORIA)
+    parser.add_argument("--horizonte", type=int, default=prediccion_demanda.HORIZONTE_DIAS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        resultado = prediccion_demanda.calcular_predicciones(
+            db, hasta=args.hasta, dias_historia=args.dias_historia, horizonte=args.horizonte
+        )
+        for modelo, productos in resultado["modelos"].items():
+            print(f"  {modelo:<24} {productos:>8} productos")
+        print(f"📈 Pronóstico de {resultado['productos']} productos en {resultado['segundos_total']:.2f}s "
+              f"(carga {resultado['segundos_carga']:.2f}s, ajuste {resultado['segundos_ajuste']:.2f}s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Calcula los puntos de reorden del catálogo y, opcionalmente, genera las
+compras BORRADOR sugeridas (una por proveedor).
+
+Uso (desde la raíz del repositorio):
+    python -m app.jobs.reposicion              # solo lista las sugerencias
+    python -m app.jobs.reposicion --generar    # además crea los borradores
+"""
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.services import reposicion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generar", action="store_true", help="Crear las compras BORRADOR")
+    parser.add_argument("--proveedor", type=int, action="append", dest="ids", help="Limitar a estos proveedores")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        sugerencias = reposicion.calcular_sugerencias(db, ids_proveedor=args.ids)
+        for s in sugerencias:
+            print(f"  prov={s['id_proveedor'] or '-':<6} {s['codigo'] or '':<15} {s['nombre'] or '':<40} "
+                  f"stock={s['stock_actual']:>6} reorden={s['punto_reorden']:>6} pedir={s['unidades']:>6}")
+        print(f"📦 {len(sugerencias)} productos para reponer ({time.perf_counter() - inicio:.2f}s)")
+
+        if args.generar:
+            resultado = reposicion.generar_borradores(db, ids_proveedor=args.ids)
+            print(f"✅ {len(resultado['compras'])} compras BORRADOR con {resultado['productos']} productos "
+                  f"({resultado['omitidos']} sin proveedor o presentación)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Toma la foto diaria de stock por producto para el kardex.
+
+Uso (desde la raíz del repositorio, p. ej. en un cron diario):
+    python -m app.jobs.snapshot_stock
+"""
+from app.database import SessionLocal
+from app.crud import kardex as crud_kardex
+
+
+def main():
+    db = SessionLocal()
+    try:
+        productos = crud_kardex.tomar_snapshot(db)
+        print(f"📸 Foto de stock guardada para {productos} productos")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
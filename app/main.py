@@ -2,18 +2,22 @@
 Archivo de entrada de la aplicación FastAPI.
 Punto de inicio de la API.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 from app.config import get_settings
-from app.routers import auth, usuarios, categorias, productos, marcas, tiposProducto, clientes, proveedores, compras, ventas, upload, presentaciones
-from app.database import engine, Base
-
-# Crear tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+from app.routers import auth, usuarios, categorias, productos, marcas, tiposProducto, clientes, proveedores, compras, ventas, upload, presentaciones, metricas, kardex, reportes, prediccion, reposicion, alertas
+from app.database import es_timeout_sentencia, verificar_esquema
 
 # Obtener configuración
 settings = get_settings()
 
+# El esquema lo crean las migraciones (alembic upgrade head); al arrancar solo se
+# comprueba que la base esté en la revisión que espera el código
+if settings.DB_VERIFICAR_ESQUEMA:
+    verificar_esquema()
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title=settings.API_TITLE,
@@ -29,8 +33,19 @@ app.add_middleware(
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=settings.CORS_ALLOW_METHODS,
     allow_headers=settings.CORS_ALLOW_HEADERS,
+    expose_headers=settings.CORS_EXPOSE_HEADERS,
 )
 
+# Sentencias canceladas por statement_timeout (ver DB_STATEMENT_TIMEOUT_*)
+@app.exception_handler(DBAPIError)
+async def manejar_error_base_datos(request: Request, exc: DBAPIError):
+    if es_timeout_sentencia(exc):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "La consulta superó el tiempo máximo permitido; acote el rango o reintente"},
+        )
+    raise exc
+
 # Incluir routers
 app.include_router(auth.router)
 app.include_router(usuarios.router)
@@ -44,6 +59,12 @@ app.include_router(presentaciones.router)
 app.include_router(compras.router)
 app.include_router(ventas.router)
 app.include_router(upload.router, prefix="/api/v1/upload", tags=["Upload"])
+app.include_router(metricas.router)
+app.include_router(kardex.router)
+app.include_router(reportes.router)
+app.include_router(prediccion.router)
+app.include_router(reposicion.router)
+app.include_router(alertas.router)
 
 
 @app.get("/")
@@ -1,9 +1,14 @@
 # Importar todos los modelos aquí para que SQLAlchemy los encuentre
+from .alertaStock import AlertaStock
 from .categoria import Categoria
+from .claveIdempotencia import ClaveIdempotencia
 from .cliente import Cliente
 from .compra import Compra, DetalleCompra
 from .estadoPago import EstadoPago
 from .marca import Marca
+from .marcaExportacion import MarcaExportacion
+from .movimientoStock import MovimientoStock, SnapshotStock
+from .prediccionDemanda import PrediccionDemanda
 from .presentacion import Presentacion
 from .producto import Producto
 from .proveedor import Proveedor
@@ -11,19 +16,29 @@ from .tipoProducto import TipoProducto
 from .tipoUsuario import TipoUsuario
 from .usuario import Usuario
 from .venta import Venta
+from .ventaDiaria import VentaDiariaCliente, VentaDiariaProducto, VentaDiariaUsuario
 
 __all__ = [
+    'AlertaStock',
     'Categoria',
+    'ClaveIdempotencia',
     'Cliente', 
     'Compra',
     'DetalleCompra',
     'EstadoPago',
     'Marca',
+    'MarcaExportacion',
+    'MovimientoStock',
+    'PrediccionDemanda',
     'Presentacion',
     'Producto',
     'Proveedor',
+    'SnapshotStock',
     'TipoProducto',
     'TipoUsuario',
     'Usuario',
-    'Venta'
+    'Venta',
+    'VentaDiariaCliente',
+    'VentaDiariaProducto',
+    'VentaDiariaUsuario'
 ]
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from app.database import Base
+
+
+class AlertaStock(Base):
+    """
+    Cruce de umbral de stock (stock_minimo / stock_maximo) detectado al
+    escribir el stock, en la misma transacción (ver services/alertas_stock.py).
+    """
+    __tablename__ = "alerta_stock"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    id_producto = Column(Integer, ForeignKey("producto.id"), nullable=False)
+    fecha = Column(DateTime, nullable=False)
+    tipo = Column(String(20), nullable=False)  # SIN_STOCK, BAJO_MINIMO, SOBRE_MAXIMO, NORMALIZADO
+    stock_anterior = Column(Integer, nullable=False)
+    stock = Column(Integer, nullable=False)
+    stock_minimo = Column(Integer, nullable=True)
+    stock_maximo = Column(Integer, nullable=True)
+    # Documento que provocó el cambio (mismo origen que el movimiento del kardex)
+    origen = Column(String(20), nullable=True)
+    id_origen = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_alerta_stock_producto", "id_producto", "id"),
+        Index("ix_alerta_stock_fecha", "fecha"),
+    )
@@ -11,8 +11,8 @@ class Categoria(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), unique=True, index=True)
     estado = Column(String(1), default='A')  # A = Activo, I = Inactivo
-    fecha_creacion = Column(String(25), nullable=False)
-    fecha_edicion = Column(String(25), nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     productos = relationship("Producto", back_populates="categoria")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from app.database import Base
+
+
+class ClaveIdempotencia(Base):
+    """
+    Claves de idempotencia ya usadas al crear ventas y compras: la clave del
+    cliente apunta al documento que creó, así un reintento devuelve ese mismo
+    documento en lugar de crear otro. Cada usuario tiene su propio espacio de
+    claves. Caducan a las IDEMPOTENCIA_TTL_HORAS.
+    """
+    __tablename__ = "clave_idempotencia"
+
+    ambito = Column(String(10), primary_key=True)  # venta, compra
+    id_usuario = Column(Integer, primary_key=True)  # usuario autenticado que envió la clave
+    clave = Column(String(100), primary_key=True)
+    id_recurso = Column(Integer, nullable=False)  # id de la venta o compra creada
+    huella = Column(String(64), nullable=True)  # sha256 del cuerpo de la petición original
+    fecha = Column(DateTime, nullable=False)
+    expira = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_clave_idempotencia_expira", "expira"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, BigInteger, ForeignKey, DateTime, Index, text
 from app.database import Base
 
 
@@ -12,7 +12,12 @@ class Cliente(Base):
     telefono = Column(BigInteger)  # Número entero grande
     correo = Column(String(100), unique=True, index=True)
     estado = Column(String(1), default='A')  # A = Activo, I = Inactivo
-    fecha_creacion = Column(String(25), nullable=False)
-    fecha_edicion = Column(String(25), nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
+
+    __table_args__ = (
+        # Listados de activos ordenados por id (estado = 'A' es el filtro por defecto)
+        Index("ix_cliente_activos", "id", postgresql_where=text("estado = 'A'"), sqlite_where=text("estado = 'A'")),
+    )
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, Date, DECIMAL, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, Date, DECIMAL, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, indices_cursor
 import datetime
 
 # Importar los modelos relacionados para que SQLAlchemy los encuentre
@@ -23,6 +23,16 @@ class Compra(Base):
     fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
+
+    __table_args__ = (
+        # Rango de fechas y paginación por cursor (fecha_compra DESC NULLS LAST, id DESC)
+        *indices_cursor("ix_compras_fecha_compra_id", fecha_compra, id),
+        # Listados por proveedor / usuario: por offset (ordenados por id) y por cursor
+        Index("ix_compras_id_proveedor_id", "id_proveedor", "id"),
+        Index("ix_compras_id_usuario_id", "id_usuario", "id"),
+        *indices_cursor("ix_compras_id_proveedor_fecha_compra_id", fecha_compra, id, id_proveedor),
+        *indices_cursor("ix_compras_id_usuario_fecha_compra_id", fecha_compra, id, id_usuario),
+    )
     
     # Relaciones
     usuario = relationship("Usuario", foreign_keys="[Compra.id_usuario]")
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+
+class MarcaExportacion(Base):
+    """
+    Marca de agua de la exportación analítica (Parquet / Arrow) de cada
+    conjunto: la próxima ejecución solo reescribe los meses con ventas o
+    compras creadas o editadas después de `marca` (menos un margen).
+    """
+    __tablename__ = "marca_exportacion"
+
+    conjunto = Column(String(30), primary_key=True)  # ventas, compras
+    marca = Column(DateTime, nullable=False)  # Inicio de la última exportación (mismo reloj que fecha_edicion)
+    formato = Column(String(10), nullable=False)  # parquet, arrow
+    fecha = Column(DateTime, nullable=False)
+    particiones = Column(Integer, nullable=False, default=0)  # Meses escritos en la última ejecución
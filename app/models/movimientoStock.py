@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class MovimientoStock(Base):
+    """
+    Kardex: registro inmutable de cada cambio de Producto.stock_actual.
+    Se escribe en la misma transacción que el cambio (ver stock_service).
+    """
+    __tablename__ = "movimiento_stock"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    id_producto = Column(Integer, ForeignKey("producto.id"), nullable=False)
+    fecha = Column(DateTime, nullable=False)
+    tipo = Column(String(25), nullable=False)  # VENTA, COMPRA, ANULACION_VENTA, AJUSTE, ...
+    cantidad = Column(Integer, nullable=False)  # Unidades base, con signo (+ entra, - sale)
+    saldo = Column(Integer, nullable=False)  # stock_actual resultante después del movimiento
+    # Documento que originó el movimiento (sin FK: el kardex sobrevive a la eliminación de la compra/venta)
+    origen = Column(String(20), nullable=True)  # venta, compra, producto
+    id_origen = Column(Integer, nullable=True)
+    id_usuario = Column(Integer, ForeignKey("usuario.id"), nullable=True)
+
+    producto = relationship("Producto")
+
+    __table_args__ = (
+        # Movimientos de un producto y "saldo a la fecha X" por producto
+        Index("ix_movimiento_stock_producto_fecha", "id_producto", "fecha", "id"),
+        # Rango de fechas para todos los productos (desde la última foto)
+        Index("ix_movimiento_stock_fecha", "fecha"),
+        Index("ix_movimiento_stock_origen", "origen", "id_origen"),
+    )
+
+
+class SnapshotStock(Base):
+    """Foto periódica del stock de cada producto a una fecha de corte."""
+    __tablename__ = "snapshot_stock"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    id_producto = Column(Integer, ForeignKey("producto.id"), nullable=False)
+    fecha = Column(DateTime, nullable=False)
+    stock = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("id_producto", "fecha", name="uq_snapshot_stock_producto_fecha"),
+        Index("ix_snapshot_stock_fecha", "fecha"),
+    )
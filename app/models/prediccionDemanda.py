@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON
+from app.database import Base
+
+
+class PrediccionDemanda(Base):
+    """
+    Último pronóstico de demanda diaria de cada producto (en unidades base).
+    Lo recalcula app/services/prediccion_demanda.py para todo el catálogo.
+    """
+    __tablename__ = "prediccion_demanda"
+
+    id_producto = Column(Integer, primary_key=True)
+    fecha_calculo = Column(DateTime, nullable=False)
+    fecha_inicio = Column(Date, nullable=False)  # Primer día pronosticado
+    horizonte_dias = Column(Integer, nullable=False)
+    modelo = Column(String(30), nullable=False)  # MEDIA_MOVIL, SUAVIZADO_EXPONENCIAL, ESTACIONAL_SEMANAL
+    alfa = Column(Float, nullable=True)  # Constante de suavizado elegida (modelos exponenciales)
+    error_mae = Column(Float, nullable=False)  # Error absoluto medio en el periodo de validación
+    demanda_diaria = Column(Float, nullable=False)  # Promedio diario pronosticado
+    demanda_total = Column(Float, nullable=False)  # Suma del horizonte
+    pronostico = Column(JSON, nullable=False)  # Unidades por día, desde fecha_inicio
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -14,10 +14,16 @@ class Presentacion(Base):
     precio_venta = Column(Float, nullable=False)  # Precio de venta de esta presentación
     precio_compra = Column(Float, nullable=False)  # Precio de compra de esta presentación
     estado = Column(String(10), default='A')  # A = Activo, I = Inactivo
-    fecha_creacion = Column(String(25), nullable=False)
-    fecha_edicion = Column(String(25), nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
+
+    __table_args__ = (
+        # Presentaciones activas de un producto (estado = 'A' es el filtro por defecto)
+        Index("ix_presentaciones_producto_activas", "id_producto", "id",
+              postgresql_where=text("estado = 'A'"), sqlite_where=text("estado = 'A'")),
+    )
     
     # Relación con producto
     producto = relationship("Producto", backref="presentaciones")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -17,8 +17,8 @@ class Producto(Base):
     stock_maximo = Column(Integer, nullable=True)
     avatar = Column(String(250), nullable=True)  # URL de la imagen
     estado = Column(String(1), default='A')  # A = Activo, I = Inactivo
-    fecha_creacion = Column(String(25), nullable=False)
-    fecha_edicion = Column(String(25), nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     
@@ -26,6 +26,11 @@ class Producto(Base):
     id_categoria = Column(Integer, ForeignKey("categoria.id"))
     id_tipo_producto = Column(Integer, ForeignKey("tipo_producto.id"))
     id_marca = Column(Integer, ForeignKey("marca.id"))
+
+    __table_args__ = (
+        # Listados de activos ordenados por id (estado = 'A' es el filtro por defecto)
+        Index("ix_producto_activos", "id", postgresql_where=text("estado = 'A'"), sqlite_where=text("estado = 'A'")),
+    )
     
     # Relaciones
     categoria = relationship("Categoria", back_populates="productos")
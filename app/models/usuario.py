@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.tipoUsuario import TipoUsuario
@@ -18,8 +18,8 @@ class Usuario(Base):
     dni = Column(String(100), unique=True, index=True)
     contrasena = Column(String(200), nullable=False)
     estado = Column(String(1), default='A', nullable=False)  # 'A' = Activo, 'I' = Inactivo
-    fecha_creacion = Column(String(25), nullable=False)
-    fecha_edicion = Column(String(25), nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
 
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, DateTime, DECIMAL, ForeignKey, String
+from sqlalchemy import Column, Integer, DateTime, DECIMAL, ForeignKey, String, Index
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, indices_cursor
 
 # Importar los modelos relacionados para que SQLAlchemy los encuentre
 from app.models.cliente import Cliente
@@ -18,12 +18,22 @@ class Venta(Base):
     totalsindescuento = Column(DECIMAL(10, 2), nullable=True)
     id_usuario = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     estado = Column(String(15), default="CONFIRMADA", nullable=False)
-    fecha_creacion = Column(String(25), nullable=False)
-    fecha_edicion = Column(String(25), nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False)
+    fecha_edicion = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     updated_by = Column(Integer, ForeignKey("usuario.id"), nullable=True)
     cliente_nombre = Column(String(100), nullable=True)
     cliente_dni = Column(String(20), nullable=True)
+
+    __table_args__ = (
+        # Rango de fechas y paginación por cursor (fecha DESC NULLS LAST, id DESC)
+        *indices_cursor("ix_ventas_fecha_id", fecha, id),
+        # Listados por cliente / usuario: por offset (ordenados por id) y por cursor
+        Index("ix_ventas_id_cliente_id", "id_cliente", "id"),
+        Index("ix_ventas_id_usuario_id", "id_usuario", "id"),
+        *indices_cursor("ix_ventas_id_cliente_fecha_id", fecha, id, id_cliente),
+        *indices_cursor("ix_ventas_id_usuario_fecha_id", fecha, id, id_usuario),
+    )
     
     # Relaciones
     cliente = relationship("Cliente")
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, Date, DECIMAL
+from app.database import Base
+
+# Resúmenes diarios de ventas, mantenidos en la misma transacción que la venta
+# (ver app/services/resumen_ventas.py). Solo cuentan ventas no anuladas.
+# Los ids nulos (venta sin cliente o sin usuario) se guardan como 0.
+
+
+class VentaDiariaProducto(Base):
+    __tablename__ = "ventas_diarias_producto"
+
+    fecha = Column(Date, primary_key=True)
+    id_producto = Column(Integer, primary_key=True)
+    ventas = Column(Integer, nullable=False, default=0)  # Tickets que incluyen el producto
+    unidades = Column(Integer, nullable=False, default=0)  # Unidades base vendidas
+    importe = Column(DECIMAL(14, 2), nullable=False, default=0)  # Suma de subtotales de línea
+
+
+class VentaDiariaUsuario(Base):
+    __tablename__ = "ventas_diarias_usuario"
+
+    fecha = Column(Date, primary_key=True)
+    id_usuario = Column(Integer, primary_key=True)
+    ventas = Column(Integer, nullable=False, default=0)
+    total = Column(DECIMAL(14, 2), nullable=False, default=0)  # totalcondescuento
+    descuento = Column(DECIMAL(14, 2), nullable=False, default=0)
+
+
+class VentaDiariaCliente(Base):
+    __tablename__ = "ventas_diarias_cliente"
+
+    fecha = Column(Date, primary_key=True)
+    id_cliente = Column(Integer, primary_key=True)
+    ventas = Column(Integer, nullable=False, default=0)
+    total = Column(DECIMAL(14, 2), nullable=False, default=0)
+    descuento = Column(DECIMAL(14, 2), nullable=False, default=0)
@@ -0,0 +1,113 @@
+"""
+Router de alertas de stock: consulta y stream SSE.
+
+El stream reemplaza el sondeo de /api/v1/productos: cada alerta se envía como
+un evento `alerta_stock` con su id, así el cliente (EventSource) reanuda
+desde la última recibida con la cabecera Last-Event-ID al reconectarse.
+"""
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.crud import alertas as crud_alertas
+from app.database import SessionLocal, get_db
+from app.deps import get_current_user, get_current_user_stream
+from app.schemas.alertas import AlertaStockResponse
+from app.services.alertas_stock import canal_alertas
+
+settings = get_settings()
+
+router = APIRouter(prefix="/api/v1/alertas", tags=["alertas"])
+
+LOTE_STREAM = 500
+# Las alertas se insertan dentro de la transacción que mueve el stock, así que
+# un id menor puede confirmarse después de otro mayor ya enviado: cada lectura
+# repasa las últimas MARGEN_IDS_STREAM ids y descarta las ya enviadas.
+MARGEN_IDS_STREAM = 100
+
+
+@router.get("", response_model=List[AlertaStockResponse])
+def listar_alertas(
+    desde_id: Optional[int] = Query(None, description="Solo alertas posteriores a este id (orden ascendente)"),
+    id_producto: Optional[int] = Query(None),
+    tipo: Optional[str] = Query(None, description="SIN_STOCK, BAJO_MINIMO, SOBRE_MAXIMO o NORMALIZADO"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Alertas de stock, de la más reciente a la más antigua."""
+    return crud_alertas.get_alertas(db, desde_id=desde_id, id_producto=id_producto, tipo=tipo, limit=limit)
+
+
+def _leer_alertas(desde_id: int) -> List[dict]:
+    db = SessionLocal()
+    try:
+        return [
+            AlertaStockResponse.model_validate(alerta).model_dump(mode="json")
+            for alerta in crud_alertas.get_alertas(db, desde_id=desde_id, limit=LOTE_STREAM)
+        ]
+    finally:
+        db.close()
+
+
+def _ultimo_id() -> int:
+    db = SessionLocal()
+    try:
+        return crud_alertas.ultimo_id(db)
+    finally:
+        db.close()
+
+
+async def _eventos(request: Request, ultimo: int):
+    # Lo anterior al inicio del stream (o al Last-Event-ID) se considera entregado
+    inicio = ultimo
+    enviados = set()
+    with canal_alertas.suscribir() as aviso:
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            # Limpiar antes de leer: un aviso que llegue durante la lectura no se pierde
+            aviso.clear()
+            alertas = await run_in_threadpool(_leer_alertas, max(ultimo - MARGEN_IDS_STREAM, inicio))
+            for alerta in alertas:
+                if alerta["id"] in enviados:
+                    continue
+                enviados.add(alerta["id"])
+                ultimo = max(ultimo, alerta["id"])
+                # El id del evento es el mayor enviado: es desde donde se reanuda al reconectar
+                yield f"id: {ultimo}\nevent: alerta_stock\ndata: {json.dumps(alerta)}\n\n"
+            enviados = {id_alerta for id_alerta in enviados if id_alerta > ultimo - MARGEN_IDS_STREAM}
+            if len(alertas) == LOTE_STREAM:
+                continue
+            try:
+                await asyncio.wait_for(aviso.wait(), timeout=settings.SSE_INTERVALO_SONDEO_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+
+
+@router.get("/stream")
+async def stream_alertas(
+    request: Request,
+    desde_id: Optional[int] = Query(None, description="Reenviar las alertas posteriores a este id"),
+    last_event_id: Optional[str] = Header(None),
+    current_user = Depends(get_current_user_stream)
+):
+    """
+    Stream SSE (text/event-stream) de alertas de stock. Sin `desde_id` ni
+    Last-Event-ID empieza por las alertas nuevas. El token puede ir en la
+    cabecera Authorization o en ?token= (EventSource).
+    """
+    if last_event_id and last_event_id.isdigit():
+        desde_id = int(last_event_id)
+    if desde_id is None:
+        desde_id = await run_in_threadpool(_ultimo_id)
+    return StreamingResponse(
+        _eventos(request, desde_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
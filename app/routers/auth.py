@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.auth import crear_token
+from app.auth import crear_token, claims_de_usuario
 from app.crud.usuario import obtener_usuario_db
 from app.utils import verify_password
 from app.schemas.token import TokenResponse
@@ -31,7 +31,7 @@ def login(
     if not usuario or not verify_password(form_data.password, usuario.contrasena):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
     
-    access_token = crear_token({"sub": usuario.dni  })
+    access_token = crear_token({"sub": usuario.dni, **claims_de_usuario(usuario)})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from app.database import get_db
+from app.database import get_db, get_db_lectura
+from app.crud import paginacion
 from app.schemas.compra import (
     CompraCreate,
     CompraUpdate,
@@ -13,6 +15,8 @@ from app.schemas.compra import (
 )
 from app.crud import compra as crud_compra
 from app.deps import get_current_user
+from app.services import exportacion
+from app.services.idempotencia import ClaveReutilizadaError
 from app.schemas.usuario import UsuarioResponse
 
 router = APIRouter(prefix="/api/v1/compras", tags=["compras"])
@@ -22,11 +26,14 @@ router = APIRouter(prefix="/api/v1/compras", tags=["compras"])
 def listar_compras(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: Session = Depends(get_db_lectura),
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
     """Listar todas las compras"""
-    compras = crud_compra.get_compras(db, skip=skip, limit=limit)
+    compras = crud_compra.get_compras(db, skip=skip, limit=limit, cursor=cursor)
+    paginacion.agregar_cursor_siguiente(response, compras, limit, cursor, "fecha_compra")
     return compras
 
 
@@ -36,16 +43,44 @@ def listar_compras_por_fecha(
     fecha_fin: datetime,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: Session = Depends(get_db_lectura),
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
     """Listar compras por rango de fechas (filtro por fecha_compra)"""
     compras = crud_compra.get_compras_by_fecha(
-        db, fecha_inicio, fecha_fin, skip=skip, limit=limit
+        db, fecha_inicio, fecha_fin, skip=skip, limit=limit, cursor=cursor
     )
+    paginacion.agregar_cursor_siguiente(response, compras, limit, cursor, "fecha_compra")
     return compras
 
 
+@router.get("/exportar")
+def exportar_compras(
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+    formato: str = Query(exportacion.FORMATO_CSV, pattern="^(csv|xlsx)$"),
+    current_user: UsuarioResponse = Depends(get_current_user),
+):
+    """
+    Exportar las compras del rango (por fecha_compra) en CSV o XLSX, una fila por línea de detalle.
+    Se envía a medida que se lee de la base, sin paginar.
+    """
+    if formato == exportacion.FORMATO_XLSX and not exportacion.xlsx_disponible():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La exportación XLSX requiere openpyxl instalado en el servidor"
+        )
+    consulta = exportacion.consulta_compras(fecha_inicio, fecha_fin)
+    nombre = f"compras_{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}.{formato}"
+    return StreamingResponse(
+        exportacion.generar(consulta, formato, hoja="compras"),
+        media_type=exportacion.TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
+
+
 @router.get("/{compra_id}", response_model=CompraResponse)
 def obtener_compra(
     compra_id: int,
@@ -67,13 +102,16 @@ def listar_compras_por_proveedor(
     proveedor_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: Session = Depends(get_db_lectura),
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
     """Listar compras de un proveedor específico"""
     compras = crud_compra.get_compras_by_proveedor(
-        db, proveedor_id, skip=skip, limit=limit
+        db, proveedor_id, skip=skip, limit=limit, cursor=cursor
     )
+    paginacion.agregar_cursor_siguiente(response, compras, limit, cursor, "fecha_compra")
     return compras
 
 
@@ -82,22 +120,33 @@ def listar_compras_por_usuario(
     usuario_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: Session = Depends(get_db_lectura),
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
     """Listar compras realizadas por un usuario"""
-    compras = crud_compra.get_compras_by_usuario(db, usuario_id, skip=skip, limit=limit)
+    compras = crud_compra.get_compras_by_usuario(db, usuario_id, skip=skip, limit=limit, cursor=cursor)
+    paginacion.agregar_cursor_siguiente(response, compras, limit, cursor, "fecha_compra")
     return compras
 
 
 @router.post("", response_model=CompraResponse, status_code=status.HTTP_201_CREATED)
 def crear_compra(
     compra: CompraCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
     db: Session = Depends(get_db),
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
 
-    nueva_compra = crud_compra.crear_compra(db, compra, current_user_id=current_user.id)
+    try:
+        nueva_compra = crud_compra.crear_compra(
+            db, compra, current_user_id=current_user.id, clave_idempotencia=idempotency_key
+        )
+    except ClaveReutilizadaError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return nueva_compra
 
 
@@ -109,9 +158,12 @@ def actualizar_compra(
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
 
-    compra_actualizada = crud_compra.actualizar_compra(
-        db, compra_id, compra, current_user_id=current_user.id
-    )
+    try:
+        compra_actualizada = crud_compra.actualizar_compra(
+            db, compra_id, compra, current_user_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not compra_actualizada:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -127,7 +179,7 @@ def anular_compra(
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
 
-    compra_anulada = crud_compra.anular_compra(db, compra_id)
+    compra_anulada = crud_compra.anular_compra(db, compra_id, current_user_id=current_user.id)
     if not compra_anulada:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,7 +195,7 @@ def eliminar_compra(
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
 
-    eliminada = crud_compra.eliminar_compra(db, compra_id)
+    eliminada = crud_compra.eliminar_compra(db, compra_id, current_user_id=current_user.id)
     if not eliminada:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -184,7 +236,7 @@ def crear_detalle_compra(
             detail=f"Compra con ID {compra_id} no encontrada",
         )
 
-    nuevo_detalle = crud_compra.crear_detalle_compra(db, detalle, compra_id)
+    nuevo_detalle = crud_compra.crear_detalle_compra(db, detalle, compra_id, current_user_id=current_user.id)
     return nuevo_detalle
 
 
@@ -212,7 +264,7 @@ def actualizar_detalle_compra(
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
 
-    detalle_actualizado = crud_compra.actualizar_detalle_compra(db, detalle_id, detalle)
+    detalle_actualizado = crud_compra.actualizar_detalle_compra(db, detalle_id, detalle, current_user_id=current_user.id)
     if not detalle_actualizado:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -228,7 +280,7 @@ def eliminar_detalle_compra(
     current_user: UsuarioResponse = Depends(get_current_user),
 ):
 
-    eliminado = crud_compra.eliminar_detalle_compra(db, detalle_id)
+    eliminado = crud_compra.eliminar_detalle_compra(db, detalle_id, current_user_id=current_user.id)
     if not eliminado:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,98 @@
+"""Router del kardex: movimientos de stock y stock a una fecha."""
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from app.database import get_db, get_db_lectura, limite_reportes
+from app.crud import kardex as crud_kardex
+from app.crud import paginacion
+from app.deps import get_current_user, require_admin
+from app.schemas.kardex import (
+    MovimientoStockResponse,
+    StockAFechaResponse,
+    ConciliacionRequest,
+    ConciliacionResponse,
+)
+from app.services import conciliacion_stock
+
+router = APIRouter(prefix="/api/v1/kardex", tags=["kardex"])
+
+
+@router.get("/productos/{id_producto}/movimientos", response_model=List[MovimientoStockResponse])
+def listar_movimientos_producto(
+    id_producto: int,
+    desde: Optional[datetime] = Query(None),
+    hasta: Optional[datetime] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(get_current_user)
+):
+    """Movimientos de stock de un producto, del más reciente al más antiguo."""
+    movimientos = crud_kardex.get_movimientos_producto(
+        db, id_producto, desde=desde, hasta=hasta, limit=limit, cursor=cursor or ""
+    )
+    paginacion.agregar_cursor_siguiente(response, movimientos, limit, cursor or "", "fecha")
+    return movimientos
+
+
+@router.get("/origen/{origen}/{id_origen}", response_model=List[MovimientoStockResponse])
+def listar_movimientos_origen(
+    origen: str,
+    id_origen: int,
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(get_current_user)
+):
+    """Movimientos generados por un documento (origen: venta, compra o producto)."""
+    return crud_kardex.get_movimientos_origen(db, origen, id_origen)
+
+
+@router.get("/stock", response_model=List[StockAFechaResponse], dependencies=[Depends(limite_reportes)])
+def obtener_stock_a_fecha(
+    fecha: datetime = Query(..., description="Fecha y hora de corte"),
+    id_producto: Optional[int] = Query(None),
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(get_current_user)
+):
+    """Stock de los productos (o de uno) a una fecha pasada."""
+    return crud_kardex.get_stock_a_fecha(db, fecha, id_producto=id_producto)
+
+
+@router.post("/snapshots")
+def crear_snapshot(
+    db: Session = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """Toma la foto de stock ahora (normalmente la toma el job app.jobs.snapshot_stock)."""
+    return {"productos": crud_kardex.tomar_snapshot(db)}
+
+
+@router.get("/conciliacion", response_model=ConciliacionResponse, dependencies=[Depends(limite_reportes)])
+def reportar_conciliacion(
+    hasta: Optional[datetime] = Query(None, description="Reconstruir a una fecha pasada (contra el kardex)"),
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(require_admin)
+):
+    """Productos cuyo stock no coincide con lo que implican ventas, compras y ajustes."""
+    if hasta is None:
+        return conciliacion_stock.conciliar(db)
+    diferencias = conciliacion_stock.diferencias_a_fecha(db, hasta)
+    return {
+        "fecha": hasta,
+        "productos_con_diferencia": len(diferencias),
+        "unidades_de_diferencia": sum(abs(d["diferencia"]) for d in diferencias),
+        "corregidos": 0,
+        "diferencias": diferencias,
+    }
+
+
+@router.post("/conciliacion/corregir", response_model=ConciliacionResponse)
+def corregir_conciliacion(
+    datos: ConciliacionRequest = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """Lleva stock_actual al valor esperado; cada corrección queda en el kardex como CONCILIACION."""
+    ids = datos.ids_producto if datos else None
+    return conciliacion_stock.conciliar(db, corregir=True, ids_producto=ids, id_usuario=current_user.id)
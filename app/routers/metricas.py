@@ -0,0 +1,45 @@
+"""Router con métricas internas de la aplicación (solo admin)."""
+from fastapi import APIRouter, Depends
+from app import database
+from app.deps import require_admin
+from app.services import cache
+from app.services.stock_service import metricas_bloqueo
+
+router = APIRouter(prefix="/api/v1/metricas", tags=["métricas"])
+
+
+@router.get("/stock")
+def obtener_metricas_stock(
+    top: int = 10,
+    current_user = Depends(require_admin)
+):
+    """Tiempo de espera de bloqueos sobre productos y reintentos por deadlock (por proceso)."""
+    return metricas_bloqueo.resumen(top=top)
+
+
+@router.get("/cache")
+def obtener_metricas_cache(
+    current_user = Depends(require_admin)
+):
+    """Aciertos, fallos y tamaño de las cachés en memoria (por proceso)."""
+    return cache.estadisticas()
+
+
+@router.get("/pool")
+def obtener_metricas_pool(
+    current_user = Depends(require_admin)
+):
+    """
+    Conexiones en uso, libres y overflow de los pools sync y async (y de la
+    réplica, si está configurada) y tiempo de espera por una conexión (por proceso).
+    """
+    motores = {
+        "sync": database.engine,
+        "async": database.async_engine,
+        "replica_sync": database.engine_replica,
+        "replica_async": database.async_engine_replica,
+    }
+    return {
+        nombre: database.estado_pool(motor) if motor is not None else None
+        for nombre, motor in motores.items()
+    }
@@ -0,0 +1,55 @@
+"""Router de predicción de demanda por producto."""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db, get_db_lectura
+from app.crud import prediccion as crud_prediccion
+from app.deps import get_current_user, require_admin
+from app.schemas.prediccion import (
+    PrediccionDemandaResponse,
+    CalculoPrediccionRequest,
+    CalculoPrediccionResponse,
+)
+from app.services import prediccion_demanda
+
+router = APIRouter(prefix="/api/v1/prediccion", tags=["predicción"])
+
+
+@router.get("/productos", response_model=List[PrediccionDemandaResponse])
+def listar_predicciones(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    modelo: Optional[str] = Query(None, description="MEDIA_MOVIL, SUAVIZADO_EXPONENCIAL o ESTACIONAL_SEMANAL"),
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(get_current_user)
+):
+    """Pronósticos de demanda, de mayor a menor demanda diaria."""
+    return crud_prediccion.get_predicciones(db, skip=skip, limit=limit, modelo=modelo)
+
+
+@router.get("/productos/{id_producto}", response_model=PrediccionDemandaResponse)
+def obtener_prediccion_producto(
+    id_producto: int,
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(get_current_user)
+):
+    """Último pronóstico de demanda de un producto."""
+    prediccion = crud_prediccion.get_prediccion_producto(db, id_producto)
+    if not prediccion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay predicción para el producto {id_producto}"
+        )
+    return prediccion
+
+
+@router.post("/calcular", response_model=CalculoPrediccionResponse)
+def calcular_predicciones(
+    datos: CalculoPrediccionRequest = CalculoPrediccionRequest(),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """Recalcula los pronósticos de todo el catálogo (pensado para el job nocturno)."""
+    return prediccion_demanda.calcular_predicciones(
+        db, hasta=datos.hasta, dias_historia=datos.dias_historia, horizonte=datos.horizonte_dias
+    )
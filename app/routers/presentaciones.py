@@ -2,9 +2,10 @@
 Endpoints para gestión de presentaciones de productos.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_async_db_lectura, get_db
 from app.deps import get_current_user
 from app.schemas.presentacion import PresentacionCreate, PresentacionUpdate, PresentacionResponse
 from app.crud import presentacion as crud_presentacion
@@ -16,14 +17,14 @@ router = APIRouter(
 
 
 @router.get("", response_model=List[PresentacionResponse])
-def listar_presentaciones(
+async def listar_presentaciones(
     skip: int = 0,
     limit: int = 100,
     id_producto: Optional[int] = Query(None, description="Filtrar por producto"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_lectura)
 ):
     """Listar todas las presentaciones con filtros opcionales."""
-    presentaciones = crud_presentacion.get_presentaciones(
+    presentaciones = await crud_presentacion.get_presentaciones_async(
         db, 
         skip=skip, 
         limit=limit,
@@ -48,12 +49,12 @@ def obtener_presentacion(
 
 
 @router.get("/producto/{id_producto}", response_model=List[PresentacionResponse])
-def obtener_presentaciones_producto(
+async def obtener_presentaciones_producto(
     id_producto: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db_lectura)
 ):
     """Obtener todas las presentaciones de un producto específico."""
-    presentaciones = crud_presentacion.get_presentaciones_by_producto(db, id_producto)
+    presentaciones = await crud_presentacion.get_presentaciones_by_producto_async(db, id_producto)
     return presentaciones
 
 
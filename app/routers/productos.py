@@ -1,29 +1,71 @@
 """Router para operaciones de productos."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.deps import get_current_user, require_admin
+from app.database import get_async_db_lectura, get_db, get_db_lectura
+from app.deps import get_current_user, get_current_user_async, require_admin
 from app.crud.producto import (
     crear_producto_db,
-    obtener_productos_db,
+    obtener_productos_async,
+    contar_productos_async,
+    ESTADOS_STOCK,
+    ORDENES_PRODUCTO,
     obtener_producto_db,
-    obtener_producto_por_codigo_db,
+    obtener_producto_por_codigo_cacheado,
     actualizar_producto_db,
     eliminar_producto_db,
 )
-from app.schemas.producto import ProductoCreate, ProductoUpdate, ProductoResponse
+from app.schemas.producto import ProductoCreate, ProductoUpdate, ProductoResponse, ProductoBusquedaResponse
+from app.services import busqueda_productos
 
 router = APIRouter(prefix="/api/v1/productos", tags=["productos"])
 
 
 @router.get("", response_model=list[ProductoResponse])
-def listar_productos(
+async def listar_productos(
+    response: Response,
     incluir_inactivos: bool = Query(False, description="Incluir productos inactivos"),
-    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1, le=500, description="Tamaño de página; sin valor devuelve todo"),
+    id_categoria: int | None = Query(None, description="Filtrar por categoría"),
+    id_marca: int | None = Query(None, description="Filtrar por marca"),
+    id_tipo_producto: int | None = Query(None, description="Filtrar por tipo de producto"),
+    estado_stock: str | None = Query(None, pattern="^(" + "|".join(ESTADOS_STOCK) + ")$", description="agotado, bajo, normal o exceso"),
+    orden: str = Query("-id", pattern="^-?(" + "|".join(ORDENES_PRODUCTO) + ")$", description="Campo de orden; prefijo - para descendente"),
+    db: AsyncSession = Depends(get_async_db_lectura),
+    current_user = Depends(get_current_user_async)
+):
+    """
+    Obtiene la lista de productos activos (por defecto), con paginación, filtros y orden.
+    El total de productos que cumplen los filtros se devuelve en la cabecera X-Total-Count.
+    """
+    filtros = dict(
+        incluir_inactivos=incluir_inactivos,
+        id_categoria=id_categoria,
+        id_marca=id_marca,
+        id_tipo_producto=id_tipo_producto,
+        estado_stock=estado_stock,
+    )
+    productos = await obtener_productos_async(db, skip=skip, limit=limit, orden=orden, **filtros)
+
+    # Si la página no se llenó, el total se deduce sin otra consulta
+    if limit is None or (len(productos) < limit and (productos or skip == 0)):
+        total = skip + len(productos)
+    else:
+        total = await contar_productos_async(db, **filtros)
+    response.headers["X-Total-Count"] = str(total)
+    return productos
+
+
+@router.get("/buscar", response_model=list[ProductoBusquedaResponse])
+def buscar_productos(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto a buscar (código, nombre, adicional, marca o categoría)"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db_lectura),
     current_user = Depends(get_current_user)
 ):
-    """Obtiene la lista de productos activos (por defecto)."""
-    return obtener_productos_db(db, incluir_inactivos=incluir_inactivos)
+    """Búsqueda de productos activos ordenada por relevancia, pensada para autocompletado."""
+    return busqueda_productos.buscar_productos(db, q, limit=limit)
 
 
 @router.get("/codigo/{codigo}", response_model=ProductoResponse)
@@ -32,8 +74,8 @@ def obtener_producto_por_codigo(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Obtiene un producto por código."""
-    producto = obtener_producto_por_codigo_db(db, codigo)
+    """Obtiene un producto por código (con caché en memoria, para el escaneo en el POS)."""
+    producto = obtener_producto_por_codigo_cacheado(db, codigo)
     if not producto:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     return producto
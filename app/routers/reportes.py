@@ -0,0 +1,40 @@
+"""Router de reportes de ventas (leen los resúmenes diarios) y exportación analítica."""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_db, get_db_lectura, limite_reportes
+from app.crud import reportes as crud_reportes
+from app.deps import get_current_user, require_admin
+from app.schemas.reportes import DashboardResponse, ExportacionAnaliticaResponse
+from app.services import exportacion_analitica
+
+router = APIRouter(prefix="/api/v1/reportes", tags=["reportes"])
+
+
+@router.get("/dashboard", response_model=DashboardResponse, dependencies=[Depends(limite_reportes)])
+def obtener_dashboard(
+    top: int = Query(5, ge=1, le=50, description="Cantidad de productos en el ranking"),
+    dias_top: int = Query(1, ge=1, le=90, description="Días (hasta hoy) que abarca el ranking"),
+    db: Session = Depends(get_db_lectura),
+    current_user = Depends(get_current_user)
+):
+    """Ingresos, tickets y ticket promedio de hoy, productos más vendidos y productos con stock bajo."""
+    return crud_reportes.get_dashboard(db, top=top, dias_top=dias_top)
+
+
+@router.post("/analitica", response_model=ExportacionAnaliticaResponse)
+def exportar_analitica(
+    formato: str = Query(exportacion_analitica.FORMATO_PARQUET, pattern="^(parquet|arrow)$"),
+    completo: bool = Query(False, description="Reescribir todos los meses, no solo los modificados"),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """
+    Exportar ventas, compras y dimensiones de producto a archivos Parquet / Arrow
+    particionados por mes en ANALITICA_DIR (solo los meses con cambios desde la última vez).
+    """
+    if not exportacion_analitica.pyarrow_disponible():
+        raise HTTPException(status_code=400, detail="La exportación analítica requiere pyarrow instalado en el servidor")
+    try:
+        return exportacion_analitica.exportar(db, formato=formato, completo=completo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
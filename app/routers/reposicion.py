@@ -0,0 +1,34 @@
+"""Router de reposición: punto de reorden y compras sugeridas."""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.deps import get_current_user, require_admin
+from app.schemas.reposicion import (
+    SugerenciaReposicionResponse,
+    GenerarBorradoresRequest,
+    GenerarBorradoresResponse,
+)
+from app.services import reposicion
+
+router = APIRouter(prefix="/api/v1/reposicion", tags=["reposición"])
+
+
+@router.get("/sugerencias", response_model=List[SugerenciaReposicionResponse])
+def listar_sugerencias(
+    id_proveedor: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Productos en o bajo su punto de reorden y cantidad sugerida, agrupados por proveedor."""
+    return reposicion.calcular_sugerencias(db, ids_proveedor=id_proveedor)
+
+
+@router.post("/borradores", response_model=GenerarBorradoresResponse)
+def generar_borradores(
+    datos: GenerarBorradoresRequest = GenerarBorradoresRequest(),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """Crea una compra en estado BORRADOR por proveedor con las cantidades sugeridas."""
+    return reposicion.generar_borradores(db, id_usuario=current_user.id, ids_proveedor=datos.ids_proveedor)
@@ -1,29 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from app.database import get_db
-from app.schemas.venta import VentaCreate, VentaUpdate, VentaResponse
+from app.database import get_async_db_lectura, get_db
+from app.crud import paginacion
+from app.schemas.venta import VentaCreate, VentaUpdate, VentaResponse, VentaLoteRequest, VentaLoteResponse
+from app.config.settings import get_settings
 from app.crud import venta as crud_venta
-from app.deps import get_current_user
+from app.deps import get_current_user, get_current_user_async
+from app.services import exportacion
+from app.services.idempotencia import ClaveReutilizadaError
 from app.schemas.usuario import UsuarioResponse
 
+settings = get_settings()
+
 router = APIRouter(
     prefix="/api/v1/ventas",
     tags=["ventas"]
 )
 
 @router.get("", response_model=List[VentaResponse])
-def listar_ventas(
+async def listar_ventas(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    current_user: UsuarioResponse = Depends(get_current_user)
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db_lectura),
+    current_user: UsuarioResponse = Depends(get_current_user_async)
 ):
     """Listar todas las ventas con sus detalles"""
-    ventas = crud_venta.get_ventas(db, skip=skip, limit=limit)
+    ventas = await crud_venta.get_ventas_async(db, skip=skip, limit=limit, cursor=cursor)
+    paginacion.agregar_cursor_siguiente(response, ventas, limit, cursor, "fecha")
     return ventas
 
+@router.get("/exportar")
+def exportar_ventas(
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+    formato: str = Query(exportacion.FORMATO_CSV, pattern="^(csv|xlsx)$"),
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Exportar las ventas del rango (por fecha) en CSV o XLSX, una fila por línea de detalle.
+    Se envía a medida que se lee de la base, sin paginar.
+    """
+    if formato == exportacion.FORMATO_XLSX and not exportacion.xlsx_disponible():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La exportación XLSX requiere openpyxl instalado en el servidor"
+        )
+    consulta = exportacion.consulta_ventas(fecha_inicio, fecha_fin)
+    nombre = f"ventas_{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}.{formato}"
+    return StreamingResponse(
+        exportacion.generar(consulta, formato, hoja="ventas"),
+        media_type=exportacion.TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
+
 @router.get("/{venta_id}", response_model=VentaResponse)
 def obtener_venta(
     venta_id: int,
@@ -40,45 +75,55 @@ def obtener_venta(
     return venta
 
 @router.get("/cliente/{cliente_id}", response_model=List[VentaResponse])
-def listar_ventas_por_cliente(
+async def listar_ventas_por_cliente(
     cliente_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    current_user: UsuarioResponse = Depends(get_current_user)
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db_lectura),
+    current_user: UsuarioResponse = Depends(get_current_user_async)
 ):
     """Listar ventas de un cliente específico"""
-    ventas = crud_venta.get_ventas_by_cliente(db, cliente_id, skip=skip, limit=limit)
+    ventas = await crud_venta.get_ventas_by_cliente_async(db, cliente_id, skip=skip, limit=limit, cursor=cursor)
+    paginacion.agregar_cursor_siguiente(response, ventas, limit, cursor, "fecha")
     return ventas
 
 @router.get("/usuario/{usuario_id}", response_model=List[VentaResponse])
-def listar_ventas_por_usuario(
+async def listar_ventas_por_usuario(
     usuario_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    current_user: UsuarioResponse = Depends(get_current_user)
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db_lectura),
+    current_user: UsuarioResponse = Depends(get_current_user_async)
 ):
     """Listar ventas realizadas por un usuario"""
-    ventas = crud_venta.get_ventas_by_usuario(db, usuario_id, skip=skip, limit=limit)
+    ventas = await crud_venta.get_ventas_by_usuario_async(db, usuario_id, skip=skip, limit=limit, cursor=cursor)
+    paginacion.agregar_cursor_siguiente(response, ventas, limit, cursor, "fecha")
     return ventas
 
 @router.get("/fecha/rango", response_model=List[VentaResponse])
-def listar_ventas_por_fecha(
+async def listar_ventas_por_fecha(
     fecha_inicio: datetime,
     fecha_fin: datetime,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
-    current_user: UsuarioResponse = Depends(get_current_user)
+    cursor: Optional[str] = Depends(paginacion.parametro_cursor),
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db_lectura),
+    current_user: UsuarioResponse = Depends(get_current_user_async)
 ):
     """Listar ventas por rango de fechas"""
-    ventas = crud_venta.get_ventas_by_fecha(db, fecha_inicio, fecha_fin, skip=skip, limit=limit)
+    ventas = await crud_venta.get_ventas_by_fecha_async(db, fecha_inicio, fecha_fin, skip=skip, limit=limit, cursor=cursor)
+    paginacion.agregar_cursor_siguiente(response, ventas, limit, cursor, "fecha")
     return ventas
 
 @router.post("", response_model=VentaResponse, status_code=status.HTTP_201_CREATED)
 def crear_venta(
     venta: VentaCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=100),
     db: Session = Depends(get_db),
     current_user: UsuarioResponse = Depends(get_current_user)
 ):
@@ -86,10 +131,18 @@ def crear_venta(
     Crear una nueva venta con sus detalles
     - Calcula automáticamente los totales
     - Descuenta el stock según presentaciones vendidas
+    - Con la cabecera Idempotency-Key, repetir la petición devuelve la misma venta
     """
     try:
-        nueva_venta = crud_venta.crear_venta(db, venta, current_user_id=current_user.id)
+        nueva_venta = crud_venta.crear_venta(
+            db, venta, current_user_id=current_user.id, clave_idempotencia=idempotency_key
+        )
         return nueva_venta
+    except ClaveReutilizadaError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -101,6 +154,31 @@ def crear_venta(
             detail=f"Error al crear la venta: {str(e)}"
         )
 
+@router.post("/lote", response_model=VentaLoteResponse)
+def crear_ventas_lote(
+    lote: VentaLoteRequest,
+    db: Session = Depends(get_db),
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Registrar varios tickets de una vez (terminales POS que estuvieron sin conexión)
+    - Cada ticket lleva una clave_idempotencia: reenviar el lote no duplica ventas
+    - Los tickets sin stock o con presentaciones inexistentes se informan como ERROR
+      sin impedir que se creen los demás
+    """
+    if len(lote.ventas) > settings.VENTAS_LOTE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El lote no puede tener más de {settings.VENTAS_LOTE_MAX} ventas"
+        )
+    resultados = crud_venta.crear_ventas_lote(db, lote.ventas, current_user_id=current_user.id)
+    return {
+        "creadas": sum(r["estado"] == crud_venta.LOTE_CREADA for r in resultados),
+        "duplicadas": sum(r["estado"] == crud_venta.LOTE_DUPLICADA for r in resultados),
+        "con_error": sum(r["estado"] == crud_venta.LOTE_ERROR for r in resultados),
+        "resultados": resultados,
+    }
+
 @router.put("/{venta_id}", response_model=VentaResponse)
 def actualizar_venta(
     venta_id: int,
@@ -151,7 +229,7 @@ def anular_venta(
     # Permiso controlado desde el frontend
     
     try:
-        venta_anulada = crud_venta.anular_venta(db, venta_id)
+        venta_anulada = crud_venta.anular_venta(db, venta_id, current_user_id=current_user.id)
         if not venta_anulada:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
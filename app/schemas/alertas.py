@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class AlertaStockResponse(BaseModel):
+    id: int
+    id_producto: int
+    fecha: datetime
+    tipo: str  # SIN_STOCK, BAJO_MINIMO, SOBRE_MAXIMO, NORMALIZADO
+    stock_anterior: int
+    stock: int
+    stock_minimo: Optional[int] = None
+    stock_maximo: Optional[int] = None
+    origen: Optional[str] = None
+    id_origen: Optional[int] = None
+
+    model_config = {"from_attributes": True}
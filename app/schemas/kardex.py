@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class MovimientoStockResponse(BaseModel):
+    id: int
+    id_producto: int
+    fecha: datetime
+    tipo: str
+    cantidad: int
+    saldo: int
+    origen: Optional[str] = None
+    id_origen: Optional[int] = None
+    id_usuario: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
+
+class StockAFechaResponse(BaseModel):
+    id_producto: int
+    codigo: Optional[str] = None
+    nombre: Optional[str] = None
+    stock: Optional[int] = None
+    fecha: datetime
+    corte: Optional[datetime] = None  # Foto usada como punto de partida
+
+
+class DiferenciaStockResponse(BaseModel):
+    id_producto: int
+    codigo: Optional[str] = None
+    nombre: Optional[str] = None
+    stock_actual: int  # A la fecha consultada, si se indicó `hasta`
+    esperado: int
+    diferencia: int  # esperado - stock_actual
+    sin_base: bool = False  # Sin stock inicial en el kardex: no se corrige salvo pedido explícito
+
+
+class ConciliacionResponse(BaseModel):
+    fecha: datetime
+    productos_con_diferencia: int
+    unidades_de_diferencia: int
+    corregidos: int
+    diferencias: List[DiferenciaStockResponse]
+
+
+class ConciliacionRequest(BaseModel):
+    ids_producto: Optional[List[int]] = None  # Por defecto, todos los que tengan diferencia
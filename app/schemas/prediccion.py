@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import date, datetime
+
+
+class PrediccionDemandaResponse(BaseModel):
+    id_producto: int
+    fecha_calculo: datetime
+    fecha_inicio: date
+    horizonte_dias: int
+    modelo: str
+    alfa: Optional[float] = None
+    error_mae: float
+    demanda_diaria: float  # Unidades base por día
+    demanda_total: float
+    pronostico: List[float]  # Un valor por día desde fecha_inicio
+
+    model_config = {"from_attributes": True}
+
+
+class CalculoPrediccionRequest(BaseModel):
+    hasta: Optional[date] = None  # Último día de historia (por defecto ayer)
+    # Acotados: las matrices del cálculo son productos x días de historia y de horizonte
+    dias_historia: int = Field(730, ge=14, le=1825)
+    horizonte_dias: int = Field(28, ge=1, le=180)
+
+
+class CalculoPrediccionResponse(BaseModel):
+    fecha_calculo: datetime
+    productos: int
+    dias_historia: int
+    horizonte_dias: int
+    modelos: Dict[str, int]  # Productos que usan cada modelo
+    segundos_carga: float
+    segundos_ajuste: float
+    segundos_total: float
@@ -57,6 +57,18 @@ class PresentacionSimple(BaseModel):
         from_attributes = True
 
 
+class ProductoBusquedaResponse(BaseModel):
+    """Schema para resultados de búsqueda/autocompletado de productos."""
+    id: int
+    codigo: str
+    nombre: Optional[str] = None
+    adicional: Optional[str] = None
+    stock_actual: Optional[int] = None
+    marca: Optional[str] = None
+    categoria: Optional[str] = None
+    puntaje: float
+
+
 class ProductoResponse(ProductoBase):
     """Schema para respuesta de producto."""
     id: int
@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class ProductoTopResponse(BaseModel):
+    id_producto: int
+    codigo: Optional[str] = None
+    nombre: Optional[str] = None
+    unidades: int  # Unidades base
+    importe: Decimal
+    ventas: int  # Tickets que incluyen el producto
+
+
+class DashboardResponse(BaseModel):
+    fecha: date
+    generado: datetime  # Momento del cálculo (puede venir de la caché)
+    ingresos: Decimal
+    tickets: int
+    ticket_promedio: Decimal
+    descuentos: Decimal
+    top_productos: List[ProductoTopResponse]
+    productos_stock_bajo: int
+
+
+class ExportacionConjuntoResponse(BaseModel):
+    particiones: int  # Meses reescritos
+    filas: Dict[str, int]  # Filas escritas por tabla
+
+
+class ExportacionAnaliticaResponse(BaseModel):
+    destino: str
+    formato: str
+    conjuntos: Dict[str, ExportacionConjuntoResponse]  # ventas, compras
+    dimensiones: Dict[str, int]  # Filas por tabla de dimensión
+    segundos: float
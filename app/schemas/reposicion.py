@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from decimal import Decimal
+
+
+class SugerenciaReposicionResponse(BaseModel):
+    id_producto: int
+    codigo: Optional[str] = None
+    nombre: Optional[str] = None
+    id_proveedor: Optional[int] = None  # Proveedor de la última compra del producto
+    stock_actual: int
+    en_borrador: int  # Unidades ya pedidas en compras BORRADOR
+    demanda_diaria: float
+    plazo_entrega_dias: float
+    punto_reorden: int
+    objetivo: int
+    unidades: int  # Unidades base a pedir
+    id_presentacion: Optional[int] = None  # Menor precio_compra por unidad base
+    presentacion: Optional[str] = None
+    cantidad_base: Optional[int] = None
+    precio_compra: Optional[float] = None
+    cantidad: Optional[int] = None  # Presentaciones a pedir
+
+
+class GenerarBorradoresRequest(BaseModel):
+    ids_proveedor: Optional[List[int]] = None  # Por defecto, todos
+
+
+class BorradorCompraResponse(BaseModel):
+    id: int
+    id_proveedor: int
+    lineas: int
+    total: Decimal
+
+
+class GenerarBorradoresResponse(BaseModel):
+    compras: List[BorradorCompraResponse]
+    productos: int
+    omitidos: int  # Sugerencias sin proveedor conocido o sin presentación de compra
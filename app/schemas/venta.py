@@ -105,3 +105,27 @@ class VentaResponse(VentaBase):
     detalles: List[DetalleVentaResponse] = Field(default_factory=list)
     
     model_config = {"from_attributes": True}
+
+# ============ SCHEMAS PARA LOTES DE VENTAS (POS OFFLINE) ============
+
+class VentaLoteItem(VentaCreate):
+    """Venta de un lote, con la clave de idempotencia generada por el terminal"""
+    clave_idempotencia: str = Field(..., min_length=1, max_length=100)
+
+class VentaLoteRequest(BaseModel):
+    """Schema para enviar varios tickets en una sola petición"""
+    ventas: List[VentaLoteItem] = Field(..., min_length=1)
+
+class VentaLoteResultado(BaseModel):
+    """Resultado de un ticket del lote (mismo orden que la petición)"""
+    clave_idempotencia: str
+    estado: str  # CREADA, DUPLICADA (ya existía con esa clave) o ERROR
+    id_venta: Optional[int] = None
+    error: Optional[str] = None
+    faltantes: Optional[List[dict]] = None  # Stock insuficiente: producto, lineas, disponible, requerido
+
+class VentaLoteResponse(BaseModel):
+    creadas: int
+    duplicadas: int
+    con_error: int
+    resultados: List[VentaLoteResultado]
@@ -0,0 +1,147 @@
+"""
+Alertas de stock: cruces de stock_minimo / stock_maximo detectados al escribir.
+
+`registrar_cruces` se llama desde stock_service.registrar_movimientos, en la
+misma transacción que el cambio de stock, y guarda una AlertaStock por cada
+producto cuyo saldo pasó a otro nivel; el tipo de la alerta es el nivel nuevo:
+
+    SIN_STOCK     stock <= 0
+    BAJO_MINIMO   0 < stock <= stock_minimo
+    NORMALIZADO   stock_minimo < stock <= stock_maximo
+    SOBRE_MAXIMO  stock > stock_maximo
+
+Tras el commit se avisa a los suscriptores del stream SSE de este proceso
+(`canal_alertas`); los de otros workers las leen de la tabla en su próximo
+sondeo, así que el stream nunca depende solo del aviso en memoria.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.alertaStock import AlertaStock
+from app.models.producto import Producto
+
+ALERTA_SIN_STOCK = "SIN_STOCK"
+ALERTA_BAJO_MINIMO = "BAJO_MINIMO"
+ALERTA_SOBRE_MAXIMO = "SOBRE_MAXIMO"
+ALERTA_NORMALIZADO = "NORMALIZADO"
+TIPOS_ALERTA = (ALERTA_SIN_STOCK, ALERTA_BAJO_MINIMO, ALERTA_SOBRE_MAXIMO, ALERTA_NORMALIZADO)
+
+_CLAVE_SESION = "alertas_stock_nuevas"
+
+
+def _nivel(stock: int, minimo: Optional[int], maximo: Optional[int]) -> str:
+    if stock <= 0:
+        return ALERTA_SIN_STOCK
+    if minimo is not None and stock <= minimo:
+        return ALERTA_BAJO_MINIMO
+    if maximo is not None and stock > maximo:
+        return ALERTA_SOBRE_MAXIMO
+    return ALERTA_NORMALIZADO
+
+
+def clasificar_cruce(anterior: int, stock: int, minimo: Optional[int], maximo: Optional[int]) -> Optional[str]:
+    """Tipo de alerta si el cambio anterior -> stock cruzó un umbral; None si no."""
+    nivel_anterior = _nivel(anterior, minimo, maximo)
+    nivel = _nivel(stock, minimo, maximo)
+    return nivel if nivel != nivel_anterior else None
+
+
+def registrar_cruces(
+    db: Session,
+    movimientos: Dict[int, tuple],
+    fecha: datetime,
+    origen: Optional[str] = None,
+    id_origen: Optional[int] = None,
+) -> int:
+    """
+    Guarda las alertas de los productos que cruzaron un umbral.
+
+    Args:
+        movimientos: Dict id_producto -> (cantidad con signo, saldo resultante)
+
+    Returns:
+        Número de alertas registradas.
+    """
+    umbrales = db.execute(
+        select(Producto.id, Producto.stock_minimo, Producto.stock_maximo)
+        .where(Producto.id.in_(list(movimientos)))
+    ).all()
+    alertas = []
+    for id_producto, minimo, maximo in umbrales:
+        cantidad, saldo = movimientos[id_producto]
+        anterior = saldo - cantidad
+        tipo = clasificar_cruce(anterior, saldo, minimo, maximo)
+        if tipo:
+            alertas.append({
+                "id_producto": id_producto,
+                "fecha": fecha,
+                "tipo": tipo,
+                "stock_anterior": anterior,
+                "stock": saldo,
+                "stock_minimo": minimo,
+                "stock_maximo": maximo,
+                "origen": origen,
+                "id_origen": id_origen,
+            })
+    if alertas:
+        db.execute(insert(AlertaStock), sorted(alertas, key=lambda a: a["id_producto"]))
+        db.info[_CLAVE_SESION] = True
+    return len(alertas)
+
+
+class CanalAlertas:
+    """
+    Aviso en memoria a los streams SSE de este proceso. `notificar` puede
+    llamarse desde cualquier hilo (los endpoints sync corren en un threadpool);
+    cada suscriptor espera en un asyncio.Event de su propio event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores = set()
+
+    @contextmanager
+    def suscribir(self):
+        evento = asyncio.Event()
+        suscriptor = (asyncio.get_running_loop(), evento)
+        with self._lock:
+            self._suscriptores.add(suscriptor)
+        try:
+            yield evento
+        finally:
+            with self._lock:
+                self._suscriptores.discard(suscriptor)
+
+    def notificar(self) -> None:
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for loop, evento in suscriptores:
+            try:
+                loop.call_soon_threadsafe(evento.set)
+            except RuntimeError:
+                pass  # Event loop cerrado
+
+    @property
+    def suscriptores(self) -> int:
+        return len(self._suscriptores)
+
+
+canal_alertas = CanalAlertas()
+
+
+@event.listens_for(Session, "after_commit")
+def _notificar_alertas(db: Session):
+    if db.info.pop(_CLAVE_SESION, None):
+        canal_alertas.notificar()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_alertas(db: Session, transaccion):
+    if transaccion.parent is None:
+        db.info.pop(_CLAVE_SESION, None)
@@ -0,0 +1,289 @@
+"""
+Búsqueda de productos con autocompletado por prefijo.
+
+En PostgreSQL la búsqueda se resuelve en la base con pg_trgm (similitud y
+ILIKE indexados) y un tsvector con prefijos (`palabra:*`); los índices los
+crea la revisión 0002 de migrations/. Las consultas de menos de
+LARGO_MINIMO_TRIGRAMAS caracteres solo buscan por prefijo de código y nombre.
+En otros motores (SQLite en pruebas locales) se usa un índice en memoria de
+tokens ordenados, reconstruido cuando cambia el catálogo o vence su TTL.
+"""
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, literal, literal_column, or_, select, text, union
+from sqlalchemy.orm import Session
+
+from app.models.categoria import Categoria
+from app.models.marca import Marca
+from app.models.producto import Producto
+
+TTL_INDICE_SEGUNDOS = 300
+# pg_trgm no extrae trigramas útiles de 1-2 caracteres: esas consultas van por prefijo
+LARGO_MINIMO_TRIGRAMAS = 3
+# Candidatos por prefijo (código y nombre, cada uno) que se puntúan en consultas cortas
+CANDIDATOS_PREFIJO = 200
+EXPRESION_DOCUMENTO = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(producto.nombre, '') || ' ' || coalesce(producto.adicional, ''))"
+)
+# Índices de la revisión 0002, fuera de los modelos (ver migrations/env.py)
+INDICES_BUSQUEDA = (
+    "ix_producto_codigo_trgm", "ix_producto_nombre_trgm", "ix_producto_documento",
+    "ix_producto_codigo_prefijo", "ix_producto_nombre_prefijo",
+    "ix_producto_id_marca", "ix_producto_id_categoria",
+    "ix_marca_nombre_trgm", "ix_categoria_nombre_trgm",
+)
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin tildes, para comparar de forma tolerante."""
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    return re.findall(r"[a-z0-9]+", normalizar(texto))
+
+
+class IndiceProductos:
+    """
+    Índice invertido en memoria para motores sin pg_trgm.
+
+    Guarda una lista ordenada de (token, id_producto): la búsqueda por prefijo
+    es un bisect sobre la lista, y para consultas de varias palabras se parte
+    del token más selectivo y se filtran los candidatos con el resto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: List[tuple] = []
+        self._productos: Dict[int, dict] = {}
+        self._construido_en: Optional[float] = None
+
+    def invalidar(self):
+        with self._lock:
+            self._construido_en = None
+
+    def _vigente(self) -> bool:
+        return (
+            self._construido_en is not None
+            and time.monotonic() - self._construido_en < TTL_INDICE_SEGUNDOS
+        )
+
+    def _construir(self, db: Session):
+        filas = db.execute(
+            select(
+                Producto.id,
+                Producto.codigo,
+                Producto.nombre,
+                Producto.adicional,
+                Producto.stock_actual,
+                Marca.nombre.label("marca"),
+                Categoria.nombre.label("categoria"),
+            )
+            .outerjoin(Marca, Marca.id == Producto.id_marca)
+            .outerjoin(Categoria, Categoria.id == Producto.id_categoria)
+            .where(Producto.estado == "A")
+        ).all()
+
+        tokens = []
+        productos = {}
+        for fila in filas:
+            producto = dict(fila._mapping)
+            producto["_codigo"] = normalizar(fila.codigo)
+            producto["_nombre"] = normalizar(fila.nombre)
+            producto["_tokens"] = set()
+            for campo in ("codigo", "nombre", "adicional", "marca", "categoria"):
+                producto["_tokens"].update(tokenizar(getattr(fila, campo)))
+            productos[fila.id] = producto
+            tokens.extend((token, fila.id) for token in producto["_tokens"])
+        tokens.sort()
+
+        self._tokens = tokens
+        self._productos = productos
+        self._construido_en = time.monotonic()
+
+    def _con_prefijo(self, prefijo: str) -> tuple:
+        inicio = bisect.bisect_left(self._tokens, (prefijo,))
+        fin = bisect.bisect_left(self._tokens, (prefijo + "￿",))
+        return inicio, fin
+
+    def buscar(self, db: Session, q: str, limit: int) -> List[dict]:
+        with self._lock:
+            if not self._vigente():
+                self._construir(db)
+            tokens_consulta = tokenizar(q)
+            if not tokens_consulta:
+                return []
+
+            # Partir del token más selectivo (rango más corto en la lista)
+            rangos = {token: self._con_prefijo(token) for token in tokens_consulta}
+            mas_selectivo = min(rangos, key=lambda t: rangos[t][1] - rangos[t][0])
+            inicio, fin = rangos[mas_selectivo]
+            candidatos = {id_producto for _, id_producto in self._tokens[inicio:fin]}
+
+            consulta = normalizar(q).strip()
+            resultados = []
+            for id_producto in candidatos:
+                producto = self._productos[id_producto]
+                puntaje = 0.0
+                for token in tokens_consulta:
+                    coincidencias = [t for t in producto["_tokens"] if t.startswith(token)]
+                    if not coincidencias:
+                        break
+                    puntaje += 1.0 + (1.0 if token in coincidencias else 0.0)
+                else:
+                    if producto["_codigo"] == consulta:
+                        puntaje += 10.0
+                    elif producto["_codigo"].startswith(consulta):
+                        puntaje += 5.0
+                    if producto["_nombre"].startswith(consulta):
+                        puntaje += 3.0
+                    resultados.append((puntaje, producto))
+
+            resultados.sort(key=lambda r: (-r[0], len(r[1]["_nombre"]), r[1]["id"]))
+            return [
+                {**{k: v for k, v in producto.items() if not k.startswith("_")}, "puntaje": puntaje}
+                for puntaje, producto in resultados[:limit]
+            ]
+
+
+# Instancia global del índice en memoria
+indice_productos = IndiceProductos()
+
+
+def _buscar_postgres(db: Session, q: str, limit: int) -> List[dict]:
+    """Búsqueda con pg_trgm + tsvector; usa los índices GIN de la migración."""
+    consulta = q.strip()
+    prefijo = _escapar_like(consulta) + "%"
+    contiene = "%" + prefijo
+
+    palabras = re.findall(r"\w+", consulta.lower())
+    tsquery = func.to_tsquery("simple", " & ".join(p + ":*" for p in palabras)) if palabras else None
+    # Debe coincidir literalmente con la expresión del índice ix_producto_documento
+    documento = literal_column(EXPRESION_DOCUMENTO)
+
+    condiciones = [
+        Producto.codigo.ilike(prefijo),
+        Producto.nombre.ilike(contiene),
+        Producto.nombre.op("%")(consulta),
+        Producto.id_marca.in_(select(Marca.id).where(Marca.nombre.ilike(contiene))),
+        Producto.id_categoria.in_(select(Categoria.id).where(Categoria.nombre.ilike(contiene))),
+    ]
+    rango_texto = literal(0.0)
+    if tsquery is not None:
+        condiciones.append(documento.op("@@")(tsquery))
+        rango_texto = func.ts_rank(documento, tsquery)
+
+    puntaje = (
+        case((func.lower(Producto.codigo) == consulta.lower(), 10.0), else_=0.0)
+        + case((Producto.codigo.ilike(prefijo), 5.0), else_=0.0)
+        + case((Producto.nombre.ilike(prefijo), 3.0), else_=0.0)
+        + func.word_similarity(consulta, Producto.nombre) * 2
+        + rango_texto
+    ).label("puntaje")
+
+    filas = db.execute(
+        _seleccionar_resultados(puntaje)
+        .where(Producto.estado == "A", or_(*condiciones))
+        .order_by(puntaje.desc(), func.length(Producto.nombre), Producto.id)
+        .limit(limit)
+    ).all()
+    return [dict(fila._mapping) for fila in filas]
+
+
+def _buscar_postgres_prefijo(db: Session, q: str, limit: int) -> List[dict]:
+    """
+    Consultas cortas: solo prefijo de código o nombre, con los índices
+    lower(...) text_pattern_ops. Cada rama corta en CANDIDATOS_PREFIJO filas
+    (recorrido ordenado del índice) antes de calcular el puntaje.
+    """
+    consulta = q.strip().lower()
+    prefijo = _escapar_like(consulta) + "%"
+    codigo, nombre = func.lower(Producto.codigo), func.lower(Producto.nombre)
+
+    candidatos = union(
+        select(Producto.id).where(Producto.estado == "A", codigo.like(prefijo))
+        .order_by(_orden_patron(codigo)).limit(CANDIDATOS_PREFIJO),
+        select(Producto.id).where(Producto.estado == "A", nombre.like(prefijo))
+        .order_by(_orden_patron(nombre)).limit(CANDIDATOS_PREFIJO),
+    ).subquery()
+
+    puntaje = (
+        case((codigo == consulta, 10.0), else_=0.0)
+        + case((codigo.like(prefijo), 5.0), else_=0.0)
+        + case((nombre.like(prefijo), 3.0), else_=0.0)
+    ).label("puntaje")
+
+    filas = db.execute(
+        _seleccionar_resultados(puntaje)
+        .join(candidatos, candidatos.c.id == Producto.id)
+        .order_by(puntaje.desc(), func.length(Producto.nombre), Producto.id)
+        .limit(limit)
+    ).all()
+    return [dict(fila._mapping) for fila in filas]
+
+
+def _orden_patron(expresion):
+    """ORDER BY en el orden de text_pattern_ops (USING ~<~), el que el índice recorre sin ordenar."""
+    return expresion.op("USING")(literal_column("~<~"))
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _seleccionar_resultados(puntaje):
+    """Columnas de ProductoBusquedaResponse con marca y categoría."""
+    return (
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.adicional,
+            Producto.stock_actual,
+            Marca.nombre.label("marca"),
+            Categoria.nombre.label("categoria"),
+            puntaje,
+        )
+        .outerjoin(Marca, Marca.id == Producto.id_marca)
+        .outerjoin(Categoria, Categoria.id == Producto.id_categoria)
+    )
+
+
+_pg_trgm_disponible: Optional[bool] = None
+
+
+def _usar_postgres(db: Session) -> bool:
+    """Usa la búsqueda en base solo si es PostgreSQL y tiene pg_trgm instalado."""
+    global _pg_trgm_disponible
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    if _pg_trgm_disponible is None:
+        _pg_trgm_disponible = db.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+    return _pg_trgm_disponible
+
+
+def buscar_productos(db: Session, q: str, limit: int = 10) -> List[dict]:
+    """Devuelve los `limit` productos activos más relevantes para `q`."""
+    if not q or not q.strip():
+        return []
+    if _usar_postgres(db):
+        if len(q.strip()) < LARGO_MINIMO_TRIGRAMAS:
+            return _buscar_postgres_prefijo(db, q, limit)
+        return _buscar_postgres(db, q, limit)
+    return indice_productos.buscar(db, q, limit)
+
+
+def invalidar_indice():
+    """Marca el índice en memoria como obsoleto (se reconstruye en la siguiente búsqueda)."""
+    indice_productos.invalidar()
@@ -0,0 +1,241 @@
+"""
+Caché en memoria del proceso (LRU con TTL) para lecturas calientes.
+
+Cada worker tiene su propia copia: la invalidación explícita solo alcanza al
+proceso que hizo el cambio y el TTL acota cuánto puede quedar desactualizado
+el resto. Por eso los TTL son cortos.
+
+Las invalidaciones que dependen de una transacción se marcan en la sesión con
+`invalidar_al_confirmar` y se aplican en el after_commit; si la transacción
+hace rollback se descartan.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+
+class CacheTTL:
+    """
+    Caché LRU acotada con expiración por entrada y contadores de aciertos.
+
+    Con `agrupar` (valor -> grupo) se mantiene un índice inverso grupo -> claves
+    y `invalidar_grupos` quita las entradas de un grupo sin recorrer la caché
+    (p. ej. los productos por código se invalidan por id de producto).
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        max_entradas: int,
+        ttl_segundos: float,
+        agrupar: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._agrupar = agrupar
+        self._lock = threading.Lock()
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._claves_por_grupo: Dict[Hashable, Set[Hashable]] = {}
+        self._version = 0
+        self._cargando: Dict[Hashable, threading.Lock] = {}
+        self.aciertos = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+        self.esperas = 0
+
+    @property
+    def version(self) -> int:
+        """Cambia con cada invalidación; ver `guardar`."""
+        return self._version
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            expira, valor = entrada
+            if expira < time.monotonic():
+                self._quitar(clave)
+                self.expirados += 1
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, version: Optional[int] = None) -> None:
+        """
+        Guarda un valor. Si se indica `version` (leída antes de ir a la base) y
+        hubo una invalidación entre medio, no se guarda: el valor podría ser
+        anterior al cambio que la provocó.
+        """
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._quitar(clave)
+            self._datos[clave] = (time.monotonic() + self.ttl_segundos, valor)
+            if self._agrupar is not None:
+                self._claves_por_grupo.setdefault(self._agrupar(valor), set()).add(clave)
+            while len(self._datos) > self.max_entradas:
+                self._quitar(next(iter(self._datos)))
+                self.desalojos += 1
+
+    def _quitar(self, clave: Hashable) -> None:
+        """Elimina una entrada y su referencia en el índice de grupos (con el lock tomado)."""
+        entrada = self._datos.pop(clave, None)
+        if entrada is None or self._agrupar is None:
+            return
+        grupo = self._agrupar(entrada[1])
+        claves = self._claves_por_grupo.get(grupo)
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._claves_por_grupo[grupo]
+
+    def obtener_o_cargar(self, clave: Hashable, cargar: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Devuelve el valor cacheado o lo carga con `cargar()`; None no se cachea.
+        Si varios hilos fallan a la vez en la misma clave, solo uno ejecuta
+        `cargar()` y el resto espera su resultado.
+        """
+        valor = self.obtener(clave)
+        if valor is not None:
+            return valor
+        with self._lock:
+            carga = self._cargando.get(clave)
+            if carga is None:
+                carga = self._cargando[clave] = threading.Lock()
+            elif carga.locked():
+                self.esperas += 1
+        with carga:
+            try:
+                # Si otro hilo la cargó mientras esperábamos, ya está en la caché
+                with self._lock:
+                    entrada = self._datos.get(clave)
+                if entrada is not None and entrada[0] >= time.monotonic():
+                    return entrada[1]
+                version = self._version
+                valor = cargar()
+                if valor is not None:
+                    self.guardar(clave, valor, version=version)
+                return valor
+            finally:
+                with self._lock:
+                    if self._cargando.get(clave) is carga:
+                        del self._cargando[clave]
+
+    def invalidar(self, clave: Hashable) -> None:
+        with self._lock:
+            self._version += 1
+            self.invalidaciones += 1
+            self._quitar(clave)
+
+    def invalidar_grupos(self, grupos: Iterable[Hashable]) -> None:
+        """Elimina las entradas de los grupos indicados (requiere `agrupar`)."""
+        with self._lock:
+            self._version += 1
+            self.invalidaciones += 1
+            for grupo in grupos:
+                for clave in list(self._claves_por_grupo.get(grupo, ())):
+                    self._quitar(clave)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._version += 1
+            self.invalidaciones += 1
+            self._datos.clear()
+            self._claves_por_grupo.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl_segundos,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None,
+                "expirados": self.expirados,
+                "desalojos": self.desalojos,
+                "invalidaciones": self.invalidaciones,
+                "esperas": self.esperas,
+            }
+
+
+# ============ PRODUCTOS POR CÓDIGO (lectura de código de barras) ============
+
+cache_productos_codigo = CacheTTL(
+    "productos_por_codigo",
+    max_entradas=settings.CACHE_PRODUCTOS_MAX_ENTRADAS,
+    ttl_segundos=settings.CACHE_PRODUCTOS_TTL_SEGUNDOS,
+    agrupar=lambda producto: producto.id,
+)
+
+
+def invalidar_productos(ids_producto: Iterable[int]) -> None:
+    """Quita de la caché los productos indicados (por id)."""
+    ids = set(ids_producto)
+    if ids:
+        cache_productos_codigo.invalidar_grupos(ids)
+
+
+# ============ USUARIOS AUTENTICADOS (get_current_user) ============
+
+cache_usuarios = CacheTTL(
+    "usuarios_por_dni",
+    max_entradas=settings.CACHE_USUARIOS_MAX_ENTRADAS,
+    ttl_segundos=settings.CACHE_USUARIOS_TTL_SEGUNDOS,
+)
+
+
+# ============ DASHBOARD DE VENTAS ============
+
+# Pocas claves (fecha, parámetros); el TTL corto es la única invalidación:
+# las ventas nuevas aparecen en el dashboard como mucho tras ese tiempo
+cache_dashboard = CacheTTL(
+    "dashboard_ventas",
+    max_entradas=64,
+    ttl_segundos=settings.CACHE_DASHBOARD_TTL_SEGUNDOS,
+)
+
+
+# ============ INVALIDACIÓN TRAS COMMIT ============
+
+_CLAVE_SESION = "cache_productos_modificados"
+
+
+def invalidar_al_confirmar(db: Session, ids_producto: Iterable[int]) -> None:
+    """Marca productos para invalidar cuando la transacción actual haga commit."""
+    db.info.setdefault(_CLAVE_SESION, set()).update(ids_producto)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_invalidaciones(db: Session):
+    ids = db.info.pop(_CLAVE_SESION, None)
+    if ids:
+        invalidar_productos(ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_invalidaciones(db: Session, transaccion):
+    if transaccion.parent is None:
+        db.info.pop(_CLAVE_SESION, None)
+
+
+def estadisticas() -> Dict[str, dict]:
+    """Contadores de todas las cachés del proceso."""
+    return {cache.nombre: cache.estadisticas() for cache in (cache_productos_codigo, cache_usuarios, cache_dashboard)}
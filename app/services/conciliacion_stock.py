@@ -0,0 +1,216 @@
+"""
+Conciliación de stock: compara Producto.stock_actual con el stock que implican
+las ventas, las compras y los ajustes manuales del kardex.
+
+    esperado = INICIAL + AJUSTE (kardex)
+             + Σ detalle_compra.cantidad × cantidad_base   (compras no anuladas ni borrador)
+             - Σ detalle_venta.cantidad  × cantidad_base   (ventas no anuladas)
+
+Todo se calcula en una sola consulta agregada (UNION ALL de las tres fuentes,
+agrupada por producto) sin cargar objetos ORM; la corrección es un único
+ajuste de stock por conjunto que queda registrado en el kardex.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.crud import compra as crud_compra
+from app.crud import kardex as crud_kardex
+from app.models.compra import Compra, DetalleCompra
+from app.models.movimientoStock import MovimientoStock
+from app.models.presentacion import Presentacion
+from app.models.producto import Producto
+from app.models.venta import DetalleVenta, Venta
+from app.services import stock_service
+
+# Estados de documento que no mueven stock
+ESTADOS_VENTA_SIN_STOCK = ("ANULADA",)
+ESTADOS_COMPRA_SIN_STOCK = crud_compra.ESTADOS_SIN_STOCK
+
+# Movimientos del kardex que no provienen de una venta o compra. Las
+# correcciones CONCILIACION no cuentan: llevan el stock al esperado, no lo cambian
+MOVIMIENTOS_BASE = (
+    stock_service.MOVIMIENTO_INICIAL,
+    stock_service.MOVIMIENTO_AJUSTE,
+)
+
+
+def _consulta_esperado(hasta: Optional[datetime] = None):
+    """Subconsulta id_producto -> unidades esperadas."""
+    ventas = (
+        select(
+            Presentacion.id_producto.label("id_producto"),
+            (-DetalleVenta.cantidad * Presentacion.cantidad_base).label("unidades"),
+            literal(0).label("base"),
+        )
+        .select_from(DetalleVenta)
+        .join(Venta, Venta.id == DetalleVenta.id_venta)
+        .join(Presentacion, Presentacion.id == DetalleVenta.id_presentacion)
+        .where(Venta.estado.not_in(ESTADOS_VENTA_SIN_STOCK))
+    )
+    compras = (
+        select(
+            Presentacion.id_producto.label("id_producto"),
+            (DetalleCompra.cantidad * Presentacion.cantidad_base).label("unidades"),
+            literal(0).label("base"),
+        )
+        .select_from(DetalleCompra)
+        .join(Compra, Compra.id == DetalleCompra.id_compra)
+        .join(Presentacion, Presentacion.id == DetalleCompra.id_presentacion)
+        .where(Compra.estado.not_in(ESTADOS_COMPRA_SIN_STOCK))
+    )
+    base = select(
+        MovimientoStock.id_producto.label("id_producto"),
+        MovimientoStock.cantidad.label("unidades"),
+        literal(1).label("base"),
+    ).where(MovimientoStock.tipo.in_(MOVIMIENTOS_BASE))
+
+    if hasta is not None:
+        ventas = ventas.where(Venta.fecha <= hasta)
+        compras = compras.where(func.coalesce(Compra.fecha_compra, Compra.fecha_creacion) <= hasta)
+        base = base.where(MovimientoStock.fecha <= hasta)
+
+    fuentes = union_all(ventas, compras, base).subquery()
+    return (
+        select(
+            fuentes.c.id_producto,
+            func.sum(fuentes.c.unidades).label("esperado"),
+            func.sum(fuentes.c.base).label("movimientos_base"),
+        )
+        .group_by(fuentes.c.id_producto)
+        .subquery()
+    )
+
+
+def calcular_diferencias(
+    db: Session,
+    solo_diferencias: bool = True,
+    incluir_inactivos: bool = False,
+) -> List[dict]:
+    """
+    Stock actual contra stock esperado de cada producto.
+
+    Returns:
+        Lista de {"id_producto", "codigo", "nombre", "stock_actual", "esperado",
+        "diferencia", "sin_base"} donde diferencia = esperado - stock_actual y
+        sin_base indica que el producto no tiene stock inicial en el kardex
+        (creado antes del kardex): su esperado no incluye el stock de partida.
+    """
+    esperado = _consulta_esperado()
+    stock_actual = func.coalesce(Producto.stock_actual, 0)
+    unidades_esperadas = func.coalesce(esperado.c.esperado, 0)
+    diferencia = (unidades_esperadas - stock_actual).label("diferencia")
+
+    query = (
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            stock_actual.label("stock_actual"),
+            unidades_esperadas.label("esperado"),
+            diferencia,
+            (func.coalesce(esperado.c.movimientos_base, 0) == 0).label("sin_base"),
+        )
+        .outerjoin(esperado, esperado.c.id_producto == Producto.id)
+        .order_by(Producto.id)
+    )
+    if not incluir_inactivos:
+        query = query.where(Producto.estado == 'A')
+    if solo_diferencias:
+        query = query.where(unidades_esperadas != stock_actual)
+
+    return [
+        {
+            "id_producto": fila.id,
+            "codigo": fila.codigo,
+            "nombre": fila.nombre,
+            "stock_actual": int(fila.stock_actual),
+            "esperado": int(fila.esperado),
+            "diferencia": int(fila.diferencia),
+            "sin_base": bool(fila.sin_base),
+        }
+        for fila in db.execute(query)
+    ]
+
+
+def calcular_esperado_a_fecha(db: Session, hasta: datetime) -> Dict[int, tuple]:
+    """Stock esperado por producto a una fecha pasada (id_producto -> (unidades, tiene_base))."""
+    esperado = _consulta_esperado(hasta)
+    return {
+        fila.id_producto: (int(fila.esperado), bool(fila.movimientos_base))
+        for fila in db.execute(select(esperado))
+    }
+
+
+def diferencias_a_fecha(db: Session, hasta: datetime, solo_diferencias: bool = True) -> List[dict]:
+    """
+    Reconstrucción a una fecha pasada: stock esperado por documentos contra el
+    stock que registra el kardex a esa fecha (productos sin datos de kardex se omiten).
+    """
+    esperado = calcular_esperado_a_fecha(db, hasta)
+    resultado = []
+    for fila in crud_kardex.get_stock_a_fecha(db, hasta):
+        if fila["stock"] is None:
+            continue
+        unidades, tiene_base = esperado.get(fila["id_producto"], (0, False))
+        diferencia = unidades - fila["stock"]
+        if solo_diferencias and not diferencia:
+            continue
+        resultado.append({
+            "id_producto": fila["id_producto"],
+            "codigo": fila["codigo"],
+            "nombre": fila["nombre"],
+            "stock_actual": fila["stock"],
+            "esperado": unidades,
+            "diferencia": diferencia,
+            "sin_base": not tiene_base,
+        })
+    return resultado
+
+
+def conciliar(
+    db: Session,
+    corregir: bool = False,
+    ids_producto: Optional[List[int]] = None,
+    id_usuario: Optional[int] = None,
+) -> dict:
+    """
+    Reporta las diferencias y, si `corregir`, lleva stock_actual al valor
+    esperado con un único ajuste (movimiento CONCILIACION en el kardex).
+
+    Los productos sin_base solo se corrigen si se piden explícitamente en
+    `ids_producto`: sin stock inicial en el kardex, "corregirlos" borraría
+    stock real. Para ellos conviene fijar el stock con un AJUSTE.
+
+    Si se corrige, la diferencia se aplica como delta sobre el stock bloqueado:
+    una venta confirmada entre el cálculo y el ajuste mueve por igual el stock
+    y el esperado, así que el delta sigue siendo correcto.
+    """
+    diferencias = calcular_diferencias(db)
+    if ids_producto is not None:
+        ids = set(ids_producto)
+        diferencias = [d for d in diferencias if d["id_producto"] in ids]
+        a_corregir = diferencias
+    else:
+        a_corregir = [d for d in diferencias if not d["sin_base"]]
+
+    corregidos = 0
+    if corregir and a_corregir:
+        saldos = stock_service.ajustar_stock(
+            db,
+            {d["id_producto"]: d["diferencia"] for d in a_corregir},
+            stock_service.MOVIMIENTO_CONCILIACION,
+            id_usuario=id_usuario,
+        )
+        db.commit()
+        corregidos = len(saldos)
+
+    return {
+        "fecha": datetime.now(),
+        "productos_con_diferencia": len(diferencias),
+        "unidades_de_diferencia": sum(abs(d["diferencia"]) for d in diferencias),
+        "corregidos": corregidos,
+        "diferencias": diferencias,
+    }
@@ -0,0 +1,180 @@
+"""
+Exportación de ventas y compras a CSV o XLSX, una fila por línea de detalle
+con los datos de su cabecera.
+
+Las filas se leen con un cursor del lado del servidor (yield_per) en lotes de
+LOTE_EXPORTACION y se escriben al vuelo, sin crear objetos ORM ni schemas:
+la memoria usada no depende del tamaño del rango.
+
+    CSV   se envía a medida que se lee (UTF-8 con BOM para que Excel lo abra bien)
+    XLSX  openpyxl en modo write_only escribe las filas a un archivo temporal
+          que luego se envía por partes. openpyxl es opcional: si no está
+          instalado, `xlsx_disponible()` devuelve False.
+
+Cada exportación abre su propia sesión de lectura (la réplica, si hay
+DATABASE_REPLICA_URL): la de get_db se cierra antes de que termine de
+enviarse una StreamingResponse.
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocalLectura
+from app.models.cliente import Cliente
+from app.models.compra import Compra, DetalleCompra
+from app.models.presentacion import Presentacion
+from app.models.producto import Producto
+from app.models.proveedor import Proveedor
+from app.models.venta import DetalleVenta, Venta
+
+FORMATO_CSV = "csv"
+FORMATO_XLSX = "xlsx"
+TIPOS_CONTENIDO = {
+    FORMATO_CSV: "text/csv; charset=utf-8",
+    FORMATO_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+LOTE_EXPORTACION = 2000
+FILAS_POR_ENVIO = 500  # Filas CSV que se juntan antes de enviar un bloque
+BLOQUE_ARCHIVO = 64 * 1024
+
+
+def xlsx_disponible() -> bool:
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def consulta_ventas(fecha_inicio: datetime, fecha_fin: datetime):
+    """Ventas del rango (por fecha) con sus líneas de detalle, ordenadas por fecha."""
+    return (
+        select(
+            Venta.id.label("id_venta"),
+            Venta.fecha,
+            Venta.estado,
+            Venta.id_cliente,
+            func.coalesce(Venta.cliente_nombre, Cliente.nombre).label("cliente"),
+            func.coalesce(Venta.cliente_dni, Cliente.dni).label("cliente_dni"),
+            Venta.id_usuario,
+            Venta.totalsindescuento,
+            Venta.descuento,
+            Venta.totalcondescuento,
+            DetalleVenta.id.label("id_detalle"),
+            Presentacion.id_producto,
+            Producto.codigo.label("codigo_producto"),
+            Producto.nombre.label("producto"),
+            DetalleVenta.id_presentacion,
+            Presentacion.nombre.label("presentacion"),
+            Presentacion.cantidad_base,
+            DetalleVenta.cantidad,
+            DetalleVenta.precio_unitario,
+            DetalleVenta.subtotal,
+        )
+        .select_from(Venta)
+        .outerjoin(Cliente, Cliente.id == Venta.id_cliente)
+        .outerjoin(DetalleVenta, DetalleVenta.id_venta == Venta.id)
+        .outerjoin(Presentacion, Presentacion.id == DetalleVenta.id_presentacion)
+        .outerjoin(Producto, Producto.id == Presentacion.id_producto)
+        .where(Venta.fecha >= fecha_inicio, Venta.fecha <= fecha_fin)
+        .order_by(Venta.fecha, Venta.id, DetalleVenta.id)
+    )
+
+
+def consulta_compras(fecha_inicio: datetime, fecha_fin: datetime):
+    """Compras del rango (por fecha_compra) con sus líneas de detalle, ordenadas por fecha."""
+    return (
+        select(
+            Compra.id.label("id_compra"),
+            Compra.fecha_compra,
+            Compra.fecha_entrega,
+            Compra.estado,
+            Compra.id_proveedor,
+            Proveedor.razon_social.label("proveedor"),
+            Proveedor.ruc,
+            Compra.id_usuario,
+            Compra.totalsindescuento,
+            Compra.descuento,
+            Compra.totalcondescuento,
+            DetalleCompra.id.label("id_detalle"),
+            Presentacion.id_producto,
+            Producto.codigo.label("codigo_producto"),
+            Producto.nombre.label("producto"),
+            DetalleCompra.id_presentacion,
+            Presentacion.nombre.label("presentacion"),
+            Presentacion.cantidad_base,
+            DetalleCompra.cantidad,
+            DetalleCompra.precio_unitario,
+            DetalleCompra.subtotal,
+        )
+        .select_from(Compra)
+        .outerjoin(Proveedor, Proveedor.id == Compra.id_proveedor)
+        .outerjoin(DetalleCompra, DetalleCompra.id_compra == Compra.id)
+        .outerjoin(Presentacion, Presentacion.id == DetalleCompra.id_presentacion)
+        .outerjoin(Producto, Producto.id == Presentacion.id_producto)
+        .where(Compra.fecha_compra >= fecha_inicio, Compra.fecha_compra <= fecha_fin)
+        .order_by(Compra.fecha_compra, Compra.id, DetalleCompra.id)
+    )
+
+
+def _filas(consulta) -> Iterator[tuple]:
+    """Recorre la consulta con un cursor del servidor, en lotes de LOTE_EXPORTACION."""
+    db = SessionLocalLectura()
+    try:
+        resultado = db.execute(consulta.execution_options(yield_per=LOTE_EXPORTACION))
+        for lote in resultado.partitions():
+            yield from lote
+    finally:
+        db.close()
+
+
+def generar_csv(consulta) -> Iterator[bytes]:
+    """Bloques CSV (encabezado + una fila por línea) a medida que se leen."""
+    columnas: List[str] = [c.name for c in consulta.selected_columns]
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write("\ufeff")
+    escritor.writerow(columnas)
+    pendientes = 0
+    for fila in _filas(consulta):
+        escritor.writerow(fila)
+        pendientes += 1
+        if pendientes >= FILAS_POR_ENVIO:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def generar_xlsx(consulta, hoja: Optional[str] = None) -> Iterator[bytes]:
+    """Libro XLSX de una hoja, escrito en modo write_only y enviado por partes."""
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    pagina = libro.create_sheet(hoja)
+    pagina.append([c.name for c in consulta.selected_columns])
+    for fila in _filas(consulta):
+        pagina.append(list(fila))
+
+    descriptor, ruta = tempfile.mkstemp(suffix=".xlsx")
+    os.close(descriptor)
+    try:
+        libro.save(ruta)
+        with open(ruta, "rb") as archivo:
+            while bloque := archivo.read(BLOQUE_ARCHIVO):
+                yield bloque
+    finally:
+        os.remove(ruta)
+
+
+def generar(consulta, formato: str, hoja: Optional[str] = None) -> Iterator[bytes]:
+    if formato == FORMATO_XLSX:
+        return generar_xlsx(consulta, hoja)
+    return generar_csv(consulta)
@@ -0,0 +1,234 @@
+"""
+Exportación analítica de ventas, compras y dimensiones de producto a archivos
+Parquet o Arrow IPC, para que BI consulte archivos y no la base productiva.
+
+    {ANALITICA_DIR}/ventas/mes=2025-01/ventas.parquet
+    {ANALITICA_DIR}/detalle_venta/mes=2025-01/detalle_venta.parquet
+    {ANALITICA_DIR}/compras/mes=.../compras.parquet
+    {ANALITICA_DIR}/detalle_compra/mes=.../detalle_compra.parquet
+    {ANALITICA_DIR}/producto/producto.parquet  (y presentaciones, categoria, marca, tipo_producto)
+
+Las particiones son por mes de Venta.fecha / Compra.fecha_compra (mes=sin_fecha
+si es nula) y los detalles van en el mes de su cabecera. Es incremental: cada
+conjunto guarda una marca de agua (MarcaExportacion) y solo se reescriben los
+meses con documentos creados o editados después de la marca menos
+MARGEN_MARCA; las dimensiones son pequeñas y se reescriben siempre. Cada archivo se escribe
+por lotes (yield_per) en un temporal y se reemplaza de forma atómica.
+
+Los borrados físicos (DELETE /ventas/{id}) no dejan rastro: su mes se corrige
+la próxima vez que se reescriba o con una exportación completa.
+
+pyarrow es opcional: sin él, `pyarrow_disponible()` devuelve False.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Float, Integer, Numeric, extract, or_, select
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.categoria import Categoria
+from app.models.compra import Compra, DetalleCompra
+from app.models.marca import Marca
+from app.models.marcaExportacion import MarcaExportacion
+from app.models.presentacion import Presentacion
+from app.models.producto import Producto
+from app.models.tipoProducto import TipoProducto
+from app.models.venta import DetalleVenta, Venta
+
+settings = get_settings()
+
+FORMATO_PARQUET = "parquet"
+FORMATO_ARROW = "arrow"
+EXTENSIONES = {FORMATO_PARQUET: ".parquet", FORMATO_ARROW: ".arrow"}
+
+LOTE_FILAS = 50000
+# fecha_creacion / fecha_edicion se asignan antes del commit: un documento de una
+# transacción que seguía abierta al exportar puede tener una fecha anterior a la
+# marca. Se repasan los cambios de este margen previo (mismo criterio que las
+# fotos de stock, ver kardex.MARGEN_SNAPSHOT).
+MARGEN_MARCA = timedelta(minutes=5)
+SIN_FECHA = "sin_fecha"
+
+DIMENSIONES = (Producto, Presentacion, Categoria, Marca, TipoProducto)
+
+# Conjunto -> (cabecera, columna de fecha, detalle, columna hacia la cabecera, reloj de fecha_edicion)
+CONJUNTOS = {
+    "ventas": (Venta, Venta.fecha, DetalleVenta, DetalleVenta.id_venta, datetime.now),
+    "compras": (Compra, Compra.fecha_compra, DetalleCompra, DetalleCompra.id_compra, datetime.utcnow),
+}
+
+_en_curso = threading.Lock()
+
+
+def pyarrow_disponible() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _tipo_arrow(tipo):
+    import pyarrow as pa
+
+    if isinstance(tipo, Numeric) and not isinstance(tipo, Float):
+        return pa.decimal128(tipo.precision or 18, tipo.scale or 0)
+    if isinstance(tipo, Float):
+        return pa.float64()
+    if isinstance(tipo, Integer):
+        return pa.int64()
+    if isinstance(tipo, DateTime):
+        return pa.timestamp("us")
+    if isinstance(tipo, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _escribir(db: Session, consulta, ruta: str, formato: str) -> int:
+    """Escribe el resultado de la consulta en `ruta` por lotes. Devuelve las filas escritas."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([pa.field(c.name, _tipo_arrow(c.type)) for c in consulta.selected_columns])
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta + ".tmp"
+    if formato == FORMATO_PARQUET:
+        escritor = pq.ParquetWriter(temporal, esquema)
+    else:
+        escritor = pa.ipc.new_file(temporal, esquema)
+
+    filas = 0
+    try:
+        resultado = db.execute(consulta.execution_options(yield_per=LOTE_FILAS))
+        for lote in resultado.partitions():
+            columnas = list(zip(*lote))
+            escritor.write_batch(pa.record_batch(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema,
+            ))
+            filas += len(lote)
+    except Exception:
+        escritor.close()
+        os.remove(temporal)
+        raise
+    escritor.close()
+    os.replace(temporal, ruta)
+    return filas
+
+
+def _meses(db: Session, columna_fecha, filtro=None) -> List[Optional[Tuple[int, int]]]:
+    """(año, mes) distintos de las cabeceras que cumplen el filtro; None = sin fecha."""
+    consulta = select(extract("year", columna_fecha), extract("month", columna_fecha)).distinct()
+    if filtro is not None:
+        consulta = consulta.where(filtro)
+    return [(int(anio), int(mes)) if anio is not None else None for anio, mes in db.execute(consulta)]
+
+
+def _rango_mes(columna_fecha, mes: Optional[Tuple[int, int]]):
+    if mes is None:
+        return columna_fecha.is_(None)
+    anio, numero = mes
+    inicio = datetime(anio, numero, 1)
+    fin = datetime(anio + numero // 12, numero % 12 + 1, 1)
+    return (columna_fecha >= inicio) & (columna_fecha < fin)
+
+
+def _ruta(destino: str, tabla: str, mes: Optional[Tuple[int, int]], formato: str) -> str:
+    particion = f"mes={mes[0]:04d}-{mes[1]:02d}" if mes else f"mes={SIN_FECHA}"
+    return os.path.join(destino, tabla, particion, tabla + EXTENSIONES[formato])
+
+
+def _exportar_conjunto(db: Session, conjunto: str, destino: str, formato: str, completo: bool) -> dict:
+    cabecera, columna_fecha, detalle, columna_cabecera, reloj = CONJUNTOS[conjunto]
+    marca_previa = db.get(MarcaExportacion, conjunto)
+    inicio = reloj()
+
+    if completo or marca_previa is None or marca_previa.formato != formato:
+        meses = _meses(db, columna_fecha)
+    else:
+        desde = marca_previa.marca - MARGEN_MARCA
+        cambios = [
+            cabecera.fecha_creacion > desde,
+            cabecera.fecha_edicion > desde,
+        ]
+        if hasattr(detalle, "fecha_edicion"):
+            detalles_editados = select(columna_cabecera).where(or_(
+                detalle.fecha_creacion > desde,
+                detalle.fecha_edicion > desde,
+            ))
+            cambios.append(cabecera.id.in_(detalles_editados))
+        meses = _meses(db, columna_fecha, or_(*cambios))
+
+    filas = {cabecera.__tablename__: 0, detalle.__tablename__: 0}
+    for mes in sorted(meses, key=lambda m: m or (0, 0)):
+        en_mes = _rango_mes(columna_fecha, mes)
+        filas[cabecera.__tablename__] += _escribir(
+            db,
+            select(*cabecera.__table__.c).where(en_mes).order_by(cabecera.id),
+            _ruta(destino, cabecera.__tablename__, mes, formato),
+            formato,
+        )
+        filas[detalle.__tablename__] += _escribir(
+            db,
+            select(*detalle.__table__.c)
+            .join(cabecera, cabecera.id == columna_cabecera)
+            .where(en_mes)
+            .order_by(detalle.id),
+            _ruta(destino, detalle.__tablename__, mes, formato),
+            formato,
+        )
+
+    if marca_previa is None:
+        marca_previa = MarcaExportacion(conjunto=conjunto)
+        db.add(marca_previa)
+    marca_previa.marca = inicio
+    marca_previa.formato = formato
+    marca_previa.fecha = datetime.now()
+    marca_previa.particiones = len(meses)
+    db.commit()
+    return {"particiones": len(meses), "filas": filas}
+
+
+def exportar(
+    db: Session,
+    formato: str = FORMATO_PARQUET,
+    destino: Optional[str] = None,
+    completo: bool = False,
+) -> dict:
+    """
+    Exporta los meses con cambios desde la última ejecución (o todos si
+    `completo`, o si cambió el formato) y las dimensiones de producto.
+    Lanza ValueError si ya hay una exportación en curso en este proceso.
+    """
+    if not _en_curso.acquire(blocking=False):
+        raise ValueError("Ya hay una exportación analítica en curso")
+    try:
+        destino = destino or settings.ANALITICA_DIR
+        inicio = time.perf_counter()
+        conjuntos: Dict[str, dict] = {
+            conjunto: _exportar_conjunto(db, conjunto, destino, formato, completo)
+            for conjunto in CONJUNTOS
+        }
+        dimensiones = {
+            modelo.__tablename__: _escribir(
+                db,
+                select(*modelo.__table__.c).order_by(modelo.id),
+                os.path.join(destino, modelo.__tablename__, modelo.__tablename__ + EXTENSIONES[formato]),
+                formato,
+            )
+            for modelo in DIMENSIONES
+        }
+        db.commit()
+        return {
+            "destino": os.path.abspath(destino),
+            "formato": formato,
+            "conjuntos": conjuntos,
+            "dimensiones": dimensiones,
+            "segundos": round(time.perf_counter() - inicio, 3),
+        }
+    finally:
+        _en_curso.release()
@@ -0,0 +1,130 @@
+"""
+Claves de idempotencia para la creación de ventas y compras.
+
+Cada clave usada se guarda (ámbito, usuario, clave) -> id del documento creado,
+en la misma transacción que el documento: si la transacción falla, la clave
+queda libre para el reintento. La búsqueda es una lectura por clave primaria.
+Las claves son por usuario: la misma clave enviada por otro usuario no
+devuelve su documento.
+
+Con la cabecera Idempotency-Key de POST /ventas y POST /compras se guarda
+también la huella (sha256) del cuerpo: reutilizar la clave con otro cuerpo
+es un error del cliente. `limpiar_caducadas` borra las claves vencidas
+(job app.jobs.limpiar_idempotencia).
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.claveIdempotencia import ClaveIdempotencia
+
+settings = get_settings()
+
+AMBITO_VENTA = "venta"
+AMBITO_COMPRA = "compra"
+
+
+class ClaveReutilizadaError(ValueError):
+    """La clave de idempotencia ya se usó con un cuerpo de petición distinto."""
+
+    def __init__(self, clave: str):
+        self.clave = clave
+        super().__init__(f"La clave de idempotencia '{clave}' ya se usó con otros datos")
+
+
+def huella(datos: BaseModel) -> str:
+    """sha256 del cuerpo validado de la petición."""
+    return hashlib.sha256(datos.model_dump_json(warnings=False).encode()).hexdigest()
+
+
+def buscar(db: Session, ambito: str, id_usuario: int, claves: Iterable[str]) -> Dict[str, ClaveIdempotencia]:
+    """Claves vigentes ya registradas por el usuario, por clave (una sola consulta)."""
+    claves = list(set(claves))
+    if not claves:
+        return {}
+    filas = db.execute(
+        select(ClaveIdempotencia).where(
+            ClaveIdempotencia.ambito == ambito,
+            ClaveIdempotencia.id_usuario == id_usuario,
+            ClaveIdempotencia.clave.in_(claves),
+            ClaveIdempotencia.expira > datetime.now(),
+        )
+    ).scalars()
+    return {fila.clave: fila for fila in filas}
+
+
+def resolver(
+    db: Session, ambito: str, id_usuario: int, clave: str, huella_peticion: Optional[str]
+) -> Optional[int]:
+    """
+    Id del documento ya creado por el usuario con esta clave, o None si la
+    clave está libre. Lanza ClaveReutilizadaError si la clave se usó con otro cuerpo.
+    """
+    fila = db.execute(
+        select(ClaveIdempotencia.id_recurso, ClaveIdempotencia.huella).where(
+            ClaveIdempotencia.ambito == ambito,
+            ClaveIdempotencia.id_usuario == id_usuario,
+            ClaveIdempotencia.clave == clave,
+            ClaveIdempotencia.expira > datetime.now(),
+        )
+    ).first()
+    if fila is None:
+        return None
+    # Las claves de los lotes de ventas no guardan huella
+    if fila.huella is not None and huella_peticion is not None and fila.huella != huella_peticion:
+        raise ClaveReutilizadaError(clave)
+    return fila.id_recurso
+
+
+def registrar(
+    db: Session,
+    ambito: str,
+    id_usuario: int,
+    recursos: Dict[str, int],
+    huella: Optional[str] = None,
+) -> None:
+    """
+    Registra en la transacción actual las claves usadas (clave -> id del documento).
+    Si otra transacción registró la misma clave en paralelo, el commit falla
+    con IntegrityError y el llamador debe reintentar (verá la clave como usada).
+    """
+    if not recursos:
+        return
+    ahora = datetime.now()
+    expira = ahora + timedelta(hours=settings.IDEMPOTENCIA_TTL_HORAS)
+    # Una clave caducada que aún no se limpió se puede volver a usar
+    db.execute(
+        delete(ClaveIdempotencia).where(
+            ClaveIdempotencia.ambito == ambito,
+            ClaveIdempotencia.id_usuario == id_usuario,
+            ClaveIdempotencia.clave.in_(list(recursos)),
+            ClaveIdempotencia.expira <= ahora,
+        )
+    )
+    filas: List[dict] = [
+        {
+            "ambito": ambito,
+            "clave": clave,
+            "id_recurso": id_recurso,
+            "huella": huella,
+            "id_usuario": id_usuario,
+            "fecha": ahora,
+            "expira": expira,
+        }
+        for clave, id_recurso in sorted(recursos.items())
+    ]
+    db.execute(insert(ClaveIdempotencia), filas)
+
+
+def limpiar_caducadas(db: Session) -> int:
+    """Borra las claves vencidas. Devuelve cuántas se borraron."""
+    borradas = db.execute(
+        delete(ClaveIdempotencia).where(ClaveIdempotencia.expira <= datetime.now())
+    ).rowcount
+    db.commit()
+    return borradas
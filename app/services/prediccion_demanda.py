@@ -0,0 +1,237 @@
+"""
+Predicción de demanda diaria por producto (unidades base) con NumPy.
+
+Las ventas diarias salen del resumen ventas_diarias_producto (unidades =
+detalle_venta.cantidad × presentaciones.cantidad_base) y se cargan en una
+matriz productos × días. Los tres modelos se ajustan para todo el catálogo a
+la vez: las operaciones recorren los días, nunca los productos.
+
+    MEDIA_MOVIL            promedio de los últimos VENTANA_MEDIA días
+    SUAVIZADO_EXPONENCIAL  nivel con suavizado exponencial simple; el alfa se
+                           elige por producto entre ALFAS (menor error a un paso)
+    ESTACIONAL_SEMANAL     suavizado exponencial sobre la serie desestacionalizada
+                           por índices de día de la semana
+
+Para cada producto se elige el modelo con menor error absoluto medio en los
+últimos DIAS_VALIDACION días (ajustando con la historia anterior) y luego se
+reajusta con toda la historia para pronosticar el horizonte.
+"""
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.prediccionDemanda import PrediccionDemanda
+from app.models.producto import Producto
+from app.models.ventaDiaria import VentaDiariaProducto
+
+MODELO_MEDIA_MOVIL = "MEDIA_MOVIL"
+MODELO_SUAVIZADO = "SUAVIZADO_EXPONENCIAL"
+MODELO_ESTACIONAL = "ESTACIONAL_SEMANAL"
+MODELOS = (MODELO_MEDIA_MOVIL, MODELO_SUAVIZADO, MODELO_ESTACIONAL)
+
+ALFAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8], dtype=np.float32)
+VENTANA_MEDIA = 28
+SEMANAS_ESTACIONALIDAD = 12
+DIAS_VALIDACION = 28
+DIAS_HISTORIA = 730
+HORIZONTE_DIAS = 28
+LOTE_INSERCION = 5000
+
+
+def cargar_ventas_diarias(db: Session, hasta: date, dias: int):
+    """
+    Matriz de unidades vendidas por producto activo y día en (hasta - dias, hasta].
+
+    Returns:
+        (ids, matriz): ids de producto ordenados y matriz float32 de forma
+        (len(ids), dias); la columna j corresponde al día hasta - dias + 1 + j.
+    """
+    desde = hasta - timedelta(days=dias - 1)
+    ids = np.fromiter(
+        db.execute(select(Producto.id).where(Producto.estado == 'A').order_by(Producto.id)).scalars(),
+        dtype=np.int64,
+    )
+    matriz = np.zeros((len(ids), dias), dtype=np.float32)
+    filas = db.execute(
+        select(VentaDiariaProducto.id_producto, VentaDiariaProducto.fecha, VentaDiariaProducto.unidades)
+        .where(VentaDiariaProducto.fecha >= desde, VentaDiariaProducto.fecha <= hasta)
+    ).all()
+    if not filas or not len(ids):
+        return ids, matriz
+
+    id_producto, fecha, unidades = zip(*filas)
+    id_producto = np.array(id_producto, dtype=np.int64)
+    fila = np.searchsorted(ids, id_producto).clip(max=len(ids) - 1)
+    activo = ids[fila] == id_producto  # Descarta productos inactivos
+    columna = (np.array(fecha, dtype="datetime64[D]") - np.datetime64(desde, "D")).astype(np.int64)
+    matriz[fila[activo], columna[activo]] = np.array(unidades, dtype=np.float32)[activo]
+    return ids, matriz
+
+
+def _suavizar(serie: np.ndarray):
+    """
+    Suavizado exponencial simple de cada fila con todos los ALFAS a la vez.
+
+    Returns:
+        (nivel, alfa): nivel final y alfa elegido por producto (el de menor
+        error cuadrático a un paso).
+    """
+    alfas = ALFAS[:, None]
+    inicio = min(7, serie.shape[1])
+    nivel = np.repeat(serie[:, :inicio].mean(axis=1)[None, :], len(ALFAS), axis=0)
+    error_total = np.zeros_like(nivel)
+    for t in range(serie.shape[1]):
+        error = serie[:, t] - nivel
+        error_total += error * error
+        nivel += alfas * error
+    mejor = error_total.argmin(axis=0)
+    columnas = np.arange(serie.shape[0])
+    return nivel[mejor, columnas], ALFAS[mejor]
+
+
+def _indices_semanales(serie: np.ndarray, dia_semana_inicio: int) -> np.ndarray:
+    """
+    Índice multiplicativo por día de la semana (0 = lunes) de cada producto,
+    con las últimas SEMANAS_ESTACIONALIDAD semanas. Sin ventas, índice 1.
+    """
+    dias = min(serie.shape[1], SEMANAS_ESTACIONALIDAD * 7)
+    reciente = serie[:, -dias:]
+    dia_semana = (dia_semana_inicio + np.arange(serie.shape[1] - dias, serie.shape[1])) % 7
+    media = reciente.mean(axis=1)
+    indices = np.ones((serie.shape[0], 7), dtype=np.float32)
+    con_ventas = media > 0
+    for dia in range(7):
+        columnas = dia_semana == dia
+        if columnas.any():
+            indices[con_ventas, dia] = reciente[con_ventas][:, columnas].mean(axis=1) / media[con_ventas]
+    return indices
+
+
+def _ajustar(serie: np.ndarray, dia_semana_inicio: int, horizonte: int):
+    """
+    Ajusta los tres modelos sobre `serie` y pronostica `horizonte` días.
+
+    Returns:
+        (pronosticos, alfas): pronosticos de forma (3, productos, horizonte)
+        en el orden de MODELOS y alfas (2, productos) de los modelos exponenciales.
+    """
+    productos, dias = serie.shape
+    media = serie[:, -VENTANA_MEDIA:].mean(axis=1)
+    nivel, alfa = _suavizar(serie)
+
+    indices = _indices_semanales(serie, dia_semana_inicio)
+    dia_semana = (dia_semana_inicio + np.arange(dias)) % 7
+    indice_por_dia = indices[:, dia_semana]
+    indice_por_dia[indice_por_dia == 0] = 1
+    desestacionalizada = serie / indice_por_dia
+    del indice_por_dia
+    nivel_estacional, alfa_estacional = _suavizar(desestacionalizada)
+    dia_semana_futuro = (dia_semana_inicio + dias + np.arange(horizonte)) % 7
+
+    pronosticos = np.empty((3, productos, horizonte), dtype=np.float32)
+    pronosticos[0] = media[:, None]
+    pronosticos[1] = nivel[:, None]
+    pronosticos[2] = nivel_estacional[:, None] * indices[:, dia_semana_futuro]
+    return np.maximum(pronosticos, 0), np.stack([alfa, alfa_estacional])
+
+
+def pronosticar(serie: np.ndarray, dia_semana_inicio: int, horizonte: int = HORIZONTE_DIAS) -> Dict[str, np.ndarray]:
+    """
+    Elige el mejor modelo por producto (validación sobre los últimos
+    DIAS_VALIDACION días) y pronostica `horizonte` días con toda la historia.
+
+    Args:
+        serie: matriz productos × días de unidades vendidas
+        dia_semana_inicio: día de la semana (0 = lunes) de la primera columna
+
+    Returns:
+        {"modelo": índice en MODELOS, "pronostico": (productos, horizonte),
+         "error_mae": (productos,), "alfa": (productos,) con NaN para MEDIA_MOVIL}
+    """
+    productos = serie.shape[0]
+    validacion = min(DIAS_VALIDACION, serie.shape[1] // 2)
+    if validacion:
+        pronostico_validacion, _ = _ajustar(serie[:, :-validacion], dia_semana_inicio, validacion)
+        errores = np.abs(pronostico_validacion - serie[None, :, -validacion:]).mean(axis=2)
+    else:
+        errores = np.zeros((3, productos), dtype=np.float32)
+    modelo = errores.argmin(axis=0)
+    columnas = np.arange(productos)
+
+    pronosticos, alfas = _ajustar(serie, dia_semana_inicio, horizonte)
+    alfa = np.full(productos, np.nan, dtype=np.float32)
+    exponencial = modelo > 0
+    alfa[exponencial] = alfas[modelo[exponencial] - 1, columnas[exponencial]]
+    return {
+        "modelo": modelo,
+        "pronostico": pronosticos[modelo, columnas],
+        "error_mae": errores[modelo, columnas],
+        "alfa": alfa,
+    }
+
+
+def calcular_predicciones(
+    db: Session,
+    hasta: Optional[date] = None,
+    dias_historia: int = DIAS_HISTORIA,
+    horizonte: int = HORIZONTE_DIAS,
+) -> dict:
+    """
+    Recalcula y guarda el pronóstico de todos los productos activos, usando
+    la historia hasta `hasta` (por defecto ayer: el día en curso está incompleto).
+    Reemplaza las predicciones anteriores en una sola transacción.
+    """
+    hasta = hasta or date.today() - timedelta(days=1)
+    inicio = time.perf_counter()
+    ids, serie = cargar_ventas_diarias(db, hasta, dias_historia)
+    segundos_carga = time.perf_counter() - inicio
+
+    desde = hasta - timedelta(days=dias_historia - 1)
+    resultado = pronosticar(serie, desde.weekday(), horizonte)
+    segundos_ajuste = time.perf_counter() - inicio - segundos_carga
+
+    ahora = datetime.now()
+    fecha_inicio = hasta + timedelta(days=1)
+    pronostico = np.round(resultado["pronostico"].astype(np.float64), 2)
+    totales = pronostico.sum(axis=1)
+    db.execute(delete(PrediccionDemanda))
+    for lote in range(0, len(ids), LOTE_INSERCION):
+        fin = lote + LOTE_INSERCION
+        db.execute(insert(PrediccionDemanda), [
+            {
+                "id_producto": int(id_producto),
+                "fecha_calculo": ahora,
+                "fecha_inicio": fecha_inicio,
+                "horizonte_dias": horizonte,
+                "modelo": MODELOS[modelo],
+                "alfa": None if np.isnan(alfa) else float(alfa),
+                "error_mae": round(float(error), 4),
+                "demanda_diaria": round(float(total) / horizonte, 4),
+                "demanda_total": round(float(total), 2),
+                "pronostico": dias,
+            }
+            for id_producto, modelo, alfa, error, total, dias in zip(
+                ids[lote:fin],
+                resultado["modelo"][lote:fin],
+                resultado["alfa"][lote:fin],
+                resultado["error_mae"][lote:fin],
+                totales[lote:fin],
+                pronostico[lote:fin].tolist(),
+            )
+        ])
+    db.commit()
+
+    return {
+        "fecha_calculo": ahora,
+        "productos": len(ids),
+        "dias_historia": dias_historia,
+        "horizonte_dias": horizonte,
+        "modelos": {nombre: int((resultado["modelo"] == i).sum()) for i, nombre in enumerate(MODELOS)},
+        "segundos_carga": round(segundos_carga, 3),
+        "segundos_ajuste": round(segundos_ajuste, 3),
+        "segundos_total": round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,263 @@
+"""
+Punto de reorden y pedidos de compra sugeridos.
+
+    demanda_diaria = pronóstico de prediccion_demanda o, si no hay, promedio de
+                     los últimos DIAS_VELOCIDAD días del resumen de ventas
+    plazo_entrega  = promedio de días fecha_compra → fecha_entrega de las compras
+                     del proveedor (PLAZO_DEFECTO_DIAS si no hay datos)
+    punto_reorden  = demanda_diaria × plazo_entrega + stock_minimo (stock de seguridad)
+    objetivo       = stock_maximo o, si no está definido, punto_reorden +
+                     demanda_diaria × DIAS_COBERTURA
+
+Se sugiere pedir cuando stock_actual + unidades ya pedidas en borradores
+<= punto_reorden, hasta llegar al objetivo, en la presentación con menor
+precio_compra por unidad base. El proveedor es el de la última compra del
+producto. Todo el catálogo se evalúa con una sola consulta.
+"""
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import func, insert, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.crud.compra import ESTADO_BORRADOR, ESTADOS_SIN_STOCK
+from app.models.compra import Compra, DetalleCompra
+from app.models.prediccionDemanda import PrediccionDemanda
+from app.models.presentacion import Presentacion
+from app.models.producto import Producto
+from app.models.ventaDiaria import VentaDiariaProducto
+
+DIAS_VELOCIDAD = 28
+PLAZO_DEFECTO_DIAS = 7
+DIAS_COBERTURA = 14
+
+
+def _dias_entre(db: Session, desde, hasta):
+    """Expresión SQL con los días (con decimales) entre dos columnas DateTime."""
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "postgresql":
+        return func.extract("epoch", hasta - desde) / 86400.0
+    if dialecto in ("mysql", "mariadb"):
+        return func.timestampdiff(literal_column("SECOND"), desde, hasta) / 86400.0
+    return func.julianday(hasta) - func.julianday(desde)
+
+
+def _subconsultas(db: Session):
+    compra_valida = Compra.estado.not_in(ESTADOS_SIN_STOCK)
+
+    historica = (
+        select(
+            VentaDiariaProducto.id_producto,
+            (func.sum(VentaDiariaProducto.unidades) * 1.0 / DIAS_VELOCIDAD).label("demanda"),
+        )
+        .where(VentaDiariaProducto.fecha > date.today() - timedelta(days=DIAS_VELOCIDAD))
+        .group_by(VentaDiariaProducto.id_producto)
+        .subquery()
+    )
+
+    compras_producto = (
+        select(
+            Presentacion.id_producto,
+            Compra.id_proveedor,
+            func.row_number().over(
+                partition_by=Presentacion.id_producto,
+                order_by=(func.coalesce(Compra.fecha_compra, Compra.fecha_creacion).desc(), Compra.id.desc()),
+            ).label("orden"),
+        )
+        .select_from(DetalleCompra)
+        .join(Compra, Compra.id == DetalleCompra.id_compra)
+        .join(Presentacion, Presentacion.id == DetalleCompra.id_presentacion)
+        .where(compra_valida, Compra.id_proveedor.is_not(None))
+        .subquery()
+    )
+    proveedor = (
+        select(compras_producto.c.id_producto, compras_producto.c.id_proveedor)
+        .where(compras_producto.c.orden == 1)
+        .subquery()
+    )
+
+    plazo = (
+        select(
+            Compra.id_proveedor,
+            func.avg(_dias_entre(db, Compra.fecha_compra, Compra.fecha_entrega)).label("dias"),
+        )
+        .where(
+            compra_valida,
+            Compra.fecha_compra.is_not(None),
+            Compra.fecha_entrega >= Compra.fecha_compra,
+        )
+        .group_by(Compra.id_proveedor)
+        .subquery()
+    )
+
+    presentaciones = (
+        select(
+            Presentacion.id_producto,
+            Presentacion.id.label("id_presentacion"),
+            Presentacion.nombre,
+            Presentacion.cantidad_base,
+            Presentacion.precio_compra,
+            func.row_number().over(
+                partition_by=Presentacion.id_producto,
+                order_by=(
+                    (Presentacion.precio_compra / Presentacion.cantidad_base).asc(),
+                    Presentacion.cantidad_base.desc(),
+                    Presentacion.id,
+                ),
+            ).label("orden"),
+        )
+        .where(Presentacion.estado == 'A', Presentacion.cantidad_base > 0, Presentacion.precio_compra > 0)
+        .subquery()
+    )
+    presentacion = select(presentaciones).where(presentaciones.c.orden == 1).subquery()
+
+    en_borrador = (
+        select(
+            Presentacion.id_producto,
+            func.sum(DetalleCompra.cantidad * Presentacion.cantidad_base).label("unidades"),
+        )
+        .select_from(DetalleCompra)
+        .join(Compra, Compra.id == DetalleCompra.id_compra)
+        .join(Presentacion, Presentacion.id == DetalleCompra.id_presentacion)
+        .where(Compra.estado == ESTADO_BORRADOR)
+        .group_by(Presentacion.id_producto)
+        .subquery()
+    )
+    return historica, proveedor, plazo, presentacion, en_borrador
+
+
+def calcular_sugerencias(db: Session, ids_proveedor: Optional[List[int]] = None) -> List[dict]:
+    """
+    Productos activos que llegaron a su punto de reorden, con la cantidad a pedir.
+
+    Returns:
+        Lista ordenada por proveedor y producto de {"id_producto", "codigo", "nombre",
+        "id_proveedor", "stock_actual", "en_borrador", "demanda_diaria", "plazo_entrega_dias",
+        "punto_reorden", "objetivo", "unidades", "id_presentacion", "presentacion",
+        "cantidad_base", "precio_compra", "cantidad"}; cantidad (en presentaciones) es
+        None si el producto no tiene una presentación con precio de compra.
+    """
+    historica, proveedor, plazo, presentacion, en_borrador = _subconsultas(db)
+
+    demanda = func.coalesce(PrediccionDemanda.demanda_diaria, historica.c.demanda, 0)
+    dias_plazo = func.coalesce(plazo.c.dias, PLAZO_DEFECTO_DIAS)
+    punto_reorden = demanda * dias_plazo + func.coalesce(Producto.stock_minimo, 0)
+    pedidas = func.coalesce(en_borrador.c.unidades, 0)
+    disponible = func.coalesce(Producto.stock_actual, 0) + pedidas
+
+    query = (
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            func.coalesce(Producto.stock_actual, 0).label("stock_actual"),
+            Producto.stock_maximo,
+            pedidas.label("en_borrador"),
+            demanda.label("demanda_diaria"),
+            dias_plazo.label("plazo"),
+            punto_reorden.label("punto_reorden"),
+            proveedor.c.id_proveedor,
+            presentacion.c.id_presentacion,
+            presentacion.c.nombre.label("presentacion"),
+            presentacion.c.cantidad_base,
+            presentacion.c.precio_compra,
+        )
+        .outerjoin(PrediccionDemanda, PrediccionDemanda.id_producto == Producto.id)
+        .outerjoin(historica, historica.c.id_producto == Producto.id)
+        .outerjoin(proveedor, proveedor.c.id_producto == Producto.id)
+        .outerjoin(plazo, plazo.c.id_proveedor == proveedor.c.id_proveedor)
+        .outerjoin(presentacion, presentacion.c.id_producto == Producto.id)
+        .outerjoin(en_borrador, en_borrador.c.id_producto == Producto.id)
+        .where(Producto.estado == 'A', punto_reorden > 0, disponible <= punto_reorden)
+        .order_by(proveedor.c.id_proveedor, Producto.id)
+    )
+    if ids_proveedor is not None:
+        query = query.where(proveedor.c.id_proveedor.in_(ids_proveedor))
+
+    sugerencias = []
+    for fila in db.execute(query):
+        demanda_diaria = float(fila.demanda_diaria)
+        punto = float(fila.punto_reorden)
+        if fila.stock_maximo and fila.stock_maximo > punto:
+            objetivo = fila.stock_maximo
+        else:
+            objetivo = math.ceil(punto + demanda_diaria * DIAS_COBERTURA)
+        unidades = max(objetivo - fila.stock_actual - int(fila.en_borrador), 0)
+        if not unidades:
+            continue
+        sugerencias.append({
+            "id_producto": fila.id,
+            "codigo": fila.codigo,
+            "nombre": fila.nombre,
+            "id_proveedor": fila.id_proveedor,
+            "stock_actual": fila.stock_actual,
+            "en_borrador": int(fila.en_borrador),
+            "demanda_diaria": round(demanda_diaria, 4),
+            "plazo_entrega_dias": round(float(fila.plazo), 2),
+            "punto_reorden": math.ceil(punto),
+            "objetivo": objetivo,
+            "unidades": unidades,
+            "id_presentacion": fila.id_presentacion,
+            "presentacion": fila.presentacion,
+            "cantidad_base": fila.cantidad_base,
+            "precio_compra": fila.precio_compra,
+            "cantidad": math.ceil(unidades / fila.cantidad_base) if fila.id_presentacion else None,
+        })
+    return sugerencias
+
+
+def generar_borradores(
+    db: Session,
+    id_usuario: Optional[int] = None,
+    ids_proveedor: Optional[List[int]] = None,
+) -> dict:
+    """
+    Crea una compra BORRADOR por proveedor con las sugerencias pendientes.
+    Los borradores no mueven stock hasta confirmarse (PUT /compras/{id} con otro estado);
+    sus unidades cuentan como ya pedidas en el próximo cálculo.
+    Productos sin proveedor conocido o sin presentación de compra quedan fuera.
+    """
+    sugerencias = calcular_sugerencias(db, ids_proveedor)
+    por_proveedor = defaultdict(list)
+    omitidas = 0
+    for sugerencia in sugerencias:
+        if sugerencia["id_proveedor"] is None or sugerencia["cantidad"] is None:
+            omitidas += 1
+            continue
+        por_proveedor[sugerencia["id_proveedor"]].append(sugerencia)
+
+    compras = []
+    for id_proveedor, lineas in por_proveedor.items():
+        detalles = []
+        for linea in lineas:
+            precio = Decimal(str(linea["precio_compra"])).quantize(Decimal("0.01"))
+            detalles.append({
+                "id_presentacion": linea["id_presentacion"],
+                "cantidad": linea["cantidad"],
+                "precio_unitario": precio,
+                "subtotal": precio * linea["cantidad"],
+            })
+        total = sum(detalle["subtotal"] for detalle in detalles)
+        db_compra = Compra(
+            id_proveedor=id_proveedor,
+            id_usuario=id_usuario,
+            estado=ESTADO_BORRADOR,
+            descuento=Decimal(0),
+            totalsindescuento=total,
+            totalcondescuento=total,
+            created_by=id_usuario,
+        )
+        db.add(db_compra)
+        db.flush()
+        db.execute(insert(DetalleCompra), [{**detalle, "id_compra": db_compra.id} for detalle in detalles])
+        compras.append({"id": db_compra.id, "id_proveedor": id_proveedor, "lineas": len(detalles), "total": total})
+    db.commit()
+
+    return {
+        "compras": compras,
+        "productos": sum(compra["lineas"] for compra in compras),
+        "omitidos": omitidas,
+    }
@@ -0,0 +1,206 @@
+"""
+Resúmenes diarios de ventas (por producto, usuario y cliente).
+
+Se mantienen de forma incremental en la misma transacción que la venta:
+`aplicar_venta(db, venta, +1)` al crearla y `-1` al anularla o eliminarla,
+con un UPSERT que suma los deltas (INSERT ... ON CONFLICT DO UPDATE en
+PostgreSQL/SQLite, ON DUPLICATE KEY UPDATE en MySQL). Las filas se escriben
+en orden de clave para que dos ventas concurrentes no se bloqueen en cruz.
+
+`reconstruir` recalcula un rango de fechas (o todo) desde ventas y
+detalle_venta con INSERT ... SELECT agrupados, para la carga inicial.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.presentacion import Presentacion
+from app.models.venta import DetalleVenta, Venta
+from app.models.ventaDiaria import VentaDiariaCliente, VentaDiariaProducto, VentaDiariaUsuario
+
+# Estados de venta que no suman en los resúmenes
+ESTADOS_EXCLUIDOS = ("ANULADA",)
+SIN_ID = 0  # Clave para ventas sin cliente o sin usuario
+
+
+def cuenta_en_resumen(venta: Venta) -> bool:
+    return venta.estado not in ESTADOS_EXCLUIDOS and venta.fecha is not None
+
+
+def _insert_dialecto(db: Session):
+    nombre = db.get_bind().dialect.name
+    if nombre == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_pg
+        return insert_pg, "on_conflict"
+    if nombre == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+        return insert_sqlite, "on_conflict"
+    if nombre in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as insert_mysql
+        return insert_mysql, "on_duplicate"
+    return None, None
+
+
+def _upsert_sumando(db: Session, modelo, claves: List[str], filas: List[dict]) -> None:
+    """Inserta las filas o, si la clave ya existe, suma sus valores a los guardados."""
+    if not filas:
+        return
+    tabla = modelo.__table__
+    filas = sorted(filas, key=lambda f: tuple(f[c] for c in claves))
+    sumas = [c for c in filas[0] if c not in claves]
+
+    insertar, modo = _insert_dialecto(db)
+    if modo == "on_conflict":
+        sentencia = insertar(tabla).values(filas)
+        db.execute(sentencia.on_conflict_do_update(
+            index_elements=claves,
+            set_={c: tabla.c[c] + sentencia.excluded[c] for c in sumas},
+        ))
+    elif modo == "on_duplicate":
+        sentencia = insertar(tabla).values(filas)
+        db.execute(sentencia.on_duplicate_key_update(
+            {c: tabla.c[c] + sentencia.inserted[c] for c in sumas}
+        ))
+    else:
+        # Otros motores: UPDATE y, si no existía la fila, INSERT
+        for fila in filas:
+            actualizadas = db.execute(
+                update(tabla)
+                .where(and_(*(tabla.c[c] == fila[c] for c in claves)))
+                .values({c: tabla.c[c] + fila[c] for c in sumas})
+            ).rowcount
+            if not actualizadas:
+                db.execute(insert(tabla).values(fila))
+
+
+def aplicar_venta(db: Session, venta: Venta, signo: int) -> None:
+    """
+    Suma (signo=1) o resta (signo=-1) una venta en los tres resúmenes diarios.
+    La venta y sus detalles deben estar ya en la base (flush).
+    """
+    aplicar_ventas(db, [venta], signo)
+
+
+def aplicar_ventas(db: Session, ventas: List[Venta], signo: int) -> None:
+    """
+    Igual que `aplicar_venta` para varias ventas a la vez (p. ej. un lote de
+    tickets): una consulta para las líneas y un UPSERT por resumen.
+    """
+    ventas = [venta for venta in ventas if cuenta_en_resumen(venta)]
+    if not ventas:
+        return
+    dias = {
+        venta.id: venta.fecha.date() if isinstance(venta.fecha, datetime) else venta.fecha
+        for venta in ventas
+    }
+
+    lineas = db.execute(
+        select(
+            DetalleVenta.id_venta,
+            Presentacion.id_producto,
+            func.sum(DetalleVenta.cantidad * Presentacion.cantidad_base).label("unidades"),
+            func.sum(func.coalesce(DetalleVenta.subtotal, 0)).label("importe"),
+        )
+        .select_from(DetalleVenta)
+        .join(Presentacion, Presentacion.id == DetalleVenta.id_presentacion)
+        .where(DetalleVenta.id_venta.in_(list(dias)))
+        .group_by(DetalleVenta.id_venta, Presentacion.id_producto)
+    ).all()
+
+    por_producto = defaultdict(lambda: [0, 0, Decimal(0)])
+    for fila in lineas:
+        acumulado = por_producto[(dias[fila.id_venta], fila.id_producto)]
+        acumulado[0] += 1
+        acumulado[1] += int(fila.unidades or 0)
+        acumulado[2] += Decimal(fila.importe or 0)
+
+    por_usuario = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    por_cliente = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    for venta in ventas:
+        for acumulados, id_clave in ((por_usuario, venta.id_usuario), (por_cliente, venta.id_cliente)):
+            acumulado = acumulados[(dias[venta.id], id_clave or SIN_ID)]
+            acumulado[0] += 1
+            acumulado[1] += venta.totalcondescuento or Decimal(0)
+            acumulado[2] += venta.descuento or Decimal(0)
+
+    _upsert_sumando(db, VentaDiariaProducto, ["fecha", "id_producto"], [
+        {"fecha": dia, "id_producto": id_producto,
+         "ventas": signo * n, "unidades": signo * unidades, "importe": signo * importe}
+        for (dia, id_producto), (n, unidades, importe) in por_producto.items()
+    ])
+    _upsert_sumando(db, VentaDiariaUsuario, ["fecha", "id_usuario"], [
+        {"fecha": dia, "id_usuario": id_usuario,
+         "ventas": signo * n, "total": signo * total, "descuento": signo * descuento}
+        for (dia, id_usuario), (n, total, descuento) in por_usuario.items()
+    ])
+    _upsert_sumando(db, VentaDiariaCliente, ["fecha", "id_cliente"], [
+        {"fecha": dia, "id_cliente": id_cliente,
+         "ventas": signo * n, "total": signo * total, "descuento": signo * descuento}
+        for (dia, id_cliente), (n, total, descuento) in por_cliente.items()
+    ])
+
+
+def reconstruir(db: Session, desde: Optional[date] = None, hasta: Optional[date] = None) -> dict:
+    """
+    Recalcula los resúmenes del rango [desde, hasta] (o de toda la historia)
+    desde las tablas de ventas, con una sentencia INSERT ... SELECT por resumen.
+    Conviene ejecutarlo fuera de horario: mientras corre, las ventas del rango
+    que se confirmen podrían contarse dos veces o ninguna.
+    """
+    dia = func.date(Venta.fecha)
+    filtros = [Venta.fecha.is_not(None), Venta.estado.not_in(ESTADOS_EXCLUIDOS)]
+    if desde:
+        filtros.append(Venta.fecha >= datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        filtros.append(Venta.fecha < datetime.combine(hasta, datetime.max.time()))
+
+    for modelo in (VentaDiariaProducto, VentaDiariaUsuario, VentaDiariaCliente):
+        borrar = delete(modelo)
+        if desde:
+            borrar = borrar.where(modelo.fecha >= desde)
+        if hasta:
+            borrar = borrar.where(modelo.fecha <= hasta)
+        db.execute(borrar)
+
+    db.execute(insert(VentaDiariaProducto).from_select(
+        ["fecha", "id_producto", "ventas", "unidades", "importe"],
+        select(
+            dia,
+            Presentacion.id_producto,
+            func.count(func.distinct(Venta.id)),
+            func.sum(DetalleVenta.cantidad * Presentacion.cantidad_base),
+            func.sum(func.coalesce(DetalleVenta.subtotal, 0)),
+        )
+        .select_from(DetalleVenta)
+        .join(Venta, Venta.id == DetalleVenta.id_venta)
+        .join(Presentacion, Presentacion.id == DetalleVenta.id_presentacion)
+        .where(*filtros)
+        .group_by(dia, Presentacion.id_producto)
+    ))
+    for modelo, columna_id, columna_venta in (
+        (VentaDiariaUsuario, "id_usuario", Venta.id_usuario),
+        (VentaDiariaCliente, "id_cliente", Venta.id_cliente),
+    ):
+        clave = func.coalesce(columna_venta, SIN_ID)
+        db.execute(insert(modelo).from_select(
+            ["fecha", columna_id, "ventas", "total", "descuento"],
+            select(
+                dia,
+                clave,
+                func.count(Venta.id),
+                func.sum(func.coalesce(Venta.totalcondescuento, 0)),
+                func.sum(func.coalesce(Venta.descuento, 0)),
+            )
+            .where(*filtros)
+            .group_by(dia, clave)
+        ))
+    db.commit()
+
+    return {
+        modelo.__tablename__: db.execute(select(func.count()).select_from(modelo)).scalar()
+        for modelo in (VentaDiariaProducto, VentaDiariaUsuario, VentaDiariaCliente)
+    }
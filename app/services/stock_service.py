@@ -0,0 +1,496 @@
+"""
+Servicio de movimientos de stock.
+
+Centraliza las operaciones que modifican Producto.stock_actual para que
+se hagan con sentencias sobre conjuntos (un UPDATE por operación) en
+lugar de leer y modificar cada producto desde Python.
+
+Todas las operaciones bloquean primero las filas de producto afectadas en
+orden ascendente de id (SELECT ... FOR UPDATE en una sola sentencia), así
+dos tickets con los mismos productos en distinto orden no se bloquean
+mutuamente. Si aun así Postgres aborta la transacción por deadlock o por
+serialización, `con_reintentos` la repite con espera exponencial.
+
+Cada cambio de stock escribe además su movimiento en el kardex
+(MovimientoStock) con el saldo resultante y, si cruzó stock_minimo o
+stock_maximo, una AlertaStock, dentro de la misma transacción.
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models.movimientoStock import MovimientoStock
+from app.models.presentacion import Presentacion
+from app.models.producto import Producto
+from app.services import alertas_stock, cache
+
+
+T = TypeVar("T")
+
+# Códigos SQLSTATE que indican que la transacción puede repetirse
+SQLSTATES_REINTENTABLES = {"40001", "40P01"}  # serialization_failure, deadlock_detected
+MAX_REINTENTOS = 3
+ESPERA_BASE_SEGUNDOS = 0.05
+
+# Tipos de movimiento del kardex -> documento de origen
+MOVIMIENTO_INICIAL = "INICIAL"
+MOVIMIENTO_AJUSTE = "AJUSTE"
+MOVIMIENTO_CONCILIACION = "CONCILIACION"
+MOVIMIENTO_VENTA = "VENTA"
+MOVIMIENTO_ANULACION_VENTA = "ANULACION_VENTA"
+MOVIMIENTO_COMPRA = "COMPRA"
+MOVIMIENTO_ANULACION_COMPRA = "ANULACION_COMPRA"
+MOVIMIENTO_ELIMINACION_COMPRA = "ELIMINACION_COMPRA"
+MOVIMIENTO_DETALLE_COMPRA = "DETALLE_COMPRA"
+TIPOS_MOVIMIENTO = {
+    MOVIMIENTO_INICIAL: "producto",
+    MOVIMIENTO_AJUSTE: "producto",
+    MOVIMIENTO_CONCILIACION: "producto",
+    MOVIMIENTO_VENTA: "venta",
+    MOVIMIENTO_ANULACION_VENTA: "venta",
+    MOVIMIENTO_COMPRA: "compra",
+    MOVIMIENTO_ANULACION_COMPRA: "compra",
+    MOVIMIENTO_ELIMINACION_COMPRA: "compra",
+    MOVIMIENTO_DETALLE_COMPRA: "compra",
+}
+
+
+class MetricasBloqueo:
+    """Métricas en memoria del bloqueo de filas de producto (por proceso)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.bloqueos = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self.reintentos = 0
+            self.reintentos_agotados = 0
+            self._espera_por_producto: Dict[int, List[float]] = {}
+
+    def registrar_bloqueo(self, ids_producto: List[int], segundos: float):
+        with self._lock:
+            self.bloqueos += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            for id_producto in ids_producto:
+                acumulado = self._espera_por_producto.setdefault(id_producto, [0, 0.0])
+                acumulado[0] += 1
+                acumulado[1] += segundos
+
+    def registrar_reintento(self, agotado: bool = False):
+        with self._lock:
+            if agotado:
+                self.reintentos_agotados += 1
+            else:
+                self.reintentos += 1
+
+    def resumen(self, top: int = 10) -> dict:
+        """Devuelve los contadores y los productos con más tiempo de espera acumulado."""
+        with self._lock:
+            mas_disputados = sorted(
+                self._espera_por_producto.items(), key=lambda item: item[1][1], reverse=True
+            )[:top]
+            return {
+                "bloqueos": self.bloqueos,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+                "espera_media_ms": round(self.espera_total * 1000 / self.bloqueos, 3) if self.bloqueos else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+                "reintentos": self.reintentos,
+                "reintentos_agotados": self.reintentos_agotados,
+                "productos_mas_disputados": [
+                    {
+                        "id_producto": id_producto,
+                        "bloqueos": bloqueos,
+                        "espera_total_ms": round(espera * 1000, 3),
+                    }
+                    for id_producto, (bloqueos, espera) in mas_disputados
+                ],
+            }
+
+
+# Instancia global de métricas
+metricas_bloqueo = MetricasBloqueo()
+
+
+class StockInsuficienteError(ValueError):
+    """Uno o más productos no tienen stock suficiente para descontarse (ver faltantes_por_producto)."""
+
+    def __init__(self, faltantes: List[dict]):
+        self.faltantes = faltantes
+        super().__init__("; ".join(mensaje_faltante(f) for f in faltantes))
+
+
+def mensaje_faltante(faltante: dict) -> str:
+    lineas = faltante["lineas"]
+    donde = f"línea {lineas[0]}" if len(lineas) == 1 else "líneas " + ", ".join(map(str, lineas))
+    return (
+        f"Stock insuficiente para {faltante['producto']} ({donde}). "
+        f"Disponible: {faltante['disponible']}, Requerido: {faltante['requerido']}"
+    )
+
+
+def resolver_presentaciones(db: Session, ids_presentacion: Iterable[int]) -> Dict[int, dict]:
+    """
+    Obtiene en una sola consulta las presentaciones indicadas junto con su producto.
+
+    Returns:
+        Dict id_presentacion -> {"id_producto", "cantidad_base", "precio_compra"}
+    """
+    ids = set(ids_presentacion)
+    if not ids:
+        return {}
+
+    filas = db.execute(
+        select(
+            Presentacion.id,
+            Presentacion.id_producto,
+            Presentacion.cantidad_base,
+            Presentacion.precio_compra,
+        )
+        .join(Producto, Producto.id == Presentacion.id_producto)
+        .where(Presentacion.id.in_(ids))
+    ).all()
+
+    return {
+        fila.id: {
+            "id_producto": fila.id_producto,
+            "cantidad_base": fila.cantidad_base,
+            "precio_compra": fila.precio_compra,
+        }
+        for fila in filas
+    }
+
+
+def unidades_por_producto(lineas: Iterable[tuple], presentaciones: Dict[int, dict]) -> Dict[int, int]:
+    """
+    Agrupa por producto las unidades base de una lista de líneas (id_presentacion, cantidad).
+    """
+    unidades = defaultdict(int)
+    for id_presentacion, cantidad in lineas:
+        presentacion = presentaciones[id_presentacion]
+        unidades[presentacion["id_producto"]] += cantidad * presentacion["cantidad_base"]
+    return dict(unidades)
+
+
+def faltantes_por_producto(
+    lineas: List[tuple],
+    presentaciones: Dict[int, dict],
+    requeridos: Dict[int, int],
+    sin_stock: Iterable[int],
+    disponible: Dict[int, int],
+    nombres: Dict[int, str],
+) -> List[dict]:
+    """
+    Un faltante por producto de `sin_stock`: unidades base requeridas entre todas las
+    líneas (id_presentacion, cantidad) del ticket y los números de esas líneas (desde 1).
+    """
+    lineas_producto = defaultdict(list)
+    for numero, (id_presentacion, _) in enumerate(lineas, start=1):
+        lineas_producto[presentaciones[id_presentacion]["id_producto"]].append(numero)
+    return [
+        {
+            "id_producto": id_producto,
+            "producto": nombres[id_producto],
+            "lineas": lineas_producto[id_producto],
+            "disponible": disponible[id_producto],
+            "requerido": requeridos[id_producto],
+        }
+        for id_producto in sorted(sin_stock)
+    ]
+
+
+def es_error_reintentable(error: Exception) -> bool:
+    """Indica si un error de base de datos es un deadlock o un fallo de serialización."""
+    if not isinstance(error, DBAPIError):
+        return False
+    original = error.orig
+    sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+    return sqlstate in SQLSTATES_REINTENTABLES
+
+
+def con_reintentos(db: Session, operacion: Callable[[], T], intentos: int = MAX_REINTENTOS) -> T:
+    """
+    Ejecuta una operación transaccional y la repite si la base de datos la aborta
+    por deadlock o serialización. Cualquier otro error hace rollback y se propaga.
+    """
+    for intento in range(intentos + 1):
+        try:
+            return operacion()
+        except Exception as e:
+            db.rollback()
+            if not es_error_reintentable(e):
+                raise
+            if intento == intentos:
+                metricas_bloqueo.registrar_reintento(agotado=True)
+                raise
+            metricas_bloqueo.registrar_reintento()
+            espera = ESPERA_BASE_SEGUNDOS * (2 ** intento)
+            time.sleep(espera + random.uniform(0, espera))
+
+
+def bloquear_productos(db: Session, ids_producto: Iterable[int]) -> None:
+    """
+    Bloquea las filas de producto en orden ascendente de id con una sola sentencia
+    SELECT ... FOR UPDATE y registra el tiempo de espera.
+    """
+    ids = sorted(set(ids_producto))
+    if not ids or db.get_bind().dialect.name == "sqlite":
+        # SQLite bloquea la base completa al escribir; no hay bloqueo por fila
+        return
+
+    inicio = time.perf_counter()
+    db.execute(
+        select(Producto.id)
+        .where(Producto.id.in_(ids))
+        .order_by(Producto.id)
+        .with_for_update()
+    ).all()
+    metricas_bloqueo.registrar_bloqueo(ids, time.perf_counter() - inicio)
+
+
+def registrar_movimientos(
+    db: Session,
+    movimientos: Dict[int, tuple],
+    tipo: str,
+    id_origen: Optional[int] = None,
+    id_usuario: Optional[int] = None,
+) -> None:
+    """
+    Escribe en el kardex un movimiento por producto, en la transacción actual.
+
+    Args:
+        movimientos: Dict id_producto -> (cantidad con signo, saldo resultante)
+        tipo: Uno de TIPOS_MOVIMIENTO
+    """
+    if not movimientos:
+        return
+    fecha = datetime.now()
+    db.execute(
+        insert(MovimientoStock),
+        [
+            {
+                "id_producto": id_producto,
+                "fecha": fecha,
+                "tipo": tipo,
+                "cantidad": cantidad,
+                "saldo": saldo,
+                "origen": TIPOS_MOVIMIENTO[tipo],
+                "id_origen": id_origen,
+                "id_usuario": id_usuario,
+            }
+            for id_producto, (cantidad, saldo) in sorted(movimientos.items())
+        ],
+    )
+    alertas_stock.registrar_cruces(db, movimientos, fecha, TIPOS_MOVIMIENTO[tipo], id_origen)
+
+
+def _saldos(db: Session, ids_producto: Iterable[int]) -> Dict[int, int]:
+    """stock_actual de filas ya bloqueadas/actualizadas en esta transacción (motores sin RETURNING)."""
+    filas = db.execute(select(Producto.id, Producto.stock_actual).where(Producto.id.in_(list(ids_producto)))).all()
+    return {fila.id: fila.stock_actual for fila in filas}
+
+
+def ajustar_stock(
+    db: Session,
+    deltas: Dict[int, int],
+    tipo: str,
+    id_origen: Optional[int] = None,
+    id_usuario: Optional[int] = None,
+) -> Dict[int, int]:
+    """
+    Suma (o resta, si el delta es negativo) unidades al stock de varios productos
+    con un único UPDATE, sin validar que el resultado quede en positivo.
+    Se usa en compras y anulaciones, donde el movimiento ya está decidido.
+    Registra un movimiento de kardex por producto.
+
+    Returns:
+        Dict id_producto -> stock_actual resultante
+    """
+    deltas = {id_producto: unidades for id_producto, unidades in deltas.items() if unidades}
+    if not deltas:
+        return {}
+
+    bloquear_productos(db, deltas)
+    cache.invalidar_al_confirmar(db, deltas)
+
+    tabla = Producto.__table__
+    delta = case(deltas, value=tabla.c.id)
+    sentencia = (
+        update(tabla)
+        .where(tabla.c.id.in_(list(deltas)))
+        .values(stock_actual=func.coalesce(tabla.c.stock_actual, 0) + delta)
+    )
+    if db.get_bind().dialect.update_returning:
+        saldos = dict(db.execute(sentencia.returning(tabla.c.id, tabla.c.stock_actual)).all())
+    else:
+        db.execute(sentencia)
+        saldos = _saldos(db, deltas)
+
+    registrar_movimientos(
+        db,
+        {id_producto: (deltas[id_producto], saldo) for id_producto, saldo in saldos.items()},
+        tipo, id_origen=id_origen, id_usuario=id_usuario,
+    )
+    return saldos
+
+
+def descontar_stock(
+    db: Session,
+    requeridos: Dict[int, int],
+    tipo: str = MOVIMIENTO_VENTA,
+    id_origen: Optional[int] = None,
+    id_usuario: Optional[int] = None,
+) -> List[int]:
+    """
+    Descuenta stock de varios productos con un UPDATE condicional
+    (stock_actual >= requerido), tras bloquear las filas en orden de id,
+    y registra en el kardex los que sí se descontaron.
+
+    Returns:
+        Lista de ids de producto que NO pudieron descontarse por falta de stock.
+        Los que sí se descontaron quedan modificados en la transacción actual;
+        el llamador decide si hace rollback.
+    """
+    requeridos = {id_producto: unidades for id_producto, unidades in requeridos.items() if unidades}
+    if not requeridos:
+        return []
+
+    bloquear_productos(db, requeridos)
+    cache.invalidar_al_confirmar(db, requeridos)
+
+    tabla = Producto.__table__
+
+    if db.get_bind().dialect.update_returning:
+        requerido = case(requeridos, value=tabla.c.id)
+        resultado = db.execute(
+            update(tabla)
+            .where(tabla.c.id.in_(list(requeridos)), tabla.c.stock_actual >= requerido)
+            .values(stock_actual=tabla.c.stock_actual - requerido)
+            .returning(tabla.c.id, tabla.c.stock_actual)
+        )
+        saldos = dict(resultado.all())
+    else:
+        # Motores sin UPDATE ... RETURNING (p. ej. MySQL): una sentencia por producto
+        descontados = set()
+        for id_producto, unidades in requeridos.items():
+            resultado = db.execute(
+                update(tabla)
+                .where(tabla.c.id == id_producto, tabla.c.stock_actual >= unidades)
+                .values(stock_actual=tabla.c.stock_actual - unidades)
+            )
+            if resultado.rowcount:
+                descontados.add(id_producto)
+        saldos = _saldos(db, descontados) if descontados else {}
+
+    sin_stock = sorted(set(requeridos) - set(saldos))
+    if not sin_stock:
+        registrar_movimientos(
+            db,
+            {id_producto: (-requeridos[id_producto], saldo) for id_producto, saldo in saldos.items()},
+            tipo, id_origen=id_origen, id_usuario=id_usuario,
+        )
+    return sin_stock
+
+
+def descontar_stock_lote(
+    db: Session,
+    documentos: List[Tuple[int, Dict[int, int]]],
+    tipo: str = MOVIMIENTO_VENTA,
+    id_usuario: Optional[int] = None,
+) -> Dict[int, int]:
+    """
+    Descuenta el stock de varios documentos (p. ej. un lote de tickets) con un
+    único UPDATE por la suma de cada producto, y registra en el kardex un
+    movimiento por documento y producto con su saldo corrido.
+    El llamador ya bloqueó las filas (bloquear_productos) y comprobó que el
+    stock alcanza: aquí no se valida.
+
+    Args:
+        documentos: Lista de (id_origen, {id_producto: unidades}) en orden de aplicación
+
+    Returns:
+        Dict id_producto -> stock_actual resultante
+    """
+    totales = defaultdict(int)
+    for _, requeridos in documentos:
+        for id_producto, unidades in requeridos.items():
+            totales[id_producto] += unidades
+    totales = {id_producto: unidades for id_producto, unidades in totales.items() if unidades}
+    if not totales:
+        return {}
+
+    cache.invalidar_al_confirmar(db, totales)
+    tabla = Producto.__table__
+    sentencia = (
+        update(tabla)
+        .where(tabla.c.id.in_(list(totales)))
+        .values(stock_actual=func.coalesce(tabla.c.stock_actual, 0) - case(totales, value=tabla.c.id))
+    )
+    if db.get_bind().dialect.update_returning:
+        saldos = dict(db.execute(sentencia.returning(tabla.c.id, tabla.c.stock_actual)).all())
+    else:
+        db.execute(sentencia)
+        saldos = _saldos(db, totales)
+
+    fecha = datetime.now()
+    saldo_corrido = {id_producto: saldos[id_producto] + totales[id_producto] for id_producto in saldos}
+    filas = []
+    for id_origen, requeridos in documentos:
+        for id_producto in sorted(requeridos):
+            if not requeridos[id_producto] or id_producto not in saldo_corrido:
+                continue
+            saldo_corrido[id_producto] -= requeridos[id_producto]
+            filas.append({
+                "id_producto": id_producto,
+                "fecha": fecha,
+                "tipo": tipo,
+                "cantidad": -requeridos[id_producto],
+                "saldo": saldo_corrido[id_producto],
+                "origen": TIPOS_MOVIMIENTO[tipo],
+                "id_origen": id_origen,
+                "id_usuario": id_usuario,
+            })
+    db.execute(insert(MovimientoStock), filas)
+    # Una alerta por producto para todo el lote (sin documento concreto)
+    alertas_stock.registrar_cruces(
+        db, {id_producto: (-totales[id_producto], saldo) for id_producto, saldo in saldos.items()},
+        fecha, TIPOS_MOVIMIENTO[tipo],
+    )
+    return saldos
+
+
+def fijar_stock(db: Session, id_producto: int, stock: int, id_usuario: Optional[int] = None) -> None:
+    """
+    Fija el stock de un producto a un valor absoluto (ajuste manual de inventario)
+    y registra la diferencia como movimiento AJUSTE.
+    """
+    bloquear_productos(db, [id_producto])
+    anterior = db.execute(select(Producto.stock_actual).where(Producto.id == id_producto)).scalar()
+    diferencia = stock - (anterior or 0)
+    if not diferencia:
+        return
+    cache.invalidar_al_confirmar(db, [id_producto])
+    db.execute(update(Producto.__table__).where(Producto.__table__.c.id == id_producto).values(stock_actual=stock))
+    registrar_movimientos(db, {id_producto: (diferencia, stock)}, MOVIMIENTO_AJUSTE, id_origen=id_producto, id_usuario=id_usuario)
+
+
+def obtener_stock(db: Session, ids_producto: Iterable[int]) -> Dict[int, dict]:
+    """Obtiene nombre y stock_actual de los productos indicados."""
+    ids = set(ids_producto)
+    if not ids:
+        return {}
+    filas = db.execute(
+        select(Producto.id, Producto.nombre, Producto.stock_actual).where(Producto.id.in_(ids))
+    ).all()
+    return {fila.id: {"nombre": fila.nombre, "stock_actual": fila.stock_actual} for fila in filas}
@@ -0,0 +1,10 @@
+"""
+Worker de gunicorn para producción (ver gunicorn.conf.py).
+"""
+from uvicorn_worker import UvicornWorker
+
+
+class UvicornWorkerProduccion(UvicornWorker):
+    """UvicornWorker con uvloop y httptools fijos (vienen con uvicorn[standard]) en lugar de "auto"."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
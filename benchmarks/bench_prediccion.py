@@ -0,0 +1,51 @@
+"""
+Benchmark del ajuste de pronósticos de app/services/prediccion_demanda.py.
+
+Genera ventas diarias sintéticas (Poisson con estacionalidad semanal) para
+50.000 productos × 2 años y mide el ajuste vectorizado de los tres modelos,
+la validación y la elección por producto. No usa base de datos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_prediccion
+    BENCH_PRODUCTOS=10000 BENCH_DIAS=365 python -m benchmarks.bench_prediccion
+"""
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+
+from app.services import prediccion_demanda
+
+PRODUCTOS = int(os.getenv("BENCH_PRODUCTOS", "50000"))
+DIAS = int(os.getenv("BENCH_DIAS", "730"))
+HORIZONTE = prediccion_demanda.HORIZONTE_DIAS
+PATRON_SEMANAL = np.array([1.2, 1.0, 1.0, 1.0, 1.1, 1.5, 0.4], dtype=np.float32)
+
+
+def generar_serie(rng: np.random.Generator) -> np.ndarray:
+    media = rng.gamma(1.0, 3.0, PRODUCTOS).astype(np.float32)
+    con_estacionalidad = rng.random(PRODUCTOS) < 0.5
+    factor = np.where(con_estacionalidad[:, None], PATRON_SEMANAL[np.arange(DIAS) % 7], 1)
+    return rng.poisson(media[:, None] * factor).astype(np.float32)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    serie = generar_serie(rng)
+    print(f"{PRODUCTOS} productos × {DIAS} días ({serie.nbytes / 1e6:.0f} MB), horizonte {HORIZONTE} días")
+
+    inicio = time.perf_counter()
+    resultado = prediccion_demanda.pronosticar(serie, dia_semana_inicio=0, horizonte=HORIZONTE)
+    segundos = time.perf_counter() - inicio
+
+    for i, modelo in enumerate(prediccion_demanda.MODELOS):
+        elegidos = resultado["modelo"] == i
+        mae = resultado["error_mae"][elegidos].mean() if elegidos.any() else float("nan")
+        print(f"  {modelo:<24} {int(elegidos.sum()):>8} productos  MAE medio {mae:.3f}")
+    print(f"Ajuste: {segundos:.2f}s ({segundos / PRODUCTOS * 1e6:.1f} µs por producto)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Configuración de gunicorn para producción (Procfile / render.yaml):
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Todo se puede ajustar con variables de entorno:
+    PORT                    puerto (10000)
+    WEB_CONCURRENCY         workers (por defecto, uno por CPU disponible, mínimo 2)
+    GUNICORN_MAX_REQUESTS   solicitudes antes de reciclar un worker (2000; 0 = nunca)
+    GUNICORN_KEEPALIVE      segundos que se mantiene abierta una conexión ociosa (75)
+    GUNICORN_TIMEOUT        segundos sin respuesta del worker antes de reiniciarlo (60)
+    GUNICORN_LOG_LEVEL      nivel de log (info)
+
+Cada worker tiene sus propios pools (DB_POOL_SIZE + DB_MAX_OVERFLOW por motor):
+WEB_CONCURRENCY x conexiones por worker no debe superar max_connections de la base.
+"""
+import os
+
+
+def _cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))  # CPUs asignadas al contenedor, no las del host
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+
+# Un event loop por núcleo; mínimo 2 para que reciclar un worker no deje al servicio sin capacidad
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(_cpus(), 2))))
+worker_class = "app.workers.UvicornWorkerProduccion"
+
+# La app (modelos, routers, numpy) se importa una vez en el master y los workers
+# la heredan por fork compartiendo memoria; ver post_fork para las conexiones.
+preload_app = True
+
+# Reciclar cada worker tras N solicitudes acota el crecimiento de memoria; el
+# jitter evita que todos se reinicien a la vez.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+# Mayor que el idle timeout del proxy de Render, para que no sea el worker quien
+# cierre una conexión que el proxy está por reutilizar.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+
+# Heartbeat de los workers en memoria (en contenedores /tmp puede estar en disco)
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Con preload_app el master ya abrió conexiones (verificar_esquema en app.main):
+    # cada worker debe abrir las suyas.
+    from app.database import reiniciar_pools_tras_fork
+
+    reiniciar_pools_tras_fork()
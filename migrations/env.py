@@ -0,0 +1,68 @@
+"""
+Entorno de Alembic: DATABASE_URL de Settings (o `alembic -x url=...`) y los
+modelos de app.models como esquema de referencia para --autogenerate.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import get_settings
+from app.database import Base
+import app.models  # noqa: F401  (registra todas las tablas en Base.metadata)
+from app.services.busqueda_productos import INDICES_BUSQUEDA
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+URL = (
+    context.get_x_argument(as_dictionary=True).get("url")
+    or config.get_main_option("sqlalchemy.url")
+    or get_settings().DATABASE_URL
+)
+
+
+def _incluir_objeto(conexion):
+    """
+    Las variantes por motor de un índice (Index(...).ddl_if, p. ej. ix_ventas_fecha_id)
+    comparten nombre: --autogenerate solo compara la que create_all crearía en este motor.
+    Los índices de búsqueda de PostgreSQL (revisión 0002) no están en los modelos.
+    """
+    def incluir(objeto, nombre, tipo, reflejado, comparado_con):
+        if tipo == "index" and reflejado and nombre in INDICES_BUSQUEDA:
+            return False
+        ddl_if = getattr(objeto, "_ddl_if", None)
+        if tipo == "index" and not reflejado and ddl_if is not None:
+            return ddl_if._should_execute(None, objeto, conexion)
+        return True
+    return incluir
+
+
+def run_migrations_offline():
+    """`alembic upgrade head --sql`: genera el SQL sin conectarse."""
+    context.configure(url=URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(URL, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=_incluir_objeto(connection),
+            # SQLite no admite la mayoría de los ALTER TABLE: se recrea la tabla
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,304 @@
+"""
+Esquema inicial: las tablas e índices de app.models tal como los creaba
+Base.metadata.create_all al importar app.main, antes de las migraciones.
+
+Bases existentes (creadas con create_all y actualizadas con los scripts
+migration_*.py de la raíz): no aplicar esta revisión, marcarla y aplicar las
+siguientes
+    alembic stamp 0001
+    alembic upgrade head
+Bases nuevas:
+    alembic upgrade head
+
+Revisión: 0001
+Anterior: ninguna
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('estado_pago',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('nombre', sa.String(length=45), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_estado_pago_id'), 'estado_pago', ['id'], unique=False)
+    op.create_table('tipo_usuario',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nombre')
+    )
+    op.create_index(op.f('ix_tipo_usuario_id'), 'tipo_usuario', ['id'], unique=False)
+    op.create_table('usuario',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('apellido', sa.String(length=100), nullable=True),
+    sa.Column('dni', sa.String(length=100), nullable=True),
+    sa.Column('contrasena', sa.String(length=200), nullable=False),
+    sa.Column('estado', sa.String(length=1), nullable=False),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.Column('id_tipo_usuario', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['id_tipo_usuario'], ['tipo_usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_usuario_apellido'), 'usuario', ['apellido'], unique=False)
+    op.create_index(op.f('ix_usuario_dni'), 'usuario', ['dni'], unique=True)
+    op.create_index(op.f('ix_usuario_id'), 'usuario', ['id'], unique=False)
+    op.create_index(op.f('ix_usuario_nombre'), 'usuario', ['nombre'], unique=False)
+    op.create_table('categoria',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('estado', sa.String(length=1), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_categoria_id'), 'categoria', ['id'], unique=False)
+    op.create_index(op.f('ix_categoria_nombre'), 'categoria', ['nombre'], unique=True)
+    op.create_table('cliente',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('apellido', sa.String(length=100), nullable=True),
+    sa.Column('dni', sa.String(length=20), nullable=True),
+    sa.Column('telefono', sa.BigInteger(), nullable=True),
+    sa.Column('correo', sa.String(length=100), nullable=True),
+    sa.Column('estado', sa.String(length=1), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cliente_apellido'), 'cliente', ['apellido'], unique=False)
+    op.create_index(op.f('ix_cliente_correo'), 'cliente', ['correo'], unique=True)
+    op.create_index(op.f('ix_cliente_dni'), 'cliente', ['dni'], unique=True)
+    op.create_index(op.f('ix_cliente_id'), 'cliente', ['id'], unique=False)
+    op.create_index(op.f('ix_cliente_nombre'), 'cliente', ['nombre'], unique=False)
+    op.create_table('marca',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('estado', sa.String(length=1), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_marca_id'), 'marca', ['id'], unique=False)
+    op.create_index(op.f('ix_marca_nombre'), 'marca', ['nombre'], unique=True)
+    op.create_table('proveedor',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('razon_social', sa.String(length=250), nullable=True),
+    sa.Column('ruc', sa.BigInteger(), nullable=True),
+    sa.Column('telefono', sa.BigInteger(), nullable=True),
+    sa.Column('correo', sa.String(length=100), nullable=True),
+    sa.Column('direccion', sa.String(length=250), nullable=True),
+    sa.Column('avatar', sa.String(length=250), nullable=True),
+    sa.Column('estado', sa.String(length=1), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_proveedor_id'), 'proveedor', ['id'], unique=False)
+    op.create_index(op.f('ix_proveedor_razon_social'), 'proveedor', ['razon_social'], unique=False)
+    op.create_index(op.f('ix_proveedor_ruc'), 'proveedor', ['ruc'], unique=True)
+    op.create_table('tipo_producto',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('estado', sa.String(length=1), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tipo_producto_id'), 'tipo_producto', ['id'], unique=False)
+    op.create_index(op.f('ix_tipo_producto_nombre'), 'tipo_producto', ['nombre'], unique=True)
+    op.create_table('compras',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('fecha_compra', sa.DateTime(), nullable=True),
+    sa.Column('fecha_entrega', sa.DateTime(), nullable=True),
+    sa.Column('totalcondescuento', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('descuento', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('totalsindescuento', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.Column('id_proveedor', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.String(length=15), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+    sa.Column('fecha_edicion', sa.DateTime(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['id_proveedor'], ['proveedor.id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_compras_id'), 'compras', ['id'], unique=False)
+    op.create_table('producto',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('codigo', sa.String(length=50), nullable=True),
+    sa.Column('nombre', sa.String(length=100), nullable=True),
+    sa.Column('unidad_base', sa.String(length=50), nullable=True),
+    sa.Column('adicional', sa.String(length=250), nullable=True),
+    sa.Column('stock_minimo', sa.Integer(), nullable=True),
+    sa.Column('stock_actual', sa.Integer(), nullable=True),
+    sa.Column('stock_maximo', sa.Integer(), nullable=True),
+    sa.Column('avatar', sa.String(length=250), nullable=True),
+    sa.Column('estado', sa.String(length=1), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.Column('id_categoria', sa.Integer(), nullable=True),
+    sa.Column('id_tipo_producto', sa.Integer(), nullable=True),
+    sa.Column('id_marca', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['id_categoria'], ['categoria.id'], ),
+    sa.ForeignKeyConstraint(['id_marca'], ['marca.id'], ),
+    sa.ForeignKeyConstraint(['id_tipo_producto'], ['tipo_producto.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_producto_codigo'), 'producto', ['codigo'], unique=True)
+    op.create_index(op.f('ix_producto_id'), 'producto', ['id'], unique=False)
+    op.create_index(op.f('ix_producto_nombre'), 'producto', ['nombre'], unique=False)
+    op.create_table('ventas',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('id_cliente', sa.Integer(), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=True),
+    sa.Column('totalcondescuento', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('descuento', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('totalsindescuento', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.String(length=15), nullable=False),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.Column('cliente_nombre', sa.String(length=100), nullable=True),
+    sa.Column('cliente_dni', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['id_cliente'], ['cliente.id'], ),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ventas_id'), 'ventas', ['id'], unique=False)
+    op.create_table('presentaciones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_producto', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('cantidad_base', sa.Integer(), nullable=False),
+    sa.Column('precio_venta', sa.Float(), nullable=False),
+    sa.Column('precio_compra', sa.Float(), nullable=False),
+    sa.Column('estado', sa.String(length=10), nullable=True),
+    sa.Column('fecha_creacion', sa.String(length=25), nullable=False),
+    sa.Column('fecha_edicion', sa.String(length=25), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('updated_by', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['usuario.id'], ),
+    sa.ForeignKeyConstraint(['id_producto'], ['producto.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['updated_by'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_presentaciones_id'), 'presentaciones', ['id'], unique=False)
+    op.create_table('detalle_compra',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('id_compra', sa.Integer(), nullable=False),
+    sa.Column('id_presentacion', sa.Integer(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('precio_unitario', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+    sa.Column('fecha_edicion', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_compra'], ['compras.id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_presentacion'], ['presentaciones.id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_detalle_compra_id'), 'detalle_compra', ['id'], unique=False)
+    op.create_table('detalle_venta',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('id_venta', sa.Integer(), nullable=True),
+    sa.Column('id_presentacion', sa.Integer(), nullable=True),
+    sa.Column('cantidad', sa.Integer(), nullable=True),
+    sa.Column('precio_unitario', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.Column('subtotal', sa.DECIMAL(precision=10, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['id_presentacion'], ['presentaciones.id'], ),
+    sa.ForeignKeyConstraint(['id_venta'], ['ventas.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_detalle_venta_id'), 'detalle_venta', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_detalle_venta_id'), table_name='detalle_venta')
+    op.drop_table('detalle_venta')
+    op.drop_index(op.f('ix_detalle_compra_id'), table_name='detalle_compra')
+    op.drop_table('detalle_compra')
+    op.drop_index(op.f('ix_presentaciones_id'), table_name='presentaciones')
+    op.drop_table('presentaciones')
+    op.drop_index(op.f('ix_ventas_id'), table_name='ventas')
+    op.drop_table('ventas')
+    op.drop_index(op.f('ix_producto_nombre'), table_name='producto')
+    op.drop_index(op.f('ix_producto_id'), table_name='producto')
+    op.drop_index(op.f('ix_producto_codigo'), table_name='producto')
+    op.drop_table('producto')
+    op.drop_index(op.f('ix_compras_id'), table_name='compras')
+    op.drop_table('compras')
+    op.drop_index(op.f('ix_tipo_producto_nombre'), table_name='tipo_producto')
+    op.drop_index(op.f('ix_tipo_producto_id'), table_name='tipo_producto')
+    op.drop_table('tipo_producto')
+    op.drop_index(op.f('ix_proveedor_ruc'), table_name='proveedor')
+    op.drop_index(op.f('ix_proveedor_razon_social'), table_name='proveedor')
+    op.drop_index(op.f('ix_proveedor_id'), table_name='proveedor')
+    op.drop_table('proveedor')
+    op.drop_index(op.f('ix_marca_nombre'), table_name='marca')
+    op.drop_index(op.f('ix_marca_id'), table_name='marca')
+    op.drop_table('marca')
+    op.drop_index(op.f('ix_cliente_nombre'), table_name='cliente')
+    op.drop_index(op.f('ix_cliente_id'), table_name='cliente')
+    op.drop_index(op.f('ix_cliente_dni'), table_name='cliente')
+    op.drop_index(op.f('ix_cliente_correo'), table_name='cliente')
+    op.drop_index(op.f('ix_cliente_apellido'), table_name='cliente')
+    op.drop_table('cliente')
+    op.drop_index(op.f('ix_categoria_nombre'), table_name='categoria')
+    op.drop_index(op.f('ix_categoria_id'), table_name='categoria')
+    op.drop_table('categoria')
+    op.drop_index(op.f('ix_usuario_nombre'), table_name='usuario')
+    op.drop_index(op.f('ix_usuario_id'), table_name='usuario')
+    op.drop_index(op.f('ix_usuario_dni'), table_name='usuario')
+    op.drop_index(op.f('ix_usuario_apellido'), table_name='usuario')
+    op.drop_table('usuario')
+    op.drop_index(op.f('ix_tipo_usuario_id'), table_name='tipo_usuario')
+    op.drop_table('tipo_usuario')
+    op.drop_index(op.f('ix_estado_pago_id'), table_name='estado_pago')
+    op.drop_table('estado_pago')
@@ -0,0 +1,75 @@
+"""
+Índices de búsqueda de productos (solo PostgreSQL: en otros motores la
+búsqueda usa el índice en memoria de app/services/busqueda_productos.py).
+
+- Extensión pg_trgm e índices GIN trigram sobre producto.codigo, producto.nombre,
+  marca.nombre y categoria.nombre (ILIKE '%texto%', operador % y word_similarity).
+  Si el servidor no ofrece la extensión se omiten y la búsqueda usa el índice
+  en memoria.
+- Índice GIN sobre el tsvector de nombre + adicional (búsqueda por prefijos)
+- Índices btree lower(codigo) / lower(nombre) text_pattern_ops para las consultas
+  de 1-2 caracteres (LIKE 'texto%', sin trigramas)
+- Índices btree sobre producto.id_marca y producto.id_categoria
+
+No están en los modelos (expresiones y operadores propios de PostgreSQL):
+migrations/env.py los excluye de --autogenerate con INDICES_BUSQUEDA.
+
+Revisión: 0002
+Anterior: 0001
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Debe coincidir con EXPRESION_DOCUMENTO en app/services/busqueda_productos.py
+EXPRESION_DOCUMENTO = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(producto.nombre, '') || ' ' || coalesce(producto.adicional, ''))"
+)
+
+INDICES = [
+    ("ix_producto_documento", f"producto USING gin (({EXPRESION_DOCUMENTO}))"),
+    ("ix_producto_codigo_prefijo", "producto (lower(codigo) text_pattern_ops)"),
+    ("ix_producto_nombre_prefijo", "producto (lower(nombre) text_pattern_ops)"),
+    ("ix_producto_id_marca", "producto (id_marca)"),
+    ("ix_producto_id_categoria", "producto (id_categoria)"),
+]
+INDICES_TRIGRAMAS = [
+    ("ix_producto_codigo_trgm", "producto USING gin (codigo gin_trgm_ops)"),
+    ("ix_producto_nombre_trgm", "producto USING gin (nombre gin_trgm_ops)"),
+    ("ix_marca_nombre_trgm", "marca USING gin (nombre gin_trgm_ops)"),
+    ("ix_categoria_nombre_trgm", "categoria USING gin (nombre gin_trgm_ops)"),
+]
+
+
+def upgrade():
+    contexto = op.get_context()
+    if contexto.dialect.name != "postgresql":
+        return
+
+    indices = list(INDICES)
+    # Con --sql no hay conexión para consultar: se asume la extensión disponible
+    disponible = contexto.as_sql or op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if disponible:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        indices += INDICES_TRIGRAMAS
+
+    for nombre, definicion in indices:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON {definicion}")
+    op.execute("ANALYZE producto")
+
+
+def downgrade():
+    if op.get_context().dialect.name != "postgresql":
+        return
+    # pg_trgm se deja instalada: otras bases u objetos pueden usarla
+    for nombre, _ in INDICES_TRIGRAMAS + INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nombre}")
@@ -0,0 +1,58 @@
+"""
+Kardex: movimiento_stock (cada entrada y salida de stock con su saldo)
+y snapshot_stock (fotos periódicas del stock por producto).
+
+En una base con productos, tomar la primera foto después de migrar con
+    python -m app.jobs.snapshot_stock
+
+Revisión: 0003
+Anterior: 0002
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('movimiento_stock',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('id_producto', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('tipo', sa.String(length=25), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('saldo', sa.Integer(), nullable=False),
+    sa.Column('origen', sa.String(length=20), nullable=True),
+    sa.Column('id_origen', sa.Integer(), nullable=True),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_producto'], ['producto.id'], ),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_movimiento_stock_fecha', 'movimiento_stock', ['fecha'], unique=False)
+    op.create_index('ix_movimiento_stock_origen', 'movimiento_stock', ['origen', 'id_origen'], unique=False)
+    op.create_index('ix_movimiento_stock_producto_fecha', 'movimiento_stock', ['id_producto', 'fecha', 'id'], unique=False)
+    op.create_table('snapshot_stock',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('id_producto', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_producto'], ['producto.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id_producto', 'fecha', name='uq_snapshot_stock_producto_fecha')
+    )
+    op.create_index('ix_snapshot_stock_fecha', 'snapshot_stock', ['fecha'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_snapshot_stock_fecha', table_name='snapshot_stock')
+    op.drop_table('snapshot_stock')
+    op.drop_index('ix_movimiento_stock_producto_fecha', table_name='movimiento_stock')
+    op.drop_index('ix_movimiento_stock_origen', table_name='movimiento_stock')
+    op.drop_index('ix_movimiento_stock_fecha', table_name='movimiento_stock')
+    op.drop_table('movimiento_stock')
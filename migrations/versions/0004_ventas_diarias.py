@@ -0,0 +1,52 @@
+"""
+Resúmenes diarios de ventas por producto, usuario y cliente
+(ventas_diarias_*), mantenidos al registrar y anular ventas.
+
+En una base con ventas, cargarlos después de migrar con
+    python -m app.jobs.backfill_resumen_ventas
+
+Revisión: 0004
+Anterior: 0003
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ventas_diarias_producto',
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('id_producto', sa.Integer(), nullable=False),
+    sa.Column('ventas', sa.Integer(), nullable=False),
+    sa.Column('unidades', sa.Integer(), nullable=False),
+    sa.Column('importe', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('fecha', 'id_producto')
+    )
+    op.create_table('ventas_diarias_usuario',
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('ventas', sa.Integer(), nullable=False),
+    sa.Column('total', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('descuento', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('fecha', 'id_usuario')
+    )
+    op.create_table('ventas_diarias_cliente',
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('id_cliente', sa.Integer(), nullable=False),
+    sa.Column('ventas', sa.Integer(), nullable=False),
+    sa.Column('total', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('descuento', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('fecha', 'id_cliente')
+    )
+
+
+def downgrade():
+    op.drop_table('ventas_diarias_cliente')
+    op.drop_table('ventas_diarias_usuario')
+    op.drop_table('ventas_diarias_producto')
@@ -0,0 +1,35 @@
+"""
+prediccion_demanda: último pronóstico de demanda calculado por producto.
+
+Revisión: 0005
+Anterior: 0004
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('prediccion_demanda',
+    sa.Column('id_producto', sa.Integer(), nullable=False),
+    sa.Column('fecha_calculo', sa.DateTime(), nullable=False),
+    sa.Column('fecha_inicio', sa.Date(), nullable=False),
+    sa.Column('horizonte_dias', sa.Integer(), nullable=False),
+    sa.Column('modelo', sa.String(length=30), nullable=False),
+    sa.Column('alfa', sa.Float(), nullable=True),
+    sa.Column('error_mae', sa.Float(), nullable=False),
+    sa.Column('demanda_diaria', sa.Float(), nullable=False),
+    sa.Column('demanda_total', sa.Float(), nullable=False),
+    sa.Column('pronostico', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id_producto')
+    )
+
+
+def downgrade():
+    op.drop_table('prediccion_demanda')
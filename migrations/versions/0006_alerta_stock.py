@@ -0,0 +1,41 @@
+"""
+alerta_stock: cruces de stock mínimo / máximo detectados al mover stock,
+leídos por el stream SSE de alertas.
+
+Revisión: 0006
+Anterior: 0005
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('alerta_stock',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('id_producto', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('stock_anterior', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('stock_minimo', sa.Integer(), nullable=True),
+    sa.Column('stock_maximo', sa.Integer(), nullable=True),
+    sa.Column('origen', sa.String(length=20), nullable=True),
+    sa.Column('id_origen', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_producto'], ['producto.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alerta_stock_fecha', 'alerta_stock', ['fecha'], unique=False)
+    op.create_index('ix_alerta_stock_producto', 'alerta_stock', ['id_producto', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_alerta_stock_producto', table_name='alerta_stock')
+    op.drop_index('ix_alerta_stock_fecha', table_name='alerta_stock')
+    op.drop_table('alerta_stock')
@@ -0,0 +1,35 @@
+"""
+clave_idempotencia: Idempotency-Key de ventas y compras por usuario
+(ventas en lote de los puntos de venta y reintentos de creación).
+
+Revisión: 0007
+Anterior: 0006
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('clave_idempotencia',
+    sa.Column('ambito', sa.String(length=10), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('clave', sa.String(length=100), nullable=False),
+    sa.Column('id_recurso', sa.Integer(), nullable=False),
+    sa.Column('huella', sa.String(length=64), nullable=True),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('expira', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('ambito', 'id_usuario', 'clave')
+    )
+    op.create_index('ix_clave_idempotencia_expira', 'clave_idempotencia', ['expira'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_clave_idempotencia_expira', table_name='clave_idempotencia')
+    op.drop_table('clave_idempotencia')
@@ -0,0 +1,30 @@
+"""
+marca_exportacion: marca de agua de la exportación analítica incremental.
+
+Revisión: 0008
+Anterior: 0007
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('marca_exportacion',
+    sa.Column('conjunto', sa.String(length=30), nullable=False),
+    sa.Column('marca', sa.DateTime(), nullable=False),
+    sa.Column('formato', sa.String(length=10), nullable=False),
+    sa.Column('fecha', sa.DateTime(), nullable=False),
+    sa.Column('particiones', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('conjunto')
+    )
+
+
+def downgrade():
+    op.drop_table('marca_exportacion')
@@ -0,0 +1,171 @@
+"""
+fecha_creacion / fecha_edicion a columnas de fecha reales e índices compuestos
+para las consultas por rango de fechas y por FK.
+
+- fecha_creacion y fecha_edicion de TABLAS_FECHAS pasan de VARCHAR(25)
+  (isoformat() o str(datetime) según el módulo) a TIMESTAMP en PostgreSQL y
+  DATETIME(6) en MySQL. Los valores que no empiezan con AAAA-MM-DD quedan en
+  NULL (fecha_creacion: fecha actual). En SQLite se normaliza el texto a
+  'AAAA-MM-DD HH:MM:SS' y se recrea la tabla con el tipo DATETIME.
+- Índices (ver __table_args__ de los modelos):
+    ventas (fecha, id), (id_cliente, id), (id_usuario, id),
+        (id_cliente, fecha, id), (id_usuario, fecha, id)
+    compras (fecha_compra, id), (id_proveedor, id), (id_usuario, id),
+        (id_proveedor, fecha_compra, id), (id_usuario, fecha_compra, id)
+    En PostgreSQL los de fecha son (fecha DESC NULLS LAST, id DESC), el orden
+    de la paginación por cursor; SQLite no admite NULLS LAST en un índice.
+    parciales WHERE estado = 'A' en producto, cliente, proveedor y presentaciones
+  En PostgreSQL se crean con CREATE INDEX CONCURRENTLY (sin bloquear escrituras).
+
+Las columnas que ya son de fecha y los índices existentes se omiten.
+
+Revisión: 0009
+Anterior: 0008
+Fecha: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+TABLAS_FECHAS = [
+    "usuario", "categoria", "marca", "tipo_producto", "cliente", "proveedor",
+    "producto", "presentaciones", "ventas",
+]
+COLUMNAS_FECHAS = [("fecha_creacion", False), ("fecha_edicion", True)]  # (columna, admite NULL)
+
+ACTIVOS = sa.text("estado = 'A'")
+INDICES = [
+    # (nombre, tabla, columnas, where)
+    ("ix_ventas_id_cliente_id", "ventas", ["id_cliente", "id"], None),
+    ("ix_ventas_id_usuario_id", "ventas", ["id_usuario", "id"], None),
+    ("ix_compras_id_proveedor_id", "compras", ["id_proveedor", "id"], None),
+    ("ix_compras_id_usuario_id", "compras", ["id_usuario", "id"], None),
+    ("ix_producto_activos", "producto", ["id"], ACTIVOS),
+    ("ix_cliente_activos", "cliente", ["id"], ACTIVOS),
+    ("ix_proveedor_activos", "proveedor", ["id"], ACTIVOS),
+    ("ix_presentaciones_producto_activas", "presentaciones", ["id_producto", "id"], ACTIVOS),
+]
+INDICES_FECHA_ID = [
+    # (nombre, tabla, columna de fecha, *prefijo)
+    ("ix_ventas_fecha_id", "ventas", "fecha"),
+    ("ix_ventas_id_cliente_fecha_id", "ventas", "fecha", "id_cliente"),
+    ("ix_ventas_id_usuario_fecha_id", "ventas", "fecha", "id_usuario"),
+    ("ix_compras_fecha_compra_id", "compras", "fecha_compra"),
+    ("ix_compras_id_proveedor_fecha_compra_id", "compras", "fecha_compra", "id_proveedor"),
+    ("ix_compras_id_usuario_fecha_compra_id", "compras", "fecha_compra", "id_usuario"),
+]
+
+
+def _es_texto(tabla: str, columna: str) -> bool:
+    if op.get_context().as_sql:
+        return True  # Con --sql no hay conexión para inspeccionar
+    for info in sa.inspect(op.get_bind()).get_columns(tabla):
+        if info["name"] == columna:
+            return "CHAR" in str(info["type"]).upper() or "TEXT" in str(info["type"]).upper()
+    return False
+
+
+def _convertir_postgresql(tabla: str, columnas: list):
+    with op.batch_alter_table(tabla) as tabla_lote:
+        for columna, nula in columnas:
+            valor = f"CASE WHEN {columna} ~ '^\\d{{4}}-\\d{{2}}-\\d{{2}}' THEN {columna}::timestamp END"
+            if not nula:
+                valor = f"COALESCE({valor}, now())"
+            tabla_lote.alter_column(
+                columna, type_=sa.DateTime(), existing_type=sa.String(25),
+                existing_nullable=nula, postgresql_using=valor,
+            )
+
+
+def _convertir_mysql(tabla: str, columnas: list):
+    for columna, nula in columnas:
+        respaldo = "NULL" if nula else "NOW(6)"
+        op.execute(
+            f"UPDATE {tabla} SET {columna} = CASE "
+            f"WHEN {columna} REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' THEN LEFT(REPLACE({columna}, 'T', ' '), 26) "
+            f"ELSE {respaldo} END"
+        )
+        op.alter_column(
+            tabla, columna, type_=mysql.DATETIME(fsp=6), existing_type=sa.String(25), existing_nullable=nula
+        )
+
+
+def _convertir_sqlite(tabla: str, columnas: list):
+    for columna, nula in columnas:
+        respaldo = "NULL" if nula else "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+        op.execute(
+            f"UPDATE {tabla} SET {columna} = {respaldo} "
+            f"WHERE {columna} NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+        )
+        op.execute(f"UPDATE {tabla} SET {columna} = REPLACE({columna}, 'T', ' ') WHERE {columna} LIKE '____-__-__T%'")
+    # alter_column haría CAST(... AS DATETIME), que en SQLite deja solo el año:
+    # se recrea la tabla declarando las columnas como DATETIME y se copia el texto tal cual
+    with op.batch_alter_table(
+        tabla,
+        recreate="always",
+        reflect_args=[sa.Column(columna, sa.DateTime(), nullable=nula) for columna, nula in columnas],
+    ):
+        pass
+
+
+def _revertir(tabla: str, columnas: list):
+    with op.batch_alter_table(tabla) as tabla_lote:
+        for columna, nula in columnas:
+            tabla_lote.alter_column(
+                columna, type_=sa.String(25), existing_type=sa.DateTime(), existing_nullable=nula
+            )
+
+
+def upgrade():
+    dialecto = op.get_context().dialect.name
+    convertir = {
+        "postgresql": _convertir_postgresql,
+        "mysql": _convertir_mysql,
+        "mariadb": _convertir_mysql,
+        "sqlite": _convertir_sqlite,
+    }.get(dialecto)
+    if convertir is None:
+        raise NotImplementedError(f"Motor no soportado: {dialecto}")
+
+    for tabla in TABLAS_FECHAS:
+        columnas = [(columna, nula) for columna, nula in COLUMNAS_FECHAS if _es_texto(tabla, columna)]
+        if columnas:
+            convertir(tabla, columnas)
+
+    existentes = set()
+    if not op.get_context().as_sql:
+        inspector = sa.inspect(op.get_bind())
+        existentes = {
+            indice["name"]
+            for tabla in {tabla for _, tabla, *_ in INDICES + INDICES_FECHA_ID}
+            for indice in inspector.get_indexes(tabla)
+        }
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    concurrente = {"postgresql_concurrently": dialecto == "postgresql"}
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas, donde in INDICES:
+            if nombre not in existentes:
+                op.create_index(
+                    nombre, tabla, columnas, postgresql_where=donde, sqlite_where=donde, **concurrente
+                )
+        for nombre, tabla, columna, *prefijo in INDICES_FECHA_ID:
+            if nombre in existentes:
+                continue
+            if dialecto == "postgresql":
+                columnas = [*prefijo, sa.text(f"{columna} DESC NULLS LAST"), sa.text("id DESC")]
+            else:
+                columnas = [*prefijo, columna, "id"]
+            op.create_index(nombre, tabla, columnas, **concurrente)
+
+
+def downgrade():
+    for nombre, tabla, *_ in reversed(INDICES + INDICES_FECHA_ID):
+        op.drop_index(nombre, table_name=tabla)
+    for tabla in reversed(TABLAS_FECHAS):
+        _revertir(tabla, COLUMNAS_FECHAS)